@@ -0,0 +1,106 @@
+"""
+Micro-benchmark of turning large crawled articles into LLM messages.
+
+Compares the previous Article, which ran markdownify on every `to_markdown`
+and split the titled markdown with `re.split`, against the memoized Article
+with its single-pass `to_message`. Each round does what a crawl does: build
+the message, then render the markdown once more (logging, `__main__`).
+Peak memory is measured with tracemalloc for one round.
+
+Usage:
+    uv run python -m benchmarks.bench_article
+"""
+
+import re
+import timeit
+import tracemalloc
+from urllib.parse import urljoin
+
+from markdownify import markdownify as md
+
+from src.crawler.article import Article
+
+PAGE_SIZES = [100_000, 500_000, 2_000_000]
+ITERATIONS = 3
+
+
+class PreviousArticle:
+    def __init__(self, title: str, html_content: str):
+        self.title = title
+        self.html_content = html_content
+
+    def to_markdown(self, including_title: bool = True) -> str:
+        markdown = ""
+        if including_title:
+            markdown += f"# {self.title}\n\n"
+        markdown += md(self.html_content)
+        return markdown
+
+    def to_message(self) -> list[dict]:
+        content = []
+        parts = re.split(r"!\[.*?\]\((.*?)\)", self.to_markdown())
+        for i, part in enumerate(parts):
+            if i % 2 == 1:
+                content.append(
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": urljoin(self.url, part.strip())},
+                    }
+                )
+            else:
+                content.append({"type": "text", "text": part.strip()})
+        return content
+
+
+def build_html(size: int) -> str:
+    section = (
+        "<h2>Section</h2><p>"
+        + "Readable <a href='/link'>content</a> with <b>markup</b>. " * 20
+        + "</p><p><img src='/images/chart.png' alt='Chart'></p>"
+    )
+    return "<div>" + section * (size // len(section) + 1) + "</div>"
+
+
+def crawl_round(cls, html: str, max_chars=None) -> None:
+    article = cls(title="Large page", html_content=html)
+    article.url = "https://example.com/articles/large"
+    (
+        article.to_message()
+        if max_chars is None
+        else article.to_message(max_chars=max_chars)
+    )
+    article.to_markdown()
+
+
+def peak_memory(func) -> float:
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main():
+    print(
+        f"{'html size':>10} {'before (s)':>11} {'after (s)':>10} {'after uncapped (s)':>19} "
+        f"{'before peak MB':>15} {'after peak MB':>14}"
+    )
+    for size in PAGE_SIZES:
+        html = build_html(size)
+        rounds = {
+            "before": lambda: crawl_round(PreviousArticle, html),
+            "after": lambda: crawl_round(Article, html),
+            "uncapped": lambda: crawl_round(Article, html, max_chars=0),
+        }
+        times = {
+            name: min(timeit.repeat(func, number=1, repeat=ITERATIONS))
+            for name, func in rounds.items()
+        }
+        print(
+            f"{size:>10} {times['before']:>11.3f} {times['after']:>10.3f} {times['uncapped']:>19.3f} "
+            f"{peak_memory(rounds['before']):>15.1f} {peak_memory(rounds['after']):>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Chunking and BM25 ranking throughput, and the tokens saved by query crawls.
+
+Throughput is measured on the markdown of large synthetic articles: chunking
+plus building the inverted index, then ranking against a query on the
+prebuilt index. Token reduction compares the crawl message of each page
+without and with a query. The built-in corpus is synthetic pages covering
+several topics, queried for one of them. Saved pages can be used instead with
+--corpus: every NAME.html is queried with the text of NAME.query, or with its
+title when there is none. Pages are extracted with the python engine.
+
+Usage:
+    uv run python -m benchmarks.bench_chunk_ranking [--corpus DIR]
+"""
+
+import argparse
+import random
+import timeit
+from pathlib import Path
+
+from src.crawler.article import Article
+from src.crawler.extraction import extract_with_python
+from src.crawler.ranking import ChunkIndex, chunk_markdown
+from src.prompts.compaction import estimate_tokens
+
+MARKDOWN_SIZES = [100_000, 1_000_000]
+SYNTHETIC_PAGES = 20
+TOPICS = {
+    "pricing": "plan price cost dollars month subscription discount invoice billing",
+    "installation": "install package pip setup command dependency version environment",
+    "performance": "latency throughput p99 milliseconds benchmark cache concurrency",
+    "security": "token authentication password encryption certificate permission audit",
+    "history": "founded company year team release launch investors growth",
+}
+FILLER = (
+    "the system is described in this section with several details and examples".split()
+)
+
+
+def _paragraph(rng: random.Random, topic: str) -> str:
+    words = TOPICS[topic].split()
+    return " ".join(
+        rng.choice(words if rng.random() < 0.3 else FILLER) for _ in range(60)
+    )
+
+
+def synthetic_page(index: int) -> tuple[str, str]:
+    """Return a long page covering every topic and a query for one of them."""
+    rng = random.Random(index)
+    sections = []
+    for part in range(6):
+        for topic in TOPICS:
+            paragraphs = "".join(f"<p>{_paragraph(rng, topic)}.</p>" for _ in range(3))
+            sections.append(f"<h2>{topic.capitalize()} {part}</h2>{paragraphs}")
+    rng.shuffle(sections)
+    topic = rng.choice(list(TOPICS))
+    query = " ".join(rng.sample(TOPICS[topic].split(), 3))
+    return (
+        f"<html><body><article><h1>Page {index}</h1>{''.join(sections)}</article></body></html>",
+        query,
+    )
+
+
+def load_corpus(directory) -> list[tuple[str, str]]:
+    if directory is None:
+        return [synthetic_page(i) for i in range(SYNTHETIC_PAGES)]
+    pages = []
+    for path in sorted(Path(directory).glob("*.html")):
+        query_file = path.with_suffix(".query")
+        query = (
+            query_file.read_text(encoding="utf-8").strip()
+            if query_file.exists()
+            else None
+        )
+        pages.append((path.read_text(encoding="utf-8", errors="replace"), query))
+    return pages
+
+
+def _message_tokens(content: list[dict]) -> int:
+    return sum(
+        estimate_tokens(block["text"]) for block in content if block["type"] == "text"
+    )
+
+
+def throughput() -> None:
+    print(f"{'markdown':>10} {'chunks':>7} {'index MB/s':>11} {'query (ms)':>11}")
+    rng = random.Random(0)
+    for size in MARKDOWN_SIZES:
+        sections = []
+        while sum(map(len, sections)) < size:
+            topic = rng.choice(list(TOPICS))
+            sections.append(
+                f"## {topic}\n\n{_paragraph(rng, topic)}\n\n{_paragraph(rng, topic)}"
+            )
+        markdown = "\n\n".join(sections)
+        build = min(
+            timeit.repeat(
+                lambda: ChunkIndex(chunk_markdown(markdown)), number=1, repeat=3
+            )
+        )
+        index = ChunkIndex(chunk_markdown(markdown))
+        query = (
+            min(
+                timeit.repeat(
+                    lambda: index.select("p99 latency benchmark"), number=10, repeat=3
+                )
+            )
+            / 10
+        )
+        print(
+            f"{len(markdown):>10} {len(index.chunks):>7} {len(markdown) / build / 1e6:>11.2f} "
+            f"{query * 1000:>11.2f}"
+        )
+
+
+def token_reduction(corpus: list[tuple[str, str]]) -> None:
+    full_tokens = ranked_tokens = 0
+    for html, query in corpus:
+        extracted = extract_with_python(html)
+        article = Article(title=extracted["title"], html_content=extracted["content"])
+        full_tokens += _message_tokens(article.to_message())
+        ranked_tokens += _message_tokens(
+            article.to_message(query=query or article.title)
+        )
+    print(
+        f"{len(corpus)} pages: {full_tokens} tokens without a query, {ranked_tokens} with "
+        f"({1 - ranked_tokens / max(full_tokens, 1):.0%} saved)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--corpus", help="Directory of saved NAME.html pages with NAME.query queries"
+    )
+    args = parser.parse_args()
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error(f"No .html pages in {args.corpus}")
+    throughput()
+    token_reduction(corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Crawl throughput against a local stub reader at 1, 10 and 50 concurrent URLs.
+
+Compares the previous per-call `requests.post` without a session, the pooled
+blocking client used from executor threads (how sync tools run), and the
+pooled async client. The stub runs in its own process and answers every request
+with a fixed page after STUB_LATENCY seconds over HTTP/1.1 keep-alive, so
+only the crawl itself is measured, not readability extraction. New
+connections are delayed by STUB_HANDSHAKE seconds, standing in for the TCP
+and TLS handshakes with the real reader that localhost does not have.
+
+Usage:
+    uv run python -m benchmarks.bench_crawler
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from src.crawler.http_client import aclose_clients
+from src.crawler.jina_client import JinaClient
+
+STUB_LATENCY = 0.02
+STUB_HANDSHAKE = 0.03
+URLS_PER_RUN = 200
+CONCURRENCY = [1, 10, 50]
+PAGE = (
+    "<html><body><article><p>"
+    + "Readable content. " * 2000
+    + "</p></article></body></html>"
+).encode()
+
+
+class StubReader(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, Nagle would delay the body
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        time.sleep(STUB_HANDSHAKE)
+        super().setup()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(STUB_LATENCY)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 256
+
+
+def per_call_crawl(base_url: str, url: str) -> str:
+    # The crawler before connection pooling: a new connection per page
+    headers = {"Content-Type": "application/json", "X-Return-Format": "html"}
+    return requests.post(base_url, headers=headers, json={"url": url}).text
+
+
+def run_threaded(crawl, concurrency: int) -> float:
+    urls = [f"https://example.com/{i}" for i in range(URLS_PER_RUN)]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(crawl, urls))
+        return URLS_PER_RUN / (time.perf_counter() - start)
+
+
+async def run_async(client: JinaClient, concurrency: int) -> float:
+    urls = [f"https://example.com/{i}" for i in range(URLS_PER_RUN)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def crawl(url):
+        async with semaphore:
+            return await client.acrawl(url)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(crawl(url) for url in urls))
+    elapsed = time.perf_counter() - start
+    await aclose_clients()
+    return URLS_PER_RUN / elapsed
+
+
+def serve(port) -> None:
+    server = StubServer(("127.0.0.1", 0), StubReader)
+    port.value = server.server_port
+    server.serve_forever()
+
+
+def main():
+    os.environ.setdefault("JINA_API_KEY", "benchmark")
+    # A separate process, so the stub's threads do not compete for the GIL
+    port = multiprocessing.Value("i", 0)
+    server = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+    server.start()
+    while not port.value:
+        time.sleep(0.01)
+    base_url = f"http://127.0.0.1:{port.value}/"
+    client = JinaClient(base_url=base_url)
+
+    print(
+        f"{URLS_PER_RUN} URLs per run, stub latency {STUB_LATENCY * 1000:.0f} ms, "
+        f"handshake {STUB_HANDSHAKE * 1000:.0f} ms\n"
+    )
+    print(
+        f"{'concurrency':>11} {'per-call':>12} {'pooled sync':>12} {'pooled async':>13}"
+    )
+    for concurrency in CONCURRENCY:
+        per_call = run_threaded(lambda url: per_call_crawl(base_url, url), concurrency)
+        pooled = run_threaded(client.crawl, concurrency)
+        pooled_async = asyncio.run(run_async(client, concurrency))
+        print(
+            f"{concurrency:>11} {per_call:>8.0f} p/s {pooled:>8.0f} p/s {pooled_async:>9.0f} p/s"
+        )
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
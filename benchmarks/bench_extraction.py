@@ -0,0 +1,157 @@
+"""
+Article extraction throughput and quality of the extraction engines.
+
+Pages are extracted concurrently from EXTRACTION_WORKERS threads, the way
+crawl_many runs them. Quality is the token F1 of each extracted article's text
+against the page's ground-truth article text. The built-in corpus is synthetic
+article pages wrapped in navigation, sidebars, scripts and footers. Saved
+pages can be used instead with --corpus: every NAME.html may come with a
+NAME.txt holding its article text; pages without one only count for pages/s.
+
+Without Node or the Readability.js dependencies (run `npm install` in
+readabilipy's javascript directory) the node engine is skipped and readabilipy
+is measured in its pure-Python mode.
+
+Usage:
+    uv run python -m benchmarks.bench_extraction [--corpus DIR]
+"""
+
+import argparse
+import random
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from lxml import html as lxml_html
+
+from src.config import EXTRACTION_WORKERS
+from src.crawler.extraction import node_available
+from src.crawler.readability_extractor import (
+    ReadabilityExtractor,
+    close_extraction_pools,
+)
+
+SYNTHETIC_PAGES = 60
+WORDS = (
+    "connection pool request latency throughput server client cache page crawl "
+    "extract article parser worker process thread event loop network handshake "
+    "response header content markdown readability benchmark engine token query"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    return (
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize()
+        + "."
+    )
+
+
+def synthetic_page(index: int) -> tuple[str, str]:
+    """Return a page and its article text."""
+    rng = random.Random(index)
+    title = f"Benchmark article {index}"
+    paragraphs = [
+        " ".join(_sentence(rng) for _ in range(rng.randint(3, 6)))
+        for _ in range(rng.randint(6, 14))
+    ]
+    article = "".join(
+        f"<h2>Section {i}</h2>" * (i % 4 == 0) + f"<p>{p}</p>"
+        for i, p in enumerate(paragraphs)
+    )
+    links = "".join(f'<li><a href="/topic/{i}">Topic {i}</a></li>' for i in range(30))
+    page = f"""<!DOCTYPE html><html><head><title>{title} | Example</title>
+<script>{"var tracking = 1;" * 200}</script><style>{"p {{ margin: 0 }}" * 100}</style></head>
+<body><header><nav><ul>{links}</ul></nav></header>
+<main><article><h1>{title}</h1>{article}</article>
+<aside><h3>Related</h3><ul>{links}</ul><p>Subscribe to our newsletter for weekly updates.</p></aside></main>
+<footer><p>Copyright Example. All rights reserved.</p><ul>{links}</ul></footer></body></html>"""
+    truth = " ".join(
+        [title] + [f"Section {i}" for i in range(0, len(paragraphs), 4)] + paragraphs
+    )
+    return page, truth
+
+
+def load_corpus(directory: Optional[str]) -> list[tuple[str, Optional[str]]]:
+    if directory is None:
+        return [synthetic_page(i) for i in range(SYNTHETIC_PAGES)]
+    pages = []
+    for path in sorted(Path(directory).glob("*.html")):
+        truth = path.with_suffix(".txt")
+        pages.append(
+            (
+                path.read_text(encoding="utf-8", errors="replace"),
+                truth.read_text(encoding="utf-8") if truth.exists() else None,
+            )
+        )
+    return pages
+
+
+def _tokens(text: str) -> Counter:
+    return Counter(re.findall(r"\w+", text.lower()))
+
+
+def token_f1(extracted: Optional[str], truth: str) -> float:
+    text = lxml_html.fromstring(extracted).text_content() if extracted else ""
+    found, expected = _tokens(text), _tokens(truth)
+    overlap = sum((found & expected).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(found.values())
+    recall = overlap / sum(expected.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def run(
+    engine: str, corpus: list[tuple[str, Optional[str]]]
+) -> tuple[float, Optional[float]]:
+    extractor = ReadabilityExtractor(engine=engine)
+    # Start the workers, their startup is paid once per process
+    extractor.extract_article(corpus[0][0])
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=EXTRACTION_WORKERS) as executor:
+        articles = list(
+            executor.map(lambda page: extractor.extract_article(page[0]), corpus)
+        )
+    elapsed = time.perf_counter() - start
+    scores = [
+        token_f1(article.html_content, truth)
+        for article, (_, truth) in zip(articles, corpus)
+        if truth is not None
+    ]
+    return len(corpus) / elapsed, sum(scores) / len(scores) if scores else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--corpus", help="Directory of saved NAME.html pages with NAME.txt texts"
+    )
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error(f"No .html pages in {args.corpus}")
+    engines = ["readabilipy", "python"]
+    if node_available():
+        engines.insert(1, "node")
+    else:
+        print(
+            "Readability.js is not installed, readabilipy runs in its pure-Python mode"
+        )
+
+    print(f"{len(corpus)} pages, {EXTRACTION_WORKERS} workers")
+    print(f"{'engine':>12} {'pages/s':>8} {'token F1':>9}")
+    try:
+        for engine in engines:
+            pages_per_second, f1 = run(engine, corpus)
+            quality = f"{f1:.3f}" if f1 is not None else "n/a"
+            print(f"{engine:>12} {pages_per_second:>8.1f} {quality:>9}")
+    finally:
+        close_extraction_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Prompt history tokens per node with and without per-agent history views.
+
+Replays a recorded-style deep research workflow (three research steps with
+crawled content, a coder step with long stdout, a browser step and the
+report) and measures the history each node's prompt is sent with: the raw
+history, after the AGENT_HISTORY_VIEW filter, and after the view plus
+AGENT_CONTEXT_BUDGET compaction.
+
+Usage:
+    uv run python -m benchmarks.bench_history_views
+"""
+
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.config.agents import AGENT_CONTEXT_BUDGET, AGENT_HISTORY_VIEW
+from src.prompts.compaction import (
+    apply_history_view,
+    compact_messages,
+    count_message_tokens,
+)
+
+PLAN = json.dumps(
+    {
+        "thought": "Compare the three most popular vector databases",
+        "title": "Vector database comparison",
+        "steps": [
+            {"agent_name": "researcher", "title": "Milvus", "description": "..."},
+            {"agent_name": "researcher", "title": "Qdrant", "description": "..."},
+            {"agent_name": "researcher", "title": "Weaviate", "description": "..."},
+            {"agent_name": "coder", "title": "Benchmark numbers", "description": "..."},
+            {"agent_name": "browser", "title": "GitHub activity", "description": "..."},
+            {"agent_name": "reporter", "title": "Report", "description": "..."},
+        ],
+    }
+)
+
+
+def research_report(topic: str) -> str:
+    paragraph = (
+        f"{topic} supports HNSW and IVF indexes, horizontal scaling and filtering. "
+    )
+    return f"# {topic}\n\n## Crawled Content\n\n" + paragraph * 250
+
+
+def recorded_history() -> list:
+    messages = [
+        HumanMessage(content="Compare Milvus, Qdrant and Weaviate for RAG", id="user"),
+        HumanMessage(content="handoff_to_planner()", name="coordinator", id="coord"),
+        HumanMessage(content=PLAN, name="planner", id="plan"),
+    ]
+    for topic in ["Milvus", "Qdrant", "Weaviate"]:
+        messages.append(
+            HumanMessage(content=research_report(topic), name="researcher", id=topic)
+        )
+    stdout = "\n".join(
+        f"run {i}: qps=1234.5 p99=12.3ms recall=0.98" for i in range(300)
+    )
+    messages.append(
+        HumanMessage(content=f"# Results\n\n{stdout}", name="coder", id="code")
+    )
+    messages.append(
+        HumanMessage(
+            content="# GitHub activity\n\n" + "Stars, issues and releases. " * 200,
+            name="browser",
+            id="browse",
+        )
+    )
+    return messages
+
+
+def in_progress_run(history: list) -> list:
+    # An agent's own tool loop is part of the state while it runs
+    return [
+        *history,
+        AIMessage(content="", id="call-ai"),
+        ToolMessage(content="tool output " * 300, tool_call_id="call", id="call-tool"),
+    ]
+
+
+def tokens(messages: list) -> int:
+    return sum(count_message_tokens(message) for message in messages)
+
+
+def main():
+    history = recorded_history()
+    nodes = ["researcher", "coder", "browser", "supervisor", "reporter", "reflection"]
+    print(f"{'node':>11} {'raw':>8} {'view':>8} {'view+budget':>12} {'saved':>7}")
+    total_raw = total_final = 0
+    for node in nodes:
+        messages = in_progress_run(history) if node in AGENT_HISTORY_VIEW else history
+        viewed = apply_history_view(messages, AGENT_HISTORY_VIEW.get(node))
+        final = compact_messages(viewed, AGENT_CONTEXT_BUDGET.get(node), node)
+        raw, view, fitted = tokens(messages), tokens(viewed), tokens(final)
+        total_raw += raw
+        total_final += fitted
+        print(f"{node:>11} {raw:>8} {view:>8} {fitted:>12} {1 - fitted / raw:>7.1%}")
+    print(
+        f"{'total':>11} {total_raw:>8} {'':>8} {total_final:>12} {1 - total_final / total_raw:>7.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
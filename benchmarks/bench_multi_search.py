@@ -0,0 +1,87 @@
+"""
+Search-phase wall time, one tavily_search call per query vs. one multi_search_tool call.
+
+A fake Tavily API answers every query after a random latency. The sequential
+run searches the queries one after another, the way the researcher did with
+one tool call per ReAct step (LLM turns not included). The fan-out run
+searches them with multi_search_tool, at most MULTI_SEARCH_CONCURRENCY at a
+time.
+
+Usage:
+    uv run python -m benchmarks.bench_multi_search
+"""
+
+import asyncio
+import random
+import time
+from unittest.mock import patch
+
+from src.config import MULTI_SEARCH_CONCURRENCY
+from src.tools import search_cache
+from src.tools.search import multi_search_tool, tavily_tool
+
+LATENCY_RANGE = (0.3, 1.2)
+QUERY_COUNTS = [2, 3, 5]
+ROUNDS = 5
+
+
+class FakeTavily:
+    def __init__(self, seed: int):
+        self._rng = random.Random(seed)
+
+    async def raw_results_async(self, query, *args, **kwargs) -> dict:
+        await asyncio.sleep(self._rng.uniform(*LATENCY_RANGE))
+        slug = "-".join(query.split())
+        return {
+            "results": [
+                {
+                    "url": f"https://example.com/{slug}/{i}",
+                    "title": query,
+                    "content": query,
+                    "score": 0.5,
+                }
+                for i in range(5)
+            ]
+        }
+
+
+async def sequential(queries: list[str]) -> None:
+    for query in queries:
+        await tavily_tool.ainvoke({"query": query})
+
+
+async def fan_out(queries: list[str]) -> None:
+    await multi_search_tool.ainvoke({"queries": queries})
+
+
+def measure(run, count: int) -> float:
+    elapsed = 0.0
+    for round_ in range(ROUNDS):
+        queries = [f"query {round_} {i}" for i in range(count)]
+        fake = FakeTavily(seed=round_)
+        with patch.object(
+            type(tavily_tool.api_wrapper), "raw_results_async", fake.raw_results_async
+        ):
+            start = time.perf_counter()
+            asyncio.run(run(queries))
+            elapsed += time.perf_counter() - start
+    return elapsed / ROUNDS
+
+
+def main():
+    # Every round searches new queries, the search cache must not answer them
+    search_cache.set_search_cache(None)
+    print(
+        f"Tavily latency {LATENCY_RANGE[0]}-{LATENCY_RANGE[1]}s, concurrency {MULTI_SEARCH_CONCURRENCY}"
+    )
+    print(f"{'queries':>8} {'sequential (s)':>15} {'fan-out (s)':>12} {'speedup':>8}")
+    for count in QUERY_COUNTS:
+        one_by_one = measure(sequential, count)
+        together = measure(fan_out, count)
+        print(
+            f"{count:>8} {one_by_one:>15.2f} {together:>12.2f} {one_by_one / together:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Micro-benchmark of system prompt rendering on a long conversation.
+
+Compares rendering the Jinja template with the whole state on every call
+(the previous behaviour) against the precompiled, memoized renderer.
+
+Usage:
+    uv run python -m benchmarks.bench_prompt_render
+"""
+
+import timeit
+
+from langchain_core.messages import HumanMessage
+
+from src.config import TEAM_MEMBERS
+from src.prompts.template import apply_prompt_template, env, get_current_time
+
+MESSAGE_COUNT = 200
+ITERATIONS = 2000
+
+
+def build_state(message_count: int) -> dict:
+    messages = [
+        HumanMessage(
+            content=f"Step {i} output. " + "lorem ipsum " * 200, name="researcher"
+        )
+        for i in range(message_count)
+    ]
+    return {
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+        "messages": messages,
+        "full_plan": '{"steps": []}',
+        "deep_thinking_mode": False,
+    }
+
+
+def render_uncached(prompt_name: str, state: dict) -> list:
+    state_vars = {"CURRENT_TIME": get_current_time(3600), **state}
+    template = env.get_template(f"{prompt_name}.md")
+    system_prompt = template.render(**state_vars)
+    return [{"role": "system", "content": system_prompt}] + state["messages"]
+
+
+def main():
+    state = build_state(MESSAGE_COUNT)
+    print(
+        f"Rendering supervisor prompt, {MESSAGE_COUNT}-message state, {ITERATIONS} calls"
+    )
+    for label, func in [
+        ("before (render every call)", lambda: render_uncached("supervisor", state)),
+        (
+            "after (compiled + memoized)",
+            lambda: apply_prompt_template("supervisor", state),
+        ),
+    ]:
+        seconds = min(timeit.repeat(func, number=ITERATIONS, repeat=3))
+        print(f"{label:<30} {seconds / ITERATIONS * 1e6:8.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
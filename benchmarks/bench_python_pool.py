@@ -0,0 +1,127 @@
+"""
+python_repl_tool latency, cold vs. warm workers, and throughput under concurrent workflows.
+
+Latency is the time of a workflow's first execution of a pandas snippet:
+"in-process" is the former shared PythonREPL, paying the pandas import in a
+fresh interpreter; "cold" starts a worker for the workflow; "warm" leases an
+idle worker that already imported PYTHON_PRELOAD_MODULES.
+
+Throughput runs concurrent workflows, each executing a CPU-bound snippet
+several times, on the shared in-process PythonREPL and on the worker pool.
+The in-process REPL runs every workflow's code under the app's GIL, and the
+workflows share one namespace and one redirected sys.stdout. Worker processes
+only run in parallel with several CPU cores.
+
+Usage:
+    uv run python -m benchmarks.bench_python_pool
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import PYTHON_PRELOAD_MODULES
+from src.tools.python_pool import PythonSession, PythonWorkerPool
+
+SNIPPET = "import pandas as pd\nprint(pd.DataFrame({'a': range(1000)})['a'].sum())"
+CPU_SNIPPET = "total = sum(i * i for i in range(300_000))"
+LATENCY_ROUNDS = 5
+WORKFLOWS = [1, 4, 8]
+EXECUTIONS_PER_WORKFLOW = 8
+
+IN_PROCESS = f"""
+import time
+from langchain_experimental.utilities import PythonREPL
+start = time.perf_counter()
+PythonREPL().run({SNIPPET!r})
+print(time.perf_counter() - start)
+"""
+
+
+def in_process_latency() -> float:
+    # A fresh interpreter for every round, imports are cached within one
+    result = subprocess.run(
+        [sys.executable, "-c", IN_PROCESS], capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def pool_latency(pool: PythonWorkerPool, warm: bool) -> float:
+    if warm:
+        pool.fill()
+        while pool.stats()["idle"] < 1:
+            time.sleep(0.05)
+    session = PythonSession(pool)
+    start = time.perf_counter()
+    session.run(SNIPPET)
+    elapsed = time.perf_counter() - start
+    session.close()
+    return elapsed
+
+
+def latency() -> None:
+    cold_pool = PythonWorkerPool(size=0, preload=[])
+    warm_pool = PythonWorkerPool(size=1)
+    rows = {
+        "in-process": [in_process_latency() for _ in range(LATENCY_ROUNDS)],
+        "cold": [pool_latency(cold_pool, warm=False) for _ in range(LATENCY_ROUNDS)],
+        "warm": [pool_latency(warm_pool, warm=True) for _ in range(LATENCY_ROUNDS)],
+    }
+    cold_pool.close()
+    warm_pool.close()
+    print(
+        f"First execution of a pandas snippet, preloading {', '.join(PYTHON_PRELOAD_MODULES)}"
+    )
+    print(f"{'':>12} {'median (ms)':>12}")
+    for name, samples in rows.items():
+        print(f"{name:>12} {statistics.median(samples) * 1000:>12.1f}")
+
+
+def throughput() -> None:
+    from langchain_experimental.utilities import PythonREPL
+
+    shared = PythonREPL()
+    pool = PythonWorkerPool(size=max(WORKFLOWS), preload=[])
+    pool.fill()
+    while pool.stats()["idle"] < max(WORKFLOWS):
+        time.sleep(0.05)
+
+    def in_process_workflow(_) -> None:
+        for _ in range(EXECUTIONS_PER_WORKFLOW):
+            shared.run(CPU_SNIPPET)
+
+    def pool_workflow(_) -> None:
+        session = PythonSession(pool)
+        for _ in range(EXECUTIONS_PER_WORKFLOW):
+            session.run(CPU_SNIPPET)
+        session.close()
+
+    print(f"\n{'workflows':>9} {'in-process (exec/s)':>20} {'pool (exec/s)':>14}")
+    for workflows in WORKFLOWS:
+        rates = []
+        for workflow in (in_process_workflow, pool_workflow):
+            stdout = sys.stdout
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workflows) as executor:
+                list(executor.map(workflow, range(workflows)))
+            rates.append(
+                workflows * EXECUTIONS_PER_WORKFLOW / (time.perf_counter() - start)
+            )
+            # Concurrent PythonREPL runs can leave sys.stdout redirected to a buffer
+            sys.stdout = stdout
+            # Let the pool replace the released workers before the next run
+            while pool.stats()["idle"] < min(workflows, pool.size):
+                time.sleep(0.05)
+        print(f"{workflows:>9} {rates[0]:>20.1f} {rates[1]:>14.1f}")
+    pool.close()
+
+
+def main():
+    latency()
+    throughput()
+
+
+if __name__ == "__main__":
+    main()
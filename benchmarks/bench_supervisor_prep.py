@@ -0,0 +1,73 @@
+"""
+Benchmark of supervisor prompt preparation as the history grows.
+
+Compares the previous approach, which deep-copied the whole prompt and
+rewrote every team member message on each turn, with the copy-free
+FormattedMessageView.
+
+Usage:
+    uv run python -m benchmarks.bench_supervisor_prep
+"""
+
+import timeit
+from copy import deepcopy
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from src.config import TEAM_MEMBERS
+from src.graph.nodes import RESPONSE_FORMAT
+from src.graph.views import FormattedMessageView
+from src.prompts.template import apply_prompt_template
+
+HISTORY_LENGTHS = [10, 50, 100, 200, 400]
+ITERATIONS = 20
+
+
+def build_state(message_count: int) -> dict:
+    # Crawled pages make agent outputs large, so use ~8KB per message
+    messages = [HumanMessage(content="user request", id="user")]
+    for i in range(message_count):
+        name = TEAM_MEMBERS[i % 2]
+        messages.append(
+            HumanMessage(content="crawled markdown " * 500, name=name, id=f"msg-{i}")
+        )
+    return {"TEAM_MEMBERS": TEAM_MEMBERS, "messages": messages}
+
+
+def prepare_with_deepcopy(state: dict) -> list:
+    messages = deepcopy(apply_prompt_template("supervisor", state))
+    for message in messages:
+        if isinstance(message, BaseMessage) and message.name in TEAM_MEMBERS:
+            message.content = RESPONSE_FORMAT.format(message.name, message.content)
+    return messages
+
+
+def prepare_with_view(state: dict) -> list:
+    # Materialize the view the way the chat model does when converting input
+    return list(
+        FormattedMessageView(
+            apply_prompt_template("supervisor", state), TEAM_MEMBERS, RESPONSE_FORMAT
+        )
+    )
+
+
+def main():
+    print(f"{'messages':>8} {'deepcopy (ms)':>14} {'view (ms)':>10} {'speedup':>8}")
+    for length in HISTORY_LENGTHS:
+        state = build_state(length)
+        before = min(
+            timeit.repeat(
+                lambda: prepare_with_deepcopy(state), number=ITERATIONS, repeat=3
+            )
+        )
+        after = min(
+            timeit.repeat(lambda: prepare_with_view(state), number=ITERATIONS, repeat=3)
+        )
+        print(
+            f"{length:>8} {before / ITERATIONS * 1e3:>14.2f} "
+            f"{after / ITERATIONS * 1e3:>10.3f} {before / after:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Load test of concurrent workflows on a single worker.
+
+Runs many coordinator -> planner -> supervisor workflows at once against a
+fake LLM with a fixed latency. In the "blocking" run the LLM only has a
+synchronous implementation, so every call holds an executor thread the way
+the former synchronous nodes did. In the "async" run the LLM awaits, so the
+async nodes multiplex all workflows on the event loop.
+
+Usage:
+    uv run python -m benchmarks.bench_workflow_load
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.config import TEAM_MEMBERS
+from src.graph import build_graph
+
+LLM_LATENCY = 0.2
+WORKER_THREADS = 8
+CONCURRENT_WORKFLOWS = [8, 32, 128]
+
+PLAN = json.dumps({"thought": "t", "title": "t", "steps": []})
+
+
+def reply(messages) -> str:
+    system_prompt = messages[0].content
+    if "You are Langmanus" in system_prompt:
+        return "handoff_to_planner()"
+    if "Deep Researcher" in system_prompt:
+        return PLAN
+    return '{"next": "FINISH"}'
+
+
+class BlockingFakeLLM(BaseChatModel):
+    @property
+    def _llm_type(self) -> str:
+        return "blocking-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(LLM_LATENCY)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=reply(messages)))]
+        )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(LLM_LATENCY)
+        yield ChatGenerationChunk(message=AIMessageChunk(content=reply(messages)))
+
+
+class AsyncFakeLLM(BlockingFakeLLM):
+    @property
+    def _llm_type(self) -> str:
+        return "async-fake"
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(LLM_LATENCY)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=reply(messages)))]
+        )
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(LLM_LATENCY)
+        yield ChatGenerationChunk(message=AIMessageChunk(content=reply(messages)))
+
+
+async def run_load(graph, concurrency: int) -> float:
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=WORKER_THREADS)
+    )
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            graph.ainvoke(
+                {
+                    "TEAM_MEMBERS": TEAM_MEMBERS,
+                    "messages": [{"role": "user", "content": f"request {i}"}],
+                }
+            )
+            for i in range(concurrency)
+        )
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    graph = build_graph()
+    print(
+        f"LLM latency {LLM_LATENCY}s, {WORKER_THREADS} executor threads, "
+        "3 LLM calls per workflow"
+    )
+    print(f"{'workflows':>9} {'blocking wf/s':>14} {'async wf/s':>11}")
+    for concurrency in CONCURRENT_WORKFLOWS:
+        results = []
+        for llm in (BlockingFakeLLM(), AsyncFakeLLM()):
+            with patch("src.graph.nodes.get_llm_by_type", return_value=llm):
+                elapsed = asyncio.run(run_load(graph, concurrency))
+            results.append(concurrency / elapsed)
+        print(f"{concurrency:>9} {results[0]:>14.1f} {results[1]:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ from src.tools import (
     bash_tool,
     browser_tool,
     crawl_tool,
+    crawl_many_tool,
+    multi_search_tool,
     python_repl_tool,
     tavily_tool,
 )
@@ -15,7 +17,7 @@ from src.config.agents import AGENT_LLM_MAP
 # Create agents using configured LLM types
 research_agent = create_react_agent(
     get_llm_by_type(AGENT_LLM_MAP["researcher"]),
-    tools=[tavily_tool, crawl_tool],
+    tools=[tavily_tool, multi_search_tool, crawl_tool, crawl_many_tool],
     prompt=lambda state: apply_prompt_template("researcher", state),
 )
 
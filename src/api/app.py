@@ -16,8 +16,27 @@ import asyncio
 from typing import AsyncGenerator, Dict, List, Any
 
 from src.graph import build_graph
-from src.config import TEAM_MEMBERS, BROWSER_HISTORY_DIR
+from src.graph.plan import routing_stats
+from src.crawler.cache import get_crawl_cache
+from src.crawler.http_client import aclose_clients
+from src.crawler.readability_extractor import close_extraction_pools
+from src.config import (
+    TEAM_MEMBERS,
+    BROWSER_HISTORY_DIR,
+    MAX_CONCURRENT_WORKFLOWS,
+    MAX_QUEUED_WORKFLOWS,
+    WORKFLOW_RETRY_AFTER,
+)
+from src.service.admission import AdmissionController, AdmissionTicket, QueueFullError
 from src.service.workflow_service import run_agent_workflow
+from src.llms.cache import get_response_cache
+from src.llms.usage import prompt_cache_stats
+from src.prompts.compaction import compaction_stats
+from src.tools.dedup import dedup_stats
+from src.tools.python_pool import close_python_pool, get_python_pool, python_pool_stats
+from src.tools.result_store import tool_result_stats
+from src.tools.search_cache import get_search_cache
+from src.tools.search import speculation_stats
 from src.utils.log_handler import setup_logging, DEFAULT_LOG_DIR
 
 # 设置日志系统
@@ -56,9 +75,53 @@ async def startup_event():
         os.makedirs(DEFAULT_LOG_DIR)
         logger.info(f"创建日志目录: {DEFAULT_LOG_DIR}")
 
+    # 提前启动预加载常用库的 Python 执行进程
+    get_python_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """在应用关闭时释放爬虫的 HTTP 连接池、正文提取进程和 Python 执行进程"""
+    await aclose_clients()
+    close_extraction_pools()
+    close_python_pool()
+
+
 # Create the graph
 graph = build_graph()
 
+# Limit the number of workflows running at once in this process
+admission_controller = AdmissionController(
+    max_concurrent=MAX_CONCURRENT_WORKFLOWS,
+    max_queued=MAX_QUEUED_WORKFLOWS,
+    retry_after=WORKFLOW_RETRY_AFTER,
+)
+
+
+class AdmittedEventSourceResponse(EventSourceResponse):
+    """An event stream that gives back its admission ticket however it ends.
+
+    The ticket is released even if the stream never starts iterating, e.g.
+    when the client disconnects before the first event.
+    """
+
+    def __init__(
+        self,
+        content,
+        controller: AdmissionController,
+        ticket: AdmissionTicket,
+        **kwargs,
+    ):
+        super().__init__(content, **kwargs)
+        self.controller = controller
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.controller.release(self.ticket)
+
 
 class ContentItem(BaseModel):
     type: str = Field(..., description="The type of content (text, image, etc.)")
@@ -87,6 +150,9 @@ class ChatRequest(BaseModel):
     search_before_planning: Optional[bool] = Field(
         False, description="Whether to search before planning"
     )
+    parallel_plan_execution: Optional[bool] = Field(
+        False, description="Whether to run independent plan steps in parallel"
+    )
 
 
 @app.post("/api/chat/stream")
@@ -101,6 +167,16 @@ async def chat_endpoint(request: ChatRequest, req: Request):
     Returns:
         The streamed response
     """
+    try:
+        # Reject early when both the running slots and the wait queue are full
+        ticket = admission_controller.reserve()
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
     try:
         # Convert Pydantic models to dictionaries and normalize content format
         messages = []
@@ -127,11 +203,23 @@ async def chat_endpoint(request: ChatRequest, req: Request):
 
         async def event_generator():
             try:
+                # Report the queue position until a workflow slot is granted
+                async for position in admission_controller.wait_for_slot(ticket):
+                    yield {
+                        "event": "queue_position",
+                        "data": json.dumps(
+                            {
+                                "position": position,
+                                "queue_depth": admission_controller.queue_depth,
+                            }
+                        ),
+                    }
                 async for event in run_agent_workflow(
                     messages,
                     request.debug,
                     request.deep_thinking_mode,
                     request.search_before_planning,
+                    request.parallel_plan_execution,
                 ):
                     # Check if client is still connected
                     if await req.is_disconnected():
@@ -147,17 +235,60 @@ async def chat_endpoint(request: ChatRequest, req: Request):
             except Exception as e:
                 logger.error(f"Error in workflow: {e}")
                 raise
+            finally:
+                admission_controller.release(ticket)
 
-        return EventSourceResponse(
+        return AdmittedEventSourceResponse(
             event_generator(),
+            admission_controller,
+            ticket,
             media_type="text/event-stream",
             sep="\n",
         )
     except Exception as e:
+        admission_controller.release(ticket)
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """
+    Get runtime metrics of the workflow service.
+
+    Returns:
+        Admission queue counters, LLM response cache hit/miss counters,
+        provider prompt cache usage, supervisor routing decisions, history
+        token counts before and after compaction, speculative search outcomes,
+        tool calls answered from the workflow result store, crawl cache
+        hit/miss counters, search cache hits and latencies,
+        near-duplicate content collapsed with the tokens it saved, and
+        Python worker pool leases
+    """
+    response_cache = get_response_cache()
+    crawl_cache = get_crawl_cache()
+    search_cache = get_search_cache()
+    return JSONResponse(
+        {
+            "admission": admission_controller.stats(),
+            "llm_cache": (
+                response_cache.stats() if response_cache else {"enabled": False}
+            ),
+            "prompt_cache": prompt_cache_stats.to_dict(),
+            "routing": routing_stats.to_dict(),
+            "compaction": compaction_stats.to_dict(),
+            "speculative_search": speculation_stats.to_dict(),
+            "tool_results": tool_result_stats.to_dict(),
+            "dedup": dedup_stats.to_dict(),
+            "search_cache": (
+                search_cache.stats() if search_cache else {"enabled": False}
+            ),
+            "crawl_cache": (crawl_cache.stats() if crawl_cache else {"enabled": False}),
+            "python_pool": python_pool_stats(),
+        }
+    )
+
+
 @app.get("/api/browser_history/{filename}")
 async def get_browser_history_file(filename: str):
     """
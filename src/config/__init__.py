@@ -24,8 +24,70 @@ from .env import (
     CHROME_PROXY_SERVER,
     CHROME_PROXY_USERNAME,
     CHROME_PROXY_PASSWORD,
+    # LLM response cache
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_TTL,
+    # Prompt assembly
+    PROMPT_TIME_MODE,
+    PROMPT_TIME_GRANULARITY,
+    # Workflow admission control
+    MAX_CONCURRENT_WORKFLOWS,
+    MAX_QUEUED_WORKFLOWS,
+    WORKFLOW_RETRY_AFTER,
+    # Supervisor routing
+    SUPERVISOR_PLAN_ROUTING,
+    # Crawler
+    JINA_BASE_URL,
+    CRAWLER_CONNECT_TIMEOUT,
+    CRAWLER_READ_TIMEOUT,
+    CRAWLER_MAX_RETRIES,
+    CRAWLER_RETRY_BACKOFF,
+    CRAWLER_MAX_CONNECTIONS,
+    # Crawl cache
+    CRAWL_CACHE_ENABLED,
+    CRAWL_CACHE_PATH,
+    CRAWL_CACHE_MAX_ENTRIES,
+    CRAWL_CACHE_MAX_BYTES,
+    CRAWL_CACHE_TTL,
+    CRAWL_CACHE_MAX_AGE,
+    CRAWLER_FETCH_MODE,
+    # Search cache
+    SEARCH_CACHE_ENABLED,
+    SEARCH_CACHE_PATH,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_MAX_BYTES,
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_VOLATILE_TTL,
+    # Article extraction
+    EXTRACTION_ENGINE,
+    EXTRACTION_WORKERS,
+    EXTRACTION_TIMEOUT,
+    ARTICLE_MAX_CHARS,
+    PYTHON_POOL_SIZE,
+    PYTHON_PRELOAD_MODULES,
+    PYTHON_EXEC_TIMEOUT,
+    PYTHON_MEMORY_LIMIT_MB,
+    PYTHON_OUTPUT_MAX_CHARS,
+)
+from .tools import (
+    TAVILY_MAX_RESULTS,
+    BROWSER_HISTORY_DIR,
+    CRAWL_MANY_MAX_URLS,
+    CRAWL_PER_HOST_CONCURRENCY,
+    CRAWL_CHUNK_CHARS,
+    CRAWL_TOP_CHUNKS,
+    CRAWL_CHUNK_TOKEN_BUDGET,
+    DEDUP_ENABLED,
+    DEDUP_MIN_SIMILARITY,
+    DEDUP_MIN_WORDS,
+    MULTI_SEARCH_MAX_QUERIES,
+    MULTI_SEARCH_CONCURRENCY,
+    MULTI_SEARCH_MAX_RESULTS,
+    MULTI_SEARCH_CONTENT_CHARS,
 )
-from .tools import TAVILY_MAX_RESULTS, BROWSER_HISTORY_DIR
 
 # Team configuration
 TEAM_MEMBERS = ["researcher", "coder", "browser", "reporter", "reflection"]
@@ -52,4 +114,63 @@ __all__ = [
     "CHROME_PROXY_USERNAME",
     "CHROME_PROXY_PASSWORD",
     "BROWSER_HISTORY_DIR",
+    "CRAWL_MANY_MAX_URLS",
+    "CRAWL_PER_HOST_CONCURRENCY",
+    "CRAWL_CHUNK_CHARS",
+    "CRAWL_TOP_CHUNKS",
+    "CRAWL_CHUNK_TOKEN_BUDGET",
+    "DEDUP_ENABLED",
+    "DEDUP_MIN_SIMILARITY",
+    "DEDUP_MIN_WORDS",
+    "MULTI_SEARCH_MAX_QUERIES",
+    "MULTI_SEARCH_CONCURRENCY",
+    "MULTI_SEARCH_MAX_RESULTS",
+    "MULTI_SEARCH_CONTENT_CHARS",
+    # LLM response cache
+    "LLM_CACHE_ENABLED",
+    "LLM_CACHE_PATH",
+    "LLM_CACHE_MAX_ENTRIES",
+    "LLM_CACHE_MAX_BYTES",
+    "LLM_CACHE_TTL",
+    # Prompt assembly
+    "PROMPT_TIME_MODE",
+    "PROMPT_TIME_GRANULARITY",
+    # Workflow admission control
+    "MAX_CONCURRENT_WORKFLOWS",
+    "MAX_QUEUED_WORKFLOWS",
+    "WORKFLOW_RETRY_AFTER",
+    # Supervisor routing
+    "SUPERVISOR_PLAN_ROUTING",
+    # Crawler
+    "JINA_BASE_URL",
+    "CRAWLER_CONNECT_TIMEOUT",
+    "CRAWLER_READ_TIMEOUT",
+    "CRAWLER_MAX_RETRIES",
+    "CRAWLER_RETRY_BACKOFF",
+    "CRAWLER_MAX_CONNECTIONS",
+    # Crawl cache
+    "CRAWL_CACHE_ENABLED",
+    "CRAWL_CACHE_PATH",
+    "CRAWL_CACHE_MAX_ENTRIES",
+    "CRAWL_CACHE_MAX_BYTES",
+    "CRAWL_CACHE_TTL",
+    "CRAWL_CACHE_MAX_AGE",
+    "CRAWLER_FETCH_MODE",
+    # Search cache
+    "SEARCH_CACHE_ENABLED",
+    "SEARCH_CACHE_PATH",
+    "SEARCH_CACHE_MAX_ENTRIES",
+    "SEARCH_CACHE_MAX_BYTES",
+    "SEARCH_CACHE_TTL",
+    "SEARCH_CACHE_VOLATILE_TTL",
+    # Article extraction
+    "EXTRACTION_ENGINE",
+    "EXTRACTION_WORKERS",
+    "EXTRACTION_TIMEOUT",
+    "ARTICLE_MAX_CHARS",
+    "PYTHON_POOL_SIZE",
+    "PYTHON_PRELOAD_MODULES",
+    "PYTHON_EXEC_TIMEOUT",
+    "PYTHON_MEMORY_LIMIT_MB",
+    "PYTHON_OUTPUT_MAX_CHARS",
 ]
@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Literal, Optional
 
 # Define available LLM types
 LLMType = Literal["basic", "reasoning", "vision"]
@@ -14,3 +14,27 @@ AGENT_LLM_MAP: dict[str, LLMType] = {
     "reporter": "basic",  # 编写报告使用basic llm
     "reflection": "reasoning",  # 反思功能使用reasoning llm以获得更深入的分析
 }
+
+# Define per-agent context budgets, in estimated tokens of message history.
+# Older agent outputs are compacted once the history exceeds the budget,
+# None keeps the full history.
+AGENT_CONTEXT_BUDGET: dict[str, Optional[int]] = {
+    "coordinator": 8000,  # 协调只需要对话上下文
+    "planner": 16000,  # 计划需要完整的用户请求
+    "supervisor": 8000,  # 路由决策只需要各步骤的概要
+    "researcher": 24000,  # 研究需要保留最近的抓取内容
+    "coder": 24000,  # 编程需要保留最近的执行结果
+    "browser": 16000,  # 浏览器操作使用vision llm，上下文较小
+    "reporter": 48000,  # 报告需要尽量多的原始结果
+    "reporter_revision": 48000,  # 修订报告与报告相同
+    "reflection": 32000,  # 反思需要较完整的结果
+}
+
+# Define which agents' outputs each agent sees in full. Large outputs of other
+# agents are replaced by one-line stubs, while user turns, the plan and
+# handoff instructions are always kept. Agents not listed see everything.
+AGENT_HISTORY_VIEW: dict[str, list[str]] = {
+    "researcher": ["researcher"],  # 研究只需要自己之前的研究结果
+    "coder": ["coder", "researcher"],  # 编程可能需要研究得到的数据
+    "browser": ["browser"],  # 浏览器不需要代码输出和研究全文
+}
@@ -34,3 +34,86 @@ CHROME_HEADLESS = os.getenv("CHROME_HEADLESS", "False") == "True"
 CHROME_PROXY_SERVER = os.getenv("CHROME_PROXY_SERVER")
 CHROME_PROXY_USERNAME = os.getenv("CHROME_PROXY_USERNAME")
 CHROME_PROXY_PASSWORD = os.getenv("CHROME_PROXY_PASSWORD")
+
+# LLM response cache
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "False") == "True"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Prompt assembly. "inline" stamps the exact time into the system prompt,
+# "coarse" rounds CURRENT_TIME down to PROMPT_TIME_GRANULARITY seconds and
+# "trailing" keeps the system prompt static and sends the time in a trailing
+# user message. The last two keep provider prompt caches hitting.
+PROMPT_TIME_MODE = os.getenv("PROMPT_TIME_MODE", "inline")
+PROMPT_TIME_GRANULARITY = int(os.getenv("PROMPT_TIME_GRANULARITY", "3600"))
+
+# Workflow admission control
+MAX_CONCURRENT_WORKFLOWS = int(os.getenv("MAX_CONCURRENT_WORKFLOWS", "8"))
+MAX_QUEUED_WORKFLOWS = int(os.getenv("MAX_QUEUED_WORKFLOWS", "32"))
+WORKFLOW_RETRY_AFTER = int(os.getenv("WORKFLOW_RETRY_AFTER", "5"))
+
+# Supervisor routing. Follow the plan step by step without a routing LLM call
+# and only ask the LLM on ambiguity, failures or reflection feedback.
+SUPERVISOR_PLAN_ROUTING = os.getenv("SUPERVISOR_PLAN_ROUTING", "True") == "True"
+
+# Crawler. Jina Reader endpoint and the pooled HTTP client's timeouts, retries
+# and connection limit.
+JINA_BASE_URL = os.getenv("JINA_BASE_URL", "https://r.jina.ai/")
+CRAWLER_CONNECT_TIMEOUT = float(os.getenv("CRAWLER_CONNECT_TIMEOUT", "10"))
+CRAWLER_READ_TIMEOUT = float(os.getenv("CRAWLER_READ_TIMEOUT", "60"))
+CRAWLER_MAX_RETRIES = int(os.getenv("CRAWLER_MAX_RETRIES", "2"))
+CRAWLER_RETRY_BACKOFF = float(os.getenv("CRAWLER_RETRY_BACKOFF", "0.5"))
+CRAWLER_MAX_CONNECTIONS = int(os.getenv("CRAWLER_MAX_CONNECTIONS", "20"))
+
+# Crawl cache. Extracted articles are reused for CRAWL_CACHE_TTL seconds and
+# kept up to CRAWL_CACHE_MAX_AGE seconds for revalidation. CRAWLER_FETCH_MODE
+# "direct" fetches pages from their origin instead of the Jina Reader, which
+# allows conditional requests with the stored ETag and Last-Modified.
+CRAWL_CACHE_ENABLED = os.getenv("CRAWL_CACHE_ENABLED", "True") == "True"
+CRAWL_CACHE_PATH = os.getenv("CRAWL_CACHE_PATH", ".cache/crawl.sqlite")
+CRAWL_CACHE_MAX_ENTRIES = int(os.getenv("CRAWL_CACHE_MAX_ENTRIES", "256"))
+CRAWL_CACHE_MAX_BYTES = int(os.getenv("CRAWL_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CRAWL_CACHE_TTL = int(os.getenv("CRAWL_CACHE_TTL", str(24 * 3600)))
+CRAWL_CACHE_MAX_AGE = int(os.getenv("CRAWL_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+CRAWLER_FETCH_MODE = os.getenv("CRAWLER_FETCH_MODE", "jina")
+
+# Search cache. Results of normalized queries are reused across workflows
+# for SEARCH_CACHE_TTL seconds, queries about recent events only for
+# SEARCH_CACHE_VOLATILE_TTL seconds. The cache is kept in memory, set
+# SEARCH_CACHE_PATH to a SQLite file to also keep results across restarts.
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "True") == "True"
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "")
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512"))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(6 * 3600)))
+SEARCH_CACHE_VOLATILE_TTL = int(os.getenv("SEARCH_CACHE_VOLATILE_TTL", "600"))
+
+# Article extraction. EXTRACTION_ENGINE is "readabilipy" (one Node process
+# per page, its pure-Python mode without Node), "node" (Readability.js in
+# long-lived Node workers) or "python" (trafilatura in a process pool).
+# "node" falls back to "readabilipy" with a warning when Node or the
+# Readability.js dependencies are missing.
+EXTRACTION_ENGINE = os.getenv("EXTRACTION_ENGINE", "readabilipy")
+EXTRACTION_WORKERS = int(
+    os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "30"))
+# Characters of a crawled article passed to the LLM, 0 for no cap
+ARTICLE_MAX_CHARS = int(os.getenv("ARTICLE_MAX_CHARS", "100000"))
+
+# Python execution. Every workflow runs its code in its own worker process,
+# taken from PYTHON_POOL_SIZE idle workers that already imported
+# PYTHON_PRELOAD_MODULES. A worker is replaced once its workflow is done.
+PYTHON_POOL_SIZE = int(os.getenv("PYTHON_POOL_SIZE", "2"))
+PYTHON_PRELOAD_MODULES = [
+    module.strip()
+    for module in os.getenv(
+        "PYTHON_PRELOAD_MODULES", "numpy,pandas,matplotlib.pyplot"
+    ).split(",")
+    if module.strip()
+]
+PYTHON_EXEC_TIMEOUT = float(os.getenv("PYTHON_EXEC_TIMEOUT", "60"))
+PYTHON_MEMORY_LIMIT_MB = int(os.getenv("PYTHON_MEMORY_LIMIT_MB", "1024"))
+PYTHON_OUTPUT_MAX_CHARS = int(os.getenv("PYTHON_OUTPUT_MAX_CHARS", "20000"))
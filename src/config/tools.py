@@ -1,4 +1,28 @@
 # Tool configuration
 TAVILY_MAX_RESULTS = 5
 
+# Batch crawling: URLs accepted per crawl_many call and pages fetched from one host at a time
+CRAWL_MANY_MAX_URLS = 10
+CRAWL_PER_HOST_CONCURRENCY = 2
+
+# Crawls with a query return only the most relevant chunks of a long page:
+# chunk size in characters, chunks returned at most and their token budget
+CRAWL_CHUNK_CHARS = 1500
+CRAWL_TOP_CHUNKS = 8
+CRAWL_CHUNK_TOKEN_BUDGET = 2000
+
+# Near-duplicate pages and search results within an agent run: the shingle
+# similarity from which two documents count as the same, and the fewest words
+# a document needs to be checked
+DEDUP_ENABLED = True
+DEDUP_MIN_SIMILARITY = 0.8
+DEDUP_MIN_WORDS = 20
+
+# Multi-query search: queries accepted per call, searched at a time, merged
+# results returned and characters kept of each result's content
+MULTI_SEARCH_MAX_QUERIES = 5
+MULTI_SEARCH_CONCURRENCY = 3
+MULTI_SEARCH_MAX_RESULTS = 10
+MULTI_SEARCH_CONTENT_CHARS = 600
+
 BROWSER_HISTORY_DIR = "static/browser_history"
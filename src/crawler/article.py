@@ -1,34 +1,156 @@
 import re
+from typing import Optional
 from urllib.parse import urljoin
 
 from markdownify import markdownify as md
 
+from src.config import ARTICLE_MAX_CHARS, CRAWL_CHUNK_TOKEN_BUDGET, CRAWL_TOP_CHUNKS
+
+from .ranking import ChunkIndex, chunk_markdown
+
+IMAGE_PATTERN = re.compile(r"!\[.*?\]\((.*?)\)")
+
+
+def _message_blocks(
+    title: Optional[str], markdown: str, url: Optional[str], max_chars: int
+) -> list[dict]:
+    # Blocks are sliced from the markdown in a single pass over its images,
+    # each text copied once and only up to the cap
+    content: list[dict] = []
+    budget = max_chars if max_chars > 0 else float("inf")
+    # The title heads the first text block
+    prefix = f"# {title}\n\n"
+
+    def add_text(start: int, end: int) -> bool:
+        # Returns False once the cap is reached
+        nonlocal budget, prefix
+        while start < end and markdown[start].isspace():
+            start += 1
+        while end > start and markdown[end - 1].isspace():
+            end -= 1
+        truncated = len(prefix) + end - start > budget
+        if truncated:
+            end = max(start, start + budget - len(prefix))
+        text = (prefix + markdown[start:end]).strip()
+        prefix = ""
+        if text:
+            content.append({"type": "text", "text": text})
+            budget -= len(text)
+        if truncated:
+            content.append(
+                {
+                    "type": "text",
+                    "text": f"[Content truncated, the page is longer than {max_chars} characters]",
+                }
+            )
+        return not truncated
+
+    start = 0
+    for match in IMAGE_PATTERN.finditer(markdown):
+        if not add_text(start, match.start()):
+            return content
+        image_url = urljoin(url, match.group(1).strip())
+        content.append({"type": "image_url", "image_url": {"url": image_url}})
+        start = match.end()
+    add_text(start, len(markdown))
+    return content
+
 
 class Article:
-    url: str
+    """An extracted article, converted to markdown at most once.
 
-    def __init__(self, title: str, html_content: str):
+    The markdown of `html_content` is computed on first use and cached until
+    `html_content` is replaced, so rendering the same article for a message,
+    the cache and logs runs markdownify only once. The BM25 index of its
+    chunks is likewise built on the first query.
+
+    Args:
+        title: The article title
+        html_content: The extracted article body
+        markdown: The markdown of `html_content` when already known, e.g. from
+            the crawl cache, so it is not converted again
+    """
+
+    __slots__ = ("title", "_html_content", "_markdown", "_chunk_index", "url")
+
+    def __init__(
+        self,
+        title: Optional[str],
+        html_content: Optional[str],
+        markdown: Optional[str] = None,
+    ):
         self.title = title
         self.html_content = html_content
+        self._markdown = markdown
+        self.url: Optional[str] = None
+
+    @property
+    def html_content(self) -> Optional[str]:
+        return self._html_content
+
+    @html_content.setter
+    def html_content(self, html_content: Optional[str]) -> None:
+        self._html_content = html_content
+        self._markdown: Optional[str] = None
+        self._chunk_index: Optional[ChunkIndex] = None
+
+    @property
+    def markdown(self) -> str:
+        """The article body as markdown, without the title."""
+        if self._markdown is None:
+            self._markdown = md(self._html_content) if self._html_content else ""
+        return self._markdown
 
     def to_markdown(self, including_title: bool = True) -> str:
-        markdown = ""
         if including_title:
-            markdown += f"# {self.title}\n\n"
-        markdown += md(self.html_content)
-        return markdown
+            return f"# {self.title}\n\n{self.markdown}"
+        return self.markdown
 
-    def to_message(self) -> list[dict]:
-        image_pattern = r"!\[.*?\]\((.*?)\)"
+    @property
+    def chunk_index(self) -> ChunkIndex:
+        """The BM25 index over the chunks of the markdown."""
+        if self._chunk_index is None:
+            self._chunk_index = ChunkIndex(chunk_markdown(self.markdown))
+        return self._chunk_index
 
-        content: list[dict[str, str]] = []
-        parts = re.split(image_pattern, self.to_markdown())
+    def to_message(
+        self,
+        max_chars: int = ARTICLE_MAX_CHARS,
+        query: Optional[str] = None,
+        top_k: int = CRAWL_TOP_CHUNKS,
+        token_budget: int = CRAWL_CHUNK_TOKEN_BUDGET,
+    ) -> list[dict]:
+        """
+        Split the article into text and image blocks of one LLM message.
 
-        for i, part in enumerate(parts):
-            if i % 2 == 1:
-                image_url = urljoin(self.url, part.strip())
-                content.append({"type": "image_url", "image_url": {"url": image_url}})
-            else:
-                content.append({"type": "text", "text": part.strip()})
+        Args:
+            max_chars: Cap on the text of all blocks, 0 for no cap. Text and
+                images beyond it are dropped and a note says so.
+            query: What the reader is looking for. A page longer than
+                `token_budget` is then cut down to its `top_k` most relevant
+                chunks, with a note on how to read the rest.
+            top_k: Chunks kept at most for a query
+            token_budget: Estimated tokens of the kept chunks at most
 
+        Returns:
+            The message content blocks
+        """
+        if not query or not query.strip():
+            return _message_blocks(self.title, self.markdown, self.url, max_chars)
+        index = self.chunk_index
+        if index.total_tokens <= token_budget:
+            return _message_blocks(self.title, self.markdown, self.url, max_chars)
+        picked = index.select(query, top_k=top_k, token_budget=token_budget)
+        markdown = "\n\n[...]\n\n".join(index.chunks[chunk_id] for chunk_id in picked)
+        content = _message_blocks(self.title, markdown, self.url, max_chars)
+        content.append(
+            {
+                "type": "text",
+                "text": (
+                    f"[Showing {len(picked)} of {len(index.chunks)} sections of the page, "
+                    f"the most relevant to {query.strip()!r}. Crawl it again with another "
+                    "query for other sections, or without a query for the whole page.]"
+                ),
+            }
+        )
         return content
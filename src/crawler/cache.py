@@ -0,0 +1,170 @@
+"""
+Crawl cache that keeps fetched and extracted pages across workflows.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Optional
+
+from src.config import (
+    CRAWL_CACHE_ENABLED,
+    CRAWL_CACHE_PATH,
+    CRAWL_CACHE_MAX_ENTRIES,
+    CRAWL_CACHE_MAX_BYTES,
+    CRAWL_CACHE_TTL,
+    CRAWL_CACHE_MAX_AGE,
+)
+from src.utils.cache import LRUCache, SQLiteCache, TieredCache
+from src.utils.counters import Counters, ratio
+from src.utils.urls import normalize_url
+
+from .article import Article
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlCache(Counters):
+    """Raw HTML, extracted articles and their markdown of crawled pages, keyed by normalized URL.
+
+    An entry is fresh for `ttl` seconds after it was fetched and is returned
+    without any request. Stale entries stay stored until `max_age`, so a
+    direct fetch can revalidate them with their ETag and Last-Modified
+    instead of downloading and extracting the page again. The markdown is
+    stored with the article, so a hit does not run markdownify again.
+
+    Args:
+        cache: The tiered cache backing the crawl cache, its TTL should be `max_age`
+        ttl: Seconds an entry is used without revalidation
+    """
+
+    fields = ("hits", "revalidated", "misses")
+
+    def __init__(self, cache: TieredCache, ttl: float = CRAWL_CACHE_TTL):
+        super().__init__()
+        self._cache = cache
+        self.ttl = ttl
+
+    @staticmethod
+    def key(url: str) -> str:
+        return "crawl:" + hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Return the stored entry of a page, fresh or stale, or None."""
+        entry = self._cache.get(self.key(url))
+        if entry is not None and not isinstance(entry, dict):
+            logger.warning(f"Dropping unreadable crawl cache entry of {url}")
+            self._cache.delete(self.key(url))
+            return None
+        return entry
+
+    @staticmethod
+    def validators(entry: Optional[dict]) -> tuple[Optional[str], Optional[str]]:
+        """Return the ETag and Last-Modified of an entry for a conditional request."""
+        if entry is None:
+            return None, None
+        return entry.get("etag"), entry.get("last_modified")
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    @staticmethod
+    def article(url: str, entry: dict) -> Article:
+        # Entries stored before the markdown was kept convert it again on use
+        article = Article(
+            title=entry.get("title"),
+            html_content=entry.get("content"),
+            markdown=entry.get("markdown"),
+        )
+        article.url = url
+        return article
+
+    def store(
+        self,
+        url: str,
+        html: str,
+        article: Article,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        if not article.html_content:
+            # Nothing was extracted, e.g. a page rendered by JavaScript
+            return
+        self._cache.set(
+            self.key(url),
+            {
+                "url": normalize_url(url),
+                "html": html,
+                "title": article.title,
+                "content": article.html_content,
+                "markdown": article.markdown,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": time.time(),
+            },
+        )
+
+    def refresh(self, url: str, entry: dict) -> None:
+        """Mark a revalidated entry as fresh again."""
+        self._cache.set(self.key(url), {**entry, "fetched_at": time.time()})
+
+    def record(self, outcome: str) -> None:
+        """Count a lookup as a "hit", a "revalidated" stale entry or a "miss"."""
+        field = {"hit": "hits", "revalidated": "revalidated"}.get(outcome, "misses")
+        self.add(**{field: 1})
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        storage = self._cache.stats()
+        counts = self.snapshot()
+        return {
+            **counts,
+            "hit_rate": ratio(
+                counts["hits"] + counts["revalidated"], sum(counts.values())
+            ),
+            "memory_entries": storage["memory_entries"],
+            "disk_bytes": storage["disk_bytes"],
+        }
+
+
+_crawl_cache: Optional[CrawlCache] = None
+_crawl_cache_configured = False
+_crawl_cache_lock = threading.Lock()
+
+
+def get_crawl_cache() -> Optional[CrawlCache]:
+    """Return the process-wide crawl cache, or None when caching is disabled."""
+    global _crawl_cache, _crawl_cache_configured
+    if _crawl_cache_configured:
+        return _crawl_cache
+    # Crawler threads of crawl_many may ask first at the same time, only one
+    # of them must open the SQLite file
+    with _crawl_cache_lock:
+        if not _crawl_cache_configured and CRAWL_CACHE_ENABLED:
+            disk = (
+                SQLiteCache(
+                    CRAWL_CACHE_PATH,
+                    max_bytes=CRAWL_CACHE_MAX_BYTES,
+                    ttl=CRAWL_CACHE_MAX_AGE,
+                )
+                if CRAWL_CACHE_PATH
+                else None
+            )
+            _crawl_cache = CrawlCache(
+                TieredCache(
+                    LRUCache(CRAWL_CACHE_MAX_ENTRIES, ttl=CRAWL_CACHE_MAX_AGE), disk
+                )
+            )
+        _crawl_cache_configured = True
+    return _crawl_cache
+
+
+def set_crawl_cache(cache: Optional[CrawlCache]) -> None:
+    """Replace the process-wide crawl cache, None disables caching."""
+    global _crawl_cache, _crawl_cache_configured
+    with _crawl_cache_lock:
+        _crawl_cache = cache
+        _crawl_cache_configured = True
@@ -1,29 +1,188 @@
+import asyncio
+import logging
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
+from urllib.parse import urlsplit
+
+from src.config import (
+    CRAWL_PER_HOST_CONCURRENCY,
+    CRAWLER_FETCH_MODE,
+    CRAWLER_MAX_CONNECTIONS,
+)
 
 from .article import Article
+from .cache import CrawlCache, get_crawl_cache
+from .direct_client import DirectClient, FetchedPage
 from .jina_client import JinaClient
 from .readability_extractor import ReadabilityExtractor
 
+logger = logging.getLogger(__name__)
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
 
 class Crawler:
+    # To help LLMs better understand content, we extract clean
+    # articles from HTML, convert them to markdown, and split
+    # them into text and image blocks for one single and unified
+    # LLM message.
+    #
+    # Jina is not the best crawler on readability, however it's
+    # much easier and free to use.
+    #
+    # Instead of using Jina's own markdown converter, we'll use
+    # our own solution to get better readability results.
+    #
+    # Pages are kept in the crawl cache. A fresh entry is returned without
+    # any request, a stale one is revalidated when pages are fetched directly
+    # from their origin, which unlike Jina returns ETag and Last-Modified.
+
+    def __init__(
+        self,
+        jina_client: Optional[JinaClient] = None,
+        direct_client: Optional[DirectClient] = None,
+        fetch_mode: str = CRAWLER_FETCH_MODE,
+    ):
+        self.jina_client = jina_client or JinaClient()
+        self.direct_client = direct_client or DirectClient()
+        self.fetch_mode = fetch_mode
+        self.extractor = ReadabilityExtractor()
+
+    @staticmethod
+    def _cached(url: str) -> tuple[Optional[CrawlCache], Optional[dict]]:
+        cache = get_crawl_cache()
+        entry = cache.lookup(url) if cache is not None else None
+        return cache, entry
+
+    @staticmethod
+    def _revalidated(
+        url: str, cache: Optional[CrawlCache], entry: Optional[dict], page: FetchedPage
+    ) -> Optional[Article]:
+        if not page.not_modified or entry is None:
+            return None
+        logger.info(f"Cached content of {url} is still valid")
+        cache.refresh(url, entry)
+        cache.record("revalidated")
+        return cache.article(url, entry)
+
     def crawl(self, url: str) -> Article:
-        # To help LLMs better understand content, we extract clean
-        # articles from HTML, convert them to markdown, and split
-        # them into text and image blocks for one single and unified
-        # LLM message.
-        #
-        # Jina is not the best crawler on readability, however it's
-        # much easier and free to use.
-        #
-        # Instead of using Jina's own markdown converter, we'll use
-        # our own solution to get better readability results.
-        jina_client = JinaClient()
-        html = jina_client.crawl(url, return_format="html")
-        extractor = ReadabilityExtractor()
-        article = extractor.extract_article(html)
+        cache, entry = self._cached(url)
+        if entry is not None and cache.is_fresh(entry):
+            cache.record("hit")
+            return cache.article(url, entry)
+
+        page = None
+        if self.fetch_mode == "direct":
+            page = self.direct_client.fetch(url, *CrawlCache.validators(entry))
+            article = self._revalidated(url, cache, entry, page)
+            if article is not None:
+                return article
+            html = page.html
+        else:
+            html = self.jina_client.crawl(url, return_format="html")
+        article = self.extractor.extract_article(html)
+        article.url = url
+        self._store(url, cache, html, article, page)
+        return article
+
+    async def acrawl(self, url: str) -> Article:
+        # The cache reads and writes SQLite, they run off the event loop
+        cache, entry = await asyncio.to_thread(self._cached, url)
+        if entry is not None and cache.is_fresh(entry):
+            cache.record("hit")
+            return cache.article(url, entry)
+
+        page = None
+        if self.fetch_mode == "direct":
+            page = await self.direct_client.afetch(url, *CrawlCache.validators(entry))
+            article = await asyncio.to_thread(
+                self._revalidated, url, cache, entry, page
+            )
+            if article is not None:
+                return article
+            html = page.html
+        else:
+            html = await self.jina_client.acrawl(url, return_format="html")
+        article = await self.extractor.aextract_article(html)
         article.url = url
+        await asyncio.to_thread(self._store, url, cache, html, article, page)
         return article
 
+    @staticmethod
+    def _store(
+        url: str,
+        cache: Optional[CrawlCache],
+        html: str,
+        article: Article,
+        page: Optional[FetchedPage],
+    ) -> None:
+        if cache is None:
+            return
+        cache.record("miss")
+        cache.store(
+            url,
+            html,
+            article,
+            etag=page.etag if page else None,
+            last_modified=page.last_modified if page else None,
+        )
+
+    def crawl_many(
+        self, urls: list[str], per_host: int = CRAWL_PER_HOST_CONCURRENCY
+    ) -> list[Union[Article, Exception]]:
+        """
+        Crawl several URLs concurrently from worker threads.
+
+        Args:
+            urls: The pages to crawl
+            per_host: Pages fetched from the same host at a time
+
+        Returns:
+            An Article or the raised exception for each URL, in input order
+        """
+        if not urls:
+            return []
+        host_slots = {_host(url): threading.Semaphore(per_host) for url in urls}
+
+        def crawl(url: str) -> Union[Article, Exception]:
+            with host_slots[_host(url)]:
+                try:
+                    return self.crawl(url)
+                except Exception as e:
+                    return e
+
+        workers = min(len(urls), CRAWLER_MAX_CONNECTIONS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(crawl, urls))
+
+    async def acrawl_many(
+        self, urls: list[str], per_host: int = CRAWL_PER_HOST_CONCURRENCY
+    ) -> list[Union[Article, Exception]]:
+        """
+        Crawl several URLs concurrently on the event loop.
+
+        Args:
+            urls: The pages to crawl
+            per_host: Pages fetched from the same host at a time
+
+        Returns:
+            An Article or the raised exception for each URL, in input order
+        """
+        host_slots = {_host(url): asyncio.Semaphore(per_host) for url in urls}
+
+        async def crawl(url: str) -> Union[Article, Exception]:
+            async with host_slots[_host(url)]:
+                try:
+                    return await self.acrawl(url)
+                except Exception as e:
+                    return e
+
+        return list(await asyncio.gather(*(crawl(url) for url in urls)))
+
 
 if __name__ == "__main__":
     if len(sys.argv) == 2:
@@ -0,0 +1,92 @@
+from typing import NamedTuple, Optional
+
+import httpx
+
+from .http_client import arequest_with_retries, request_with_retries
+
+USER_AGENT = (
+    "Mozilla/5.0 (compatible; LangManus/0.1; +https://github.com/langmanus/langmanus)"
+)
+
+
+class FetchedPage(NamedTuple):
+    """A page fetched from its origin.
+
+    `not_modified` is True when the server confirmed the validators of a
+    conditional request, `html` is empty then.
+    """
+
+    html: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    not_modified: bool = False
+
+
+class DirectClient:
+    """Fetches pages from their origin server, without a reader in between.
+
+    Unlike the Jina Reader, the origin returns validators, so a cached page
+    can be revalidated with a conditional request instead of downloaded again.
+    Pages rendered by JavaScript come back without their content.
+
+    Args:
+        max_retries: Retries after the first attempt, defaults to CRAWLER_MAX_RETRIES
+    """
+
+    def __init__(self, max_retries: Optional[int] = None):
+        self.max_retries = max_retries
+
+    @staticmethod
+    def _headers(etag: Optional[str], last_modified: Optional[str]) -> dict:
+        headers = {"User-Agent": USER_AGENT, "Accept": "text/html,*/*;q=0.8"}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    @staticmethod
+    def _page(response: httpx.Response) -> FetchedPage:
+        return FetchedPage(
+            html="" if response.status_code == 304 else response.text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            not_modified=response.status_code == 304,
+        )
+
+    def fetch(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FetchedPage:
+        """
+        Fetch a page, conditionally when validators of a cached copy are given.
+
+        Args:
+            url: The page to fetch
+            etag: ETag of the cached copy
+            last_modified: Last-Modified of the cached copy
+
+        Returns:
+            The fetched page
+
+        Raises:
+            httpx.HTTPError: If the page could not be fetched after all retries
+        """
+        response = request_with_retries(
+            "GET",
+            url,
+            max_retries=self.max_retries,
+            headers=self._headers(etag, last_modified),
+        )
+        return self._page(response)
+
+    async def afetch(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FetchedPage:
+        """The async counterpart of `fetch`."""
+        response = await arequest_with_retries(
+            "GET",
+            url,
+            max_retries=self.max_retries,
+            headers=self._headers(etag, last_modified),
+        )
+        return self._page(response)
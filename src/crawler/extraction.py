@@ -0,0 +1,259 @@
+"""
+Article extraction engines: Readability.js in long-lived Node workers, and a
+pure-Python engine run in a process pool.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import readabilipy
+
+from src.config import EXTRACTION_TIMEOUT, EXTRACTION_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# readabilipy ships Readability.js and installs its Node dependencies there
+READABILIPY_JS_DIR = os.path.join(os.path.dirname(readabilipy.__file__), "javascript")
+NODE_WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "readability_worker.js")
+
+
+def node_available() -> bool:
+    """Check for node and the installed Readability.js dependencies.
+
+    Unlike readabilipy, this never runs `npm install` as a side effect.
+    """
+    return shutil.which("node") is not None and os.path.isdir(
+        os.path.join(READABILIPY_JS_DIR, "node_modules")
+    )
+
+
+class ExtractionError(Exception):
+    """Raised when an extraction engine fails on a page."""
+
+
+class NodeWorker:
+    """A Node process running Readability.js on one page at a time.
+
+    Pages are sent as one JSON line on stdin and the parsed article comes
+    back as one JSON line on stdout, so the JS runtime, jsdom and Readability
+    are loaded once instead of for every page.
+    """
+
+    def __init__(self):
+        env = {
+            **os.environ,
+            "NODE_PATH": os.path.join(READABILIPY_JS_DIR, "node_modules"),
+        }
+        self._process = subprocess.Popen(
+            ["node", NODE_WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=READABILIPY_JS_DIR,
+            env=env,
+            encoding="utf-8",
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def extract(self, html: str, timeout: float = EXTRACTION_TIMEOUT) -> dict:
+        """
+        Parse a page with Readability.js.
+
+        Args:
+            html: The page HTML
+            timeout: Seconds before the worker is killed
+
+        Returns:
+            Readability's article, with `title` and `content`
+
+        Raises:
+            ExtractionError: If the worker failed, died or timed out
+        """
+        # A stuck page kills the worker, which unblocks the read below
+        watchdog = threading.Timer(timeout, self._process.kill)
+        watchdog.start()
+        try:
+            self._process.stdin.write(json.dumps({"html": html}) + "\n")
+            self._process.stdin.flush()
+            line = self._process.stdout.readline()
+        except OSError as e:
+            raise ExtractionError(f"Readability worker failed: {e!r}") from e
+        finally:
+            watchdog.cancel()
+        if not line:
+            raise ExtractionError("Readability worker exited or timed out")
+        try:
+            response = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ExtractionError(f"Unreadable Readability worker response: {e}") from e
+        if "error" in response:
+            raise ExtractionError(response["error"])
+        return response["article"] or {}
+
+    def close(self) -> None:
+        if self.alive:
+            self._process.kill()
+        self._process.wait()
+
+
+class NodeWorkerPool:
+    """A fixed number of Node workers, started on first use and restarted when they fail.
+
+    Args:
+        size: Number of workers, pages beyond it wait for a free worker
+    """
+
+    def __init__(self, size: int = EXTRACTION_WORKERS):
+        self._idle: queue.Queue[Optional[NodeWorker]] = queue.Queue()
+        for _ in range(size):
+            self._idle.put(None)
+
+    def extract(self, html: str) -> dict:
+        worker = self._idle.get()
+        try:
+            if worker is None or not worker.alive:
+                worker = NodeWorker()
+            return worker.extract(html)
+        except ExtractionError:
+            worker.close()
+            worker = None
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if worker is not None:
+                worker.close()
+
+
+# Tags of trafilatura's XML output and their HTML counterparts
+_XML_TO_HTML = {
+    "head": None,  # h1-h6, from the rend attribute
+    "list": None,  # ul or ol, from the rend attribute
+    "item": "li",
+    "code": "pre",
+    "quote": "blockquote",
+    "lb": "br",
+    "graphic": "img",
+    "ref": "a",
+    "hi": None,  # inline formatting, from the rend attribute
+    "row": "tr",
+    "cell": None,  # th or td, from the role attribute
+    "del": "del",
+}
+_HI_TAGS = {
+    "#b": "strong",
+    "#i": "em",
+    "#u": "u",
+    "#t": "code",
+    "#sub": "sub",
+    "#sup": "sup",
+}
+_KEPT_ATTRIBUTES = {"img": ("src", "alt", "title"), "a": ("href", "title")}
+
+
+def _to_html(body) -> str:
+    from lxml.etree import tostring
+
+    for element in body.iter(*_XML_TO_HTML):
+        tag = element.tag
+        rend = element.get("rend", "")
+        if tag == "head":
+            level = rend[1:] if rend[:1] == "h" and rend[1:].isdigit() else "3"
+            element.tag = f"h{level}"
+        elif tag == "list":
+            element.tag = "ol" if rend == "ol" else "ul"
+        elif tag == "hi":
+            element.tag = _HI_TAGS.get(rend, "em")
+        elif tag == "cell":
+            element.tag = "th" if element.get("role") == "head" else "td"
+        else:
+            element.tag = _XML_TO_HTML[tag]
+        if element.tag == "a" and "target" in element.attrib:
+            element.set("href", element.attrib.pop("target"))
+        kept = _KEPT_ATTRIBUTES.get(element.tag, ())
+        for name in list(element.attrib):
+            if name not in kept:
+                del element.attrib[name]
+    body.tag = "div"
+    return tostring(body, encoding="unicode", method="html")
+
+
+def extract_with_python(html: str) -> dict:
+    """
+    Extract the main content of a page with trafilatura.
+
+    Args:
+        html: The page HTML
+
+    Returns:
+        The article with `title` and `content` as HTML, like Readability's
+    """
+    import trafilatura
+
+    document = trafilatura.bare_extraction(
+        html,
+        include_images=True,
+        include_links=True,
+        include_formatting=True,
+        include_tables=True,
+        with_metadata=True,
+    )
+    if document is None or document.body is None:
+        return {"title": None, "content": None}
+    return {"title": document.title, "content": _to_html(document.body)}
+
+
+class PythonExtractionPool:
+    """Runs `extract_with_python` in worker processes, off the GIL of the app.
+
+    Args:
+        size: Number of worker processes
+    """
+
+    def __init__(self, size: int = EXTRACTION_WORKERS):
+        self._size = size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self._size)
+            return self._executor
+
+    def extract(self, html: str) -> dict:
+        return (
+            self._get_executor()
+            .submit(extract_with_python, html)
+            .result(timeout=EXTRACTION_TIMEOUT)
+        )
+
+    async def aextract(self, html: str) -> dict:
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._get_executor(), extract_with_python, html),
+            EXTRACTION_TIMEOUT,
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
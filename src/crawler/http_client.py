@@ -0,0 +1,218 @@
+"""
+Pooled HTTP clients shared by the crawler backends, with retries and backoff.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import threading
+import time
+import weakref
+from typing import Optional
+
+import httpx
+
+from src.config import (
+    CRAWLER_CONNECT_TIMEOUT,
+    CRAWLER_READ_TIMEOUT,
+    CRAWLER_MAX_RETRIES,
+    CRAWLER_RETRY_BACKOFF,
+    CRAWLER_MAX_CONNECTIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Responses worth another attempt: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Upper bound of a single backoff, also for a server-provided Retry-After
+MAX_RETRY_DELAY = 10.0
+
+# HTTP/2 needs the optional h2 package, otherwise httpx falls back to HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_LoopClients = weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, tuple[httpx.AsyncClient, asyncio.Semaphore]
+]
+
+_client_lock = threading.Lock()
+_sync_client: Optional[httpx.Client] = None
+# An AsyncClient's connections belong to the event loop that opened them
+_async_clients: _LoopClients = weakref.WeakKeyDictionary()
+
+
+def _client_options() -> dict:
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "timeout": httpx.Timeout(CRAWLER_READ_TIMEOUT, connect=CRAWLER_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=CRAWLER_MAX_CONNECTIONS,
+            max_keepalive_connections=CRAWLER_MAX_CONNECTIONS,
+        ),
+        "follow_redirects": True,
+    }
+
+
+def get_sync_client() -> httpx.Client:
+    """Return the process-wide pooled client for blocking crawls."""
+    global _sync_client
+    with _client_lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(**_client_options())
+        return _sync_client
+
+
+def get_async_client() -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    """
+    Return the pooled async client of the running event loop.
+
+    Requests should hold the returned semaphore, which has one slot per pooled
+    connection. httpcore scans every waiting request against every connection
+    whenever one is released, so letting requests queue inside the pool costs
+    far more CPU than waiting on the semaphore.
+
+    Returns:
+        The client and the semaphore limiting its concurrent requests
+    """
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        pool = _async_clients.get(loop)
+        if pool is None or pool[0].is_closed:
+            pool = (
+                httpx.AsyncClient(**_client_options()),
+                asyncio.Semaphore(CRAWLER_MAX_CONNECTIONS),
+            )
+            _async_clients[loop] = pool
+        return pool
+
+
+async def aclose_clients() -> None:
+    """Close the pooled clients of every event loop, e.g. on application shutdown."""
+    global _sync_client
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        sync_client, _sync_client = _sync_client, None
+        async_pools = list(_async_clients.items())
+        _async_clients.clear()
+    if sync_client is not None:
+        sync_client.close()
+    for client_loop, (client, _) in async_pools:
+        try:
+            if client_loop is not loop and client_loop.is_running():
+                # The loop runs in another thread, its connections close there
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+                )
+            else:
+                await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close a pooled HTTP client: {e}")
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    delay = CRAWLER_RETRY_BACKOFF * 2**attempt
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, float(retry_after))
+    return min(delay, MAX_RETRY_DELAY)
+
+
+def _should_retry(
+    attempt: int,
+    max_retries: int,
+    url: str,
+    response: Optional[httpx.Response],
+    error: Optional[Exception],
+) -> bool:
+    if attempt >= max_retries:
+        return False
+    if error is None and response.status_code not in RETRYABLE_STATUS_CODES:
+        return False
+    reason = repr(error) if error is not None else f"status {response.status_code}"
+    logger.warning(f"Request to {url} failed ({reason}), retrying")
+    return True
+
+
+def _checked(response: httpx.Response) -> httpx.Response:
+    # 304 answers a conditional request, it is not an error
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+
+def request_with_retries(
+    method: str, url: str, max_retries: Optional[int] = None, **kwargs
+) -> httpx.Response:
+    """
+    Send a request through the pooled client, blocking the calling thread.
+
+    Connection errors, timeouts and retryable status codes are retried up to
+    `max_retries` times with exponential backoff.
+
+    Args:
+        method: HTTP method
+        url: Request URL
+        max_retries: Retries after the first attempt, defaults to CRAWLER_MAX_RETRIES
+        **kwargs: Passed to `httpx.Client.request`
+
+    Returns:
+        The successful or 304 response
+
+    Raises:
+        httpx.HTTPError: If the request still failed after all retries
+    """
+    max_retries = CRAWLER_MAX_RETRIES if max_retries is None else max_retries
+    client = get_sync_client()
+    attempt = 0
+    while True:
+        response, error = None, None
+        try:
+            response = client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            error = e
+        if not _should_retry(attempt, max_retries, url, response, error):
+            break
+        time.sleep(_retry_delay(attempt, response))
+        attempt += 1
+    if error is not None:
+        raise error
+    return _checked(response)
+
+
+async def arequest_with_retries(
+    method: str, url: str, max_retries: Optional[int] = None, **kwargs
+) -> httpx.Response:
+    """
+    Send a request through the event loop's pooled client.
+
+    The async counterpart of `request_with_retries`, with the same retries.
+
+    Args:
+        method: HTTP method
+        url: Request URL
+        max_retries: Retries after the first attempt, defaults to CRAWLER_MAX_RETRIES
+        **kwargs: Passed to `httpx.AsyncClient.request`
+
+    Returns:
+        The successful or 304 response
+
+    Raises:
+        httpx.HTTPError: If the request still failed after all retries
+    """
+    max_retries = CRAWLER_MAX_RETRIES if max_retries is None else max_retries
+    client, slots = get_async_client()
+    attempt = 0
+    while True:
+        response, error = None, None
+        try:
+            async with slots:
+                response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            error = e
+        if not _should_retry(attempt, max_retries, url, response, error):
+            break
+        await asyncio.sleep(_retry_delay(attempt, response))
+        attempt += 1
+    if error is not None:
+        raise error
+    return _checked(response)
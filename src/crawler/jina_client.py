@@ -1,13 +1,33 @@
 import logging
 import os
+from typing import Optional
 
-import requests
+from src.config import JINA_BASE_URL
+
+from .http_client import arequest_with_retries, request_with_retries
 
 logger = logging.getLogger(__name__)
 
 
 class JinaClient:
-    def crawl(self, url: str, return_format: str = "html") -> str:
+    """Client of the Jina Reader API.
+
+    Requests go through process-wide pooled HTTP clients, so connections are
+    kept alive across crawls. Connection errors, timeouts and retryable status
+    codes are retried up to `max_retries` times with exponential backoff.
+
+    Args:
+        base_url: Reader endpoint, defaults to JINA_BASE_URL
+        max_retries: Retries after the first attempt, defaults to CRAWLER_MAX_RETRIES
+    """
+
+    def __init__(
+        self, base_url: Optional[str] = None, max_retries: Optional[int] = None
+    ):
+        self.base_url = base_url or JINA_BASE_URL
+        self.max_retries = max_retries
+
+    def _headers(self, return_format: str) -> dict:
         headers = {
             "Content-Type": "application/json",
             "X-Return-Format": return_format,
@@ -18,6 +38,50 @@ class JinaClient:
             logger.warning(
                 "Jina API key is not set. Provide your own key to access a higher rate limit. See https://jina.ai/reader for more information."
             )
-        data = {"url": url}
-        response = requests.post("https://r.jina.ai/", headers=headers, json=data)
+        return headers
+
+    def crawl(self, url: str, return_format: str = "html") -> str:
+        """
+        Fetch a page through the reader, blocking the calling thread.
+
+        Args:
+            url: The page to crawl
+            return_format: Format of the returned content, e.g. "html" or "markdown"
+
+        Returns:
+            The page content
+
+        Raises:
+            httpx.HTTPError: If the page could not be fetched after all retries
+        """
+        response = request_with_retries(
+            "POST",
+            self.base_url,
+            max_retries=self.max_retries,
+            headers=self._headers(return_format),
+            json={"url": url},
+        )
+        return response.text
+
+    async def acrawl(self, url: str, return_format: str = "html") -> str:
+        """
+        Fetch a page through the reader without blocking the event loop.
+
+        Args:
+            url: The page to crawl
+            return_format: Format of the returned content, e.g. "html" or "markdown"
+
+        Returns:
+            The page content
+
+        Raises:
+            httpx.HTTPError: If the page could not be fetched after all retries
+        """
+        response = await arequest_with_retries(
+            "POST",
+            self.base_url,
+            max_retries=self.max_retries,
+            headers=self._headers(return_format),
+            json={"url": url},
+        )
         return response.text
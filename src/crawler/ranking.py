@@ -0,0 +1,154 @@
+"""
+Lexical relevance ranking of article chunks with BM25.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Optional
+
+from src.config import CRAWL_CHUNK_CHARS, CRAWL_CHUNK_TOKEN_BUDGET, CRAWL_TOP_CHUNKS
+from src.prompts.compaction import estimate_tokens
+
+# BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# CJK characters are tokens of their own, other scripts split into words
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_PATTERN = re.compile(f"[{_CJK}]|[^\\W_{_CJK}]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the "
+    "this to was were what when where which who why will with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase words and single CJK characters of a text, without stopwords."""
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def chunk_markdown(markdown: str, max_chars: int = CRAWL_CHUNK_CHARS) -> list[str]:
+    """
+    Split markdown into chunks of whole paragraphs.
+
+    A heading always starts a new chunk, so sections stay together as long as
+    they fit. Paragraphs longer than `max_chars` become chunks of their own.
+
+    Args:
+        markdown: The markdown to split
+        max_chars: Target chunk size in characters
+
+    Returns:
+        The chunks in document order
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for block in re.split(r"\n\s*\n", markdown):
+        block = block.strip()
+        if not block:
+            continue
+        if current and (block.startswith("#") or size + len(block) > max_chars):
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(block)
+        size += len(block) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+class ChunkIndex:
+    """An inverted index over chunks, scoring them against queries with BM25.
+
+    Term statistics are computed once, so ranking the same article for
+    several queries only touches the postings of the query terms.
+
+    Args:
+        chunks: The chunks to index
+    """
+
+    def __init__(self, chunks: list[str]):
+        self.chunks = chunks
+        self.tokens = [estimate_tokens(chunk) for chunk in chunks]
+        self.total_tokens = sum(self.tokens)
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._lengths: list[int] = []
+        for chunk_id, chunk in enumerate(chunks):
+            frequencies = Counter(tokenize(chunk))
+            self._lengths.append(sum(frequencies.values()))
+            for term, frequency in frequencies.items():
+                self._postings.setdefault(term, []).append((chunk_id, frequency))
+        self._average_length = sum(self._lengths) / len(chunks) if chunks else 0.0
+
+    def _idf(self, term: str) -> float:
+        matches = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self.chunks) - matches + 0.5) / (matches + 0.5))
+
+    def search(
+        self, query: str, top_k: Optional[int] = None
+    ) -> list[tuple[int, float]]:
+        """
+        Rank the chunks matching a query.
+
+        Args:
+            query: The query text
+            top_k: Number of results, all matching chunks when None
+
+        Returns:
+            (chunk id, score) pairs, best first
+        """
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self._idf(term)
+            for chunk_id, frequency in self._postings.get(term, ()):
+                norm = (
+                    1 - BM25_B + BM25_B * self._lengths[chunk_id] / self._average_length
+                )
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (
+                    BM25_K1 + 1
+                ) / (frequency + BM25_K1 * norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked if top_k is None else ranked[:top_k]
+
+    def select(
+        self,
+        query: str,
+        top_k: int = CRAWL_TOP_CHUNKS,
+        token_budget: int = CRAWL_CHUNK_TOKEN_BUDGET,
+    ) -> list[int]:
+        """
+        Pick the best chunks for a query that fit a token budget.
+
+        Chunks are taken by rank and skipped when they no longer fit. Without
+        any matching chunk, the page is read from its start instead.
+
+        Args:
+            query: The query text
+            top_k: Chunks picked at most
+            token_budget: Estimated tokens of the picked chunks at most
+
+        Returns:
+            The picked chunk ids in document order
+        """
+        candidates = [chunk_id for chunk_id, _ in self.search(query)] or range(
+            len(self.chunks)
+        )
+        picked: list[int] = []
+        remaining = token_budget
+        for chunk_id in candidates:
+            if len(picked) == top_k:
+                break
+            if self.tokens[chunk_id] <= remaining:
+                picked.append(chunk_id)
+                remaining -= self.tokens[chunk_id]
+        if not picked and self.chunks:
+            # Even the best chunk exceeds the budget, the message cap cuts it
+            picked.append(candidates[0])
+        return sorted(picked)
@@ -1,12 +1,112 @@
+import asyncio
+import logging
+import threading
+from typing import Optional
+
 from readabilipy import simple_json_from_html_string
 
+from src.config import EXTRACTION_ENGINE
+
 from .article import Article
+from .extraction import (
+    READABILIPY_JS_DIR,
+    NodeWorkerPool,
+    PythonExtractionPool,
+    node_available,
+)
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_ENGINES = ("readabilipy", "node", "python")
+
+# Worker pools are shared by all extractors of the process
+_pool_lock = threading.Lock()
+_node_pool: Optional[NodeWorkerPool] = None
+_python_pool: Optional[PythonExtractionPool] = None
+
+
+def _get_node_pool() -> NodeWorkerPool:
+    global _node_pool
+    with _pool_lock:
+        if _node_pool is None:
+            _node_pool = NodeWorkerPool()
+        return _node_pool
+
+
+def _get_python_pool() -> PythonExtractionPool:
+    global _python_pool
+    with _pool_lock:
+        if _python_pool is None:
+            _python_pool = PythonExtractionPool()
+        return _python_pool
+
+
+def close_extraction_pools() -> None:
+    """Stop the extraction workers, e.g. on application shutdown."""
+    global _node_pool, _python_pool
+    with _pool_lock:
+        node_pool, _node_pool = _node_pool, None
+        python_pool, _python_pool = _python_pool, None
+    if node_pool is not None:
+        node_pool.close()
+    if python_pool is not None:
+        python_pool.close()
+
+
+def _resolve_engine(engine: str) -> str:
+    if engine not in EXTRACTION_ENGINES:
+        raise ValueError(
+            f"Unknown extraction engine {engine!r}, expected one of {EXTRACTION_ENGINES}"
+        )
+    if engine == "python" or node_available():
+        return engine
+    if engine == "node":
+        logger.warning(
+            f"Readability.js is not available, extracting with readabilipy instead. "
+            f"Install Node and run `npm install` in {READABILIPY_JS_DIR} to use the node engine."
+        )
+        return "readabilipy"
+    # readabilipy itself reverts to its pure-Python mode without Node
+    logger.warning(
+        f"Readability.js is not available, readabilipy extracts in its pure-Python mode. "
+        f"Install Node and run `npm install` in {READABILIPY_JS_DIR} to use Readability.js."
+    )
+    return engine
 
 
 class ReadabilityExtractor:
-    def extract_article(self, html: str) -> Article:
-        article = simple_json_from_html_string(html, use_readability=True)
+    """Extracts the main article of a page.
+
+    Every engine returns the same Article:
+    - "readabilipy": Readability.js with one Node process per page, or
+      readabilipy's pure-Python mode without Node
+    - "node": Readability.js in long-lived Node workers, without a Node start per page
+    - "python": trafilatura in worker processes, no Node needed
+
+    Args:
+        engine: One of EXTRACTION_ENGINES, defaults to EXTRACTION_ENGINE
+    """
+
+    def __init__(self, engine: str = EXTRACTION_ENGINE):
+        self.engine = _resolve_engine(engine)
+
+    @staticmethod
+    def _article(parsed: dict) -> Article:
         return Article(
-            title=article.get("title"),
-            html_content=article.get("content"),
+            title=parsed.get("title"),
+            html_content=parsed.get("content"),
         )
+
+    def extract_article(self, html: str) -> Article:
+        if self.engine == "node":
+            return self._article(_get_node_pool().extract(html))
+        if self.engine == "python":
+            return self._article(_get_python_pool().extract(html))
+        return self._article(simple_json_from_html_string(html, use_readability=True))
+
+    async def aextract_article(self, html: str) -> Article:
+        """The async counterpart of `extract_article`, which keeps the event loop free."""
+        if self.engine == "python":
+            return self._article(await _get_python_pool().aextract(html))
+        # Node workers and readabilipy block on a child process
+        return await asyncio.to_thread(self.extract_article, html)
@@ -0,0 +1,31 @@
+/*
+ * Long-lived Readability.js worker for src/crawler/extraction.py.
+ *
+ * Reads one JSON request {"html": ...} per line on stdin and writes one JSON
+ * response {"article": ...} or {"error": ...} per line on stdout. Parses
+ * pages exactly like readabilipy's ExtractArticle.js, without starting a
+ * new Node process for every page.
+ */
+
+const readline = require('readline');
+const { Readability } = require('@mozilla/readability');
+const { JSDOM } = require('jsdom');
+
+const lines = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+
+lines.on('line', (line) => {
+	let response;
+	let dom;
+	try {
+		const request = JSON.parse(line);
+		dom = new JSDOM(request.html.trim());
+		response = { article: new Readability(dom.window.document).parse() };
+	} catch (error) {
+		response = { error: String(error) };
+	} finally {
+		if (dom) {
+			dom.window.close();
+		}
+	}
+	process.stdout.write(JSON.stringify(response) + '\n');
+});
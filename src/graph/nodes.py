@@ -1,30 +1,108 @@
+import functools
 import logging
 import json
 import json_repair
 import logging
-from copy import deepcopy
-from typing import Literal
-from langchain_core.messages import HumanMessage, BaseMessage
+from typing import Literal, Optional
+from langchain_core.messages import HumanMessage
 
 import json_repair
 from langchain_core.messages import HumanMessage
-from langgraph.types import Command
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langgraph.types import Command, Send
 
 from src.agents import research_agent, coder_agent, browser_agent
 from src.llms.llm import get_llm_by_type
-from src.config import TEAM_MEMBERS
+from src.config import TEAM_MEMBERS, SUPERVISOR_PLAN_ROUTING
 from src.config.agents import AGENT_LLM_MAP
 from src.prompts.template import apply_prompt_template
-from src.tools.search import tavily_tool
+from src.service.session import get_current_session
+from src.tools.dedup import dedup_scoped
+from src.tools.search import search_before_planning, start_speculative_search
 from src.utils.json_utils import repair_json_output
-from .types import State, Router
+from .plan import (
+    IncrementalPlanParser,
+    PrelaunchedSteps,
+    parse_plan,
+    ready_steps,
+    route_by_plan,
+    routing_stats,
+)
+from .types import OPTIONS, State, Router
+from .views import FormattedMessageView
 
 logger = logging.getLogger(__name__)
 
 RESPONSE_FORMAT = "Response from {}:\n\n<response>\n{}\n</response>\n\n*Please execute the next step.*"
 
 
-def research_node(state: State) -> Command[Literal["supervisor"]]:
+def _last_user_message(messages: list):
+    """Return the latest message written by the user, falling back to the last message."""
+    for message in reversed(messages):
+        if getattr(message, "type", None) == "human" and not getattr(
+            message, "name", None
+        ):
+            return message
+    return messages[-1]
+
+
+def _plan_so_far(response: str) -> HumanMessage:
+    """Return the plan streamed so far as a planner message, closing its open JSON."""
+    text = response.strip().removeprefix("```json").removesuffix("```")
+    try:
+        text = json.dumps(json_repair.loads(text), ensure_ascii=False)
+    except Exception:
+        pass
+    return HumanMessage(content=text, name="planner")
+
+
+async def _run_plan_step(node, state: State, step) -> str:
+    """Run an agent node on a single plan step and return its reply."""
+    step_state = {
+        **state,
+        "messages": [
+            *state["messages"],
+            HumanMessage(content=step.instruction(), name="plan_executor"),
+        ],
+    }
+    command = await node(step_state)
+    return command.update["messages"][-1].content
+
+
+def plan_step_worker(node):
+    """Let an agent node also execute a single plan step sent by the plan executor.
+
+    A plan step gets its task as an extra instruction message, and its result
+    is reported back to the plan executor instead of the supervisor. A step
+    the planner already started while streaming is awaited instead of rerun.
+    """
+
+    @functools.wraps(node)
+    async def wrapper(state: State):
+        step = state.get("plan_step")
+        if step is None:
+            return await node(state)
+        session = get_current_session()
+        task = (
+            session.get_resource("prelaunched_plan_steps", PrelaunchedSteps).take(step)
+            if session is not None
+            else None
+        )
+        if task is not None:
+            result = await task
+        else:
+            result = await _run_plan_step(node, state, step)
+        return Command(
+            update={"plan_step_results": {step.index: result}},
+            goto="plan_executor",
+        )
+
+    return wrapper
+
+
+@plan_step_worker
+@dedup_scoped
+async def research_node(state: State) -> Command[Literal["supervisor"]]:
     """Node for the researcher agent that performs research tasks."""
     logger.info("Research agent starting task")
     
@@ -45,7 +123,7 @@ def research_node(state: State) -> Command[Literal["supervisor"]]:
             )
             
         # 调用研究代理
-        result = research_agent.invoke(state)
+        result = await research_agent.ainvoke(state)
         logger.info("Research agent completed task")
         
         # 验证返回结果
@@ -111,7 +189,8 @@ def research_node(state: State) -> Command[Literal["supervisor"]]:
         )
 
 
-def code_node(state: State) -> Command[Literal["supervisor"]]:
+@plan_step_worker
+async def code_node(state: State) -> Command[Literal["supervisor"]]:
     """Node for the coder agent that executes Python code."""
     logger.info("Code agent starting task")
     
@@ -132,7 +211,7 @@ def code_node(state: State) -> Command[Literal["supervisor"]]:
             )
             
         # 调用代码代理
-        result = coder_agent.invoke(state)
+        result = await coder_agent.ainvoke(state)
         logger.info("Code agent completed task")
         
         # 验证返回结果
@@ -198,7 +277,11 @@ def code_node(state: State) -> Command[Literal["supervisor"]]:
         )
 
 
-def browser_node(state: State) -> Command[Literal["supervisor"]]:
+# Agent nodes that can execute plan steps on their own
+PLAN_STEP_NODES = {"researcher": research_node, "coder": code_node}
+
+
+async def browser_node(state: State) -> Command[Literal["supervisor"]]:
     """Node for the browser agent that performs web browsing tasks."""
     logger.info("Browser agent starting task")
     
@@ -234,12 +317,11 @@ def browser_node(state: State) -> Command[Literal["supervisor"]]:
                 
         logger.info(f"执行浏览器任务，指令: {browser_instruction}")
         
-        # 创建一个临时状态，包含浏览器指令
-        browser_state = deepcopy(state)
-        browser_state["current_instruction"] = browser_instruction
+        # 创建一个临时状态，包含浏览器指令（浅拷贝，不复制消息历史）
+        browser_state = {**state, "current_instruction": browser_instruction}
             
         # 调用浏览器代理
-        result = browser_agent.invoke(browser_state)
+        result = await browser_agent.ainvoke(browser_state)
         logger.info("Browser agent completed task")
         
         # 验证返回结果
@@ -313,7 +395,9 @@ def browser_node(state: State) -> Command[Literal["supervisor"]]:
         )
 
 
-def reflection_node(state: State) -> Command[Literal["supervisor", "reporter", "__end__"]]:
+async def reflection_node(
+    state: State,
+) -> Command[Literal["supervisor", "reporter", "__end__"]]:
     """反思节点，批评和改进当前解决方案。
     
     该节点分析当前状态，包括所有消息和迄今为止的决策，
@@ -363,7 +447,7 @@ def reflection_node(state: State) -> Command[Literal["supervisor", "reporter", "
         # Get reflection using reasoning LLM (requires deeper thinking)
         llm = get_llm_by_type("reasoning")
         
-        response = llm.invoke(messages)
+        response = await llm.ainvoke(messages)
         
         # 验证响应内容 是否为空
         if not hasattr(response, "content") or response.content is None:
@@ -443,7 +527,91 @@ def reflection_node(state: State) -> Command[Literal["supervisor", "reporter", "
         )
 
 
-def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "reflection", "__end__"]]:
+async def _route_with_llm(state: State) -> tuple[str, Optional[str]]:
+    """Ask the supervisor LLM for the next agent and an optional browser instruction."""
+    # preprocess messages to make supervisor execute better.
+    # The view formats team member messages without copying the history.
+    messages = FormattedMessageView(
+        apply_prompt_template("supervisor", state), TEAM_MEMBERS, RESPONSE_FORMAT
+    )
+
+    # 获取LLM响应
+    llm = get_llm_by_type(AGENT_LLM_MAP["supervisor"])
+
+    # 保留原始响应，解析失败时从原始文本恢复路由，而不是再请求一次
+    try:
+        structured_llm = llm.with_structured_output(
+            schema=Router, method="json_mode", include_raw=True
+        )
+    except Exception as e:
+        logger.warning(f"Structured output unavailable, using a regular response: {e}")
+        structured_llm = None
+
+    raw_response = None
+    if structured_llm is not None:
+        try:
+            response = await structured_llm.ainvoke(messages)
+        except Exception as e:
+            # 请求本身失败时没有可恢复的内容，回退到常规请求
+            logger.warning(
+                f"Structured output failed, falling back to regular response: {e}"
+            )
+        else:
+            parsed = response.get("parsed")
+            if isinstance(parsed, dict) and parsed.get("next") in OPTIONS:
+                return parsed["next"], parsed.get("browser_instruction")
+            logger.warning(
+                f"Structured output could not be parsed, recovering route from raw response: "
+                f"{response.get('parsing_error')}"
+            )
+            routing_stats.record_recovery()
+            raw_response = response.get("raw")
+
+    if raw_response is None:
+        raw_response = await llm.ainvoke(messages)
+
+    content = getattr(raw_response, "content", None)
+    if not content:
+        logger.error("Supervisor LLM returned empty response")
+        return "__end__", None
+    return _parse_route(content)
+
+
+def _parse_route(content: str) -> tuple[str, Optional[str]]:
+    """Recover the next agent and browser instruction from free-form supervisor output."""
+    try:
+        parsed = json_repair.loads(content)
+    except Exception:
+        parsed = None
+    if isinstance(parsed, dict) and isinstance(parsed.get("next"), str):
+        options = {option.lower(): option for option in OPTIONS}
+        goto = options.get(parsed["next"].strip().lower())
+        if goto:
+            return goto, parsed.get("browser_instruction")
+
+    # 尝试从响应中提取路由信息
+    browser_instruction = None
+    content = content.lower()
+    if "finish" in content or "end" in content or "complete" in content:
+        goto = "FINISH"
+    elif "researcher" in content or "research" in content:
+        goto = "researcher"
+    elif "coder" in content or "code" in content:
+        goto = "coder"
+    elif "browser" in content:
+        goto = "browser"
+        # 尝试从内容中提取浏览器指令
+        browser_instruction = f"根据用户请求执行以下浏览任务: {content}"
+    elif "reporter" in content or "report" in content:
+        goto = "reporter"
+    else:
+        goto = "__end__"  # 默认结束
+    return goto, browser_instruction
+
+
+async def supervisor_node(
+    state: State,
+) -> Command[Literal[*TEAM_MEMBERS, "reflection", "__end__"]]:
     """Supervisor node that decides which agent should act next."""
     logger.info("Supervisor evaluating next action")
     
@@ -481,7 +649,7 @@ def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "reflection"
                     browser_instruction = f"根据以下反馈对网页内容进行检查和更正: {reflection_msg}"
             
             # 添加浏览器指令（如果适用）
-            updates = {"revision_processed": True, "next": goto}
+            updates = {"revision_processed": True, "next": goto, "off_plan": True}
             if goto == "browser" and browser_instruction:
                 updates["browser_instruction"] = browser_instruction
                 
@@ -491,49 +659,34 @@ def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "reflection"
                 goto=goto
             )
             
-        # 正常的supervisor处理逻辑
-        messages = apply_prompt_template("supervisor", state)
-        # preprocess messages to make supervisor execute better.
-        messages = deepcopy(messages)
-        for message in messages:
-            if isinstance(message, BaseMessage) and message.name in TEAM_MEMBERS:
-                message.content = RESPONSE_FORMAT.format(message.name, message.content)
-        
-        # 获取LLM响应
-        llm = get_llm_by_type(AGENT_LLM_MAP["supervisor"])
-        
-        # 首先尝试获取带有结构化输出的响应
-        try:
-            response = llm.with_structured_output(schema=Router, method="json_mode").invoke(messages)
-            goto = response["next"]
-            browser_instruction = response.get("browser_instruction")
-        except Exception as e:
-            logger.warning(f"Structured output failed, falling back to regular response: {e}")
-            # 如果结构化输出失败，回退到常规响应
-            regular_response = llm.invoke(messages)
-            
-            if not hasattr(regular_response, "content") or not regular_response.content:
-                logger.error("Supervisor LLM returned empty response")
-                goto = "__end__"
-                browser_instruction = None
-            else:
-                # 尝试从响应中提取路由信息
-                content = regular_response.content.lower()
-                if "finish" in content or "end" in content or "complete" in content:
-                    goto = "FINISH"
-                elif "researcher" in content or "research" in content:
-                    goto = "researcher"
-                elif "coder" in content or "code" in content:
-                    goto = "coder"
-                elif "browser" in content:
-                    goto = "browser"
-                    # 尝试从内容中提取浏览器指令
-                    browser_instruction = f"根据用户请求执行以下浏览任务: {content}"
-                elif "reporter" in content or "report" in content:
-                    goto = "reporter"
-                else:
-                    goto = "__end__"  # 默认结束
-                    
+        # 计划明确时直接按计划路由，省去一次LLM调用
+        plan_route = None
+        last_message = state["messages"][-1]
+        if (
+            SUPERVISOR_PLAN_ROUTING
+            and not state.get("off_plan")
+            and getattr(last_message, "name", None) != "reflection"
+        ):
+            plan_route = route_by_plan(
+                parse_plan(state.get("full_plan")),
+                state.get("merged_plan_steps") or [],
+                state.get("current_plan_step"),
+                last_message,
+            )
+        routing_stats.record(local=plan_route is not None)
+
+        if plan_route is not None:
+            step = plan_route.step
+            goto = step.agent_name if step else "FINISH"
+            browser_instruction = (
+                step.instruction() if step and goto == "browser" else None
+            )
+            logger.info(
+                f"Supervisor following plan step {step.index if step else 'end'}"
+            )
+        else:
+            goto, browser_instruction = await _route_with_llm(state)
+
         # 记录响应日志
         logger.debug(f"Current state messages: {state['messages']}")
         logger.debug(f"Supervisor response: goto={goto}")
@@ -566,6 +719,14 @@ def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "reflection"
             
         # 构建要更新的状态
         updates = {"next": goto}
+        if plan_route is not None:
+            updates["merged_plan_steps"] = plan_route.completed
+            updates["current_plan_step"] = (
+                plan_route.step.index if plan_route.step else None
+            )
+        else:
+            # LLM偏离计划后无法再可靠地跟踪步骤，后续都交给LLM决定
+            updates["off_plan"] = True
         
         # 如果是浏览器任务，添加浏览器指令
         if goto == "browser":
@@ -595,7 +756,54 @@ def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "reflection"
         return Command(goto="__end__")
 
 
-def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
+async def plan_executor_node(
+    state: State,
+) -> Command[Literal["supervisor", *TEAM_MEMBERS]]:
+    """Plan executor node that runs independent plan steps in parallel.
+
+    Every call first appends the results of the steps that just finished to
+    the message history, in plan order so the history does not depend on
+    which step finished first. It then sends all steps whose dependencies are
+    met to their agents at once, and hands control to the supervisor once no
+    more steps can run in parallel.
+    """
+    steps = parse_plan(state.get("full_plan"))
+    results = state.get("plan_step_results") or {}
+    merged = state.get("merged_plan_steps") or []
+
+    finished = sorted(index for index in results if index not in merged)
+    updates = {
+        "messages": [
+            HumanMessage(content=results[index], name=steps[index].agent_name)
+            for index in finished
+        ],
+        "merged_plan_steps": [*merged, *finished],
+    }
+
+    pending = ready_steps(steps, results)
+    if not pending:
+        logger.info(
+            f"Plan executor finished {len(results)} of {len(steps)} steps, "
+            "handing over to supervisor"
+        )
+        return Command(update=updates, goto="supervisor")
+
+    logger.info(
+        f"Plan executor dispatching steps {[step.index for step in pending]} in parallel"
+    )
+    # The sends carry the history including the results merged above
+    step_state = {**state, "messages": [*state["messages"], *updates["messages"]]}
+    return Command(
+        update=updates,
+        goto=[
+            Send(step.agent_name, {**step_state, "plan_step": step}) for step in pending
+        ],
+    )
+
+
+async def planner_node(
+    state: State,
+) -> Command[Literal["supervisor", "plan_executor", "__end__"]]:
     """Planner node that generate the full plan."""
     logger.info("Planner generating full plan")
     
@@ -616,35 +824,82 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
                 goto="__end__",
             )
             
-        messages = apply_prompt_template("planner", state)
         # whether to enable deep thinking mode
         llm = get_llm_by_type("basic")
         if state.get("deep_thinking_mode"):
             llm = get_llm_by_type("reasoning")
-            
+
         # 执行搜索（如果启用）
+        planner_state = state
         if state.get("search_before_planning"):
             try:
-                searched_content = tavily_tool.invoke({"query": state["messages"][-1].content})
+                last_message = state["messages"][-1]
+                # 使用用户的最后一条消息搜索，与协调阶段启动的预搜索一致
+                searched_content = await search_before_planning(
+                    _last_user_message(state["messages"]).content
+                )
                 if isinstance(searched_content, list):
-                    messages = deepcopy(messages)
-                    messages[
-                        -1
-                    ].content += f"\n\n# Relative Search Results\n\n{json.dumps([{'title': elem['title'], 'content': elem['content']} for elem in searched_content], ensure_ascii=False)}"
+                    # Attach the results to a copy of the last user message only
+                    search_results = json.dumps(
+                        [
+                            {"title": elem["title"], "content": elem["content"]}
+                            for elem in searched_content
+                        ],
+                        ensure_ascii=False,
+                    )
+                    last_message = last_message.model_copy(
+                        update={
+                            "content": f"{last_message.content}\n\n# Relative Search Results\n\n{search_results}"
+                        }
+                    )
+                    planner_state = {
+                        **state,
+                        "messages": [*state["messages"][:-1], last_message],
+                    }
                 else:
                     logger.error(
                         f"Tavily search returned malformed response: {searched_content}"
                     )
             except Exception as e:
                 logger.error(f"Error during search before planning: {str(e)}")
-                
-        # 流式获取响应
-        stream = llm.stream(messages)
+
+        messages = apply_prompt_template("planner", planner_state)
+
+        # 并行执行模式下，无依赖的步骤在计划生成完之前就开始执行。
+        # Supervisor mode runs one step at a time from the supervisor's
+        # routing, so steps are only started early for the plan executor.
+        prelaunched = None
+        session = get_current_session()
+        if state.get("parallel_plan_execution") and session is not None:
+            prelaunched = session.get_resource(
+                "prelaunched_plan_steps", PrelaunchedSteps
+            )
+
+        # 流式获取响应，每个步骤生成完毕后立即解析
         full_response = ""
-        for chunk in stream:
+        plan_parser = IncrementalPlanParser()
+        async for chunk in llm.astream(messages):
             if not hasattr(chunk, "content") or chunk.content is None:
                 continue
             full_response += chunk.content
+            for step in plan_parser.feed(chunk.content):
+                await adispatch_custom_event("plan_step", step.to_dict())
+                if (
+                    prelaunched is not None
+                    and not step.depends_on
+                    and step.agent_name in PLAN_STEP_NODES
+                ):
+                    # The step sees the plan up to and including itself
+                    step_state = {
+                        **state,
+                        "messages": [*state["messages"], _plan_so_far(full_response)],
+                    }
+                    prelaunched.launch(
+                        step,
+                        _run_plan_step(
+                            PLAN_STEP_NODES[step.agent_name], step_state, step
+                        ),
+                    )
             
         logger.debug(f"Current state messages: {state['messages']}")
         logger.debug(f"Planner response: {full_response}")
@@ -657,7 +912,7 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
             full_response = full_response.removesuffix("```")
 
         # 验证和修复JSON
-        goto = "supervisor"
+        goto = "plan_executor" if state.get("parallel_plan_execution") else "supervisor"
         try:
             repaired_response = json_repair.loads(full_response)
             full_response = json.dumps(repaired_response)
@@ -690,7 +945,7 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
         )
 
 
-def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
+async def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
     """Coordinator node that communicate with customers."""
     logger.info("Coordinator talking.")
     
@@ -710,8 +965,12 @@ def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
                 goto="__end__",
             )
             
+        # 预先启动规划前搜索，与协调器的LLM调用并行
+        if state.get("search_before_planning"):
+            start_speculative_search(_last_user_message(state["messages"]).content)
+
         messages = apply_prompt_template("coordinator", state)
-        response = get_llm_by_type(AGENT_LLM_MAP["coordinator"]).invoke(messages)
+        response = await get_llm_by_type(AGENT_LLM_MAP["coordinator"]).ainvoke(messages)
         logger.debug(f"Current state messages: {state['messages']}")
         
         # 验证响应内容
@@ -768,7 +1027,7 @@ def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
         )
 
 
-def reporter_node(state: State) -> Command[Literal["supervisor"]]:
+async def reporter_node(state: State) -> Command[Literal["supervisor"]]:
     """Reporter node that write a final report."""
     logger.info("Reporter write final report")
     
@@ -803,8 +1062,7 @@ def reporter_node(state: State) -> Command[Literal["supervisor"]]:
                     
             if reflection_msg:
                 # 创建一个临时状态，包含反思信息
-                temp_state = deepcopy(state)
-                temp_state["reflection_feedback"] = reflection_msg
+                temp_state = {**state, "reflection_feedback": reflection_msg}
                 messages = apply_prompt_template("reporter_revision", temp_state)
                 
                 # 如果reporter_revision模板不存在，使用普通模板
@@ -816,8 +1074,8 @@ def reporter_node(state: State) -> Command[Literal["supervisor"]]:
         else:
             # 正常报告生成
             messages = apply_prompt_template("reporter", state)
-            
-        response = get_llm_by_type(AGENT_LLM_MAP["reporter"]).invoke(messages)
+
+        response = await get_llm_by_type(AGENT_LLM_MAP["reporter"]).ainvoke(messages)
         logger.debug(f"Current state messages: {state['messages']}")
         
         # 验证响应内容
@@ -0,0 +1,346 @@
+"""
+Steps of a planner's `full_plan`, their dependencies and plan-based routing.
+"""
+
+import asyncio
+import contextvars
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Coroutine, Iterable, NamedTuple, Optional
+
+import json_repair
+from langchain_core.runnables.config import var_child_runnable_config
+
+from src.config import TEAM_MEMBERS
+from src.utils.counters import Counters, ratio
+
+logger = logging.getLogger(__name__)
+
+# Agents whose steps can be dispatched concurrently by the plan executor.
+# Browser steps share a browser and the reporter needs every result, so
+# those are left to the supervisor.
+PARALLEL_AGENTS = ("researcher", "coder")
+
+# Phrases in the error messages agent nodes report instead of a result
+FAILURE_MARKERS = ("发生错误", "未返回有效结果", "返回了空内容", "无法执行")
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """A single step of the plan and the steps it has to wait for."""
+
+    index: int
+    agent_name: str
+    title: str
+    description: str
+    note: str = ""
+    depends_on: frozenset[int] = frozenset()
+
+    def instruction(self) -> str:
+        """Render the step as the task given to the agent executing it."""
+        instruction = f"Execute step {self.index + 1} of the plan: {self.title}\n\n{self.description}"
+        if self.note:
+            instruction += f"\n\nNote: {self.note}"
+        return instruction
+
+    def to_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "agent_name": self.agent_name,
+            "title": self.title,
+            "description": self.description,
+            "note": self.note,
+            "depends_on": sorted(self.depends_on),
+        }
+
+
+class PlanStepBuilder:
+    """Turns raw step objects into PlanSteps, in plan order.
+
+    A step may list the indexes of the steps it needs in `depends_on`.
+    Otherwise dependencies are inferred from the step order: consecutive
+    researcher steps are independent of each other, while every other step
+    depends on all the steps before it and every researcher step depends on
+    the last non-researcher step before it. Only earlier steps can be
+    dependencies, so the result is always acyclic, and a step never changes
+    once it has been built.
+    """
+
+    def __init__(self):
+        self.steps: list[PlanStep] = []
+        self._barrier = -1  # index of the last step that researchers have to wait for
+
+    def add(self, raw_step: Any) -> Optional[PlanStep]:
+        """Build the next step, or return None if the object is not a usable step."""
+        if not isinstance(raw_step, dict) or not raw_step.get("agent_name"):
+            return None
+        index = len(self.steps)
+        agent_name = str(raw_step["agent_name"])
+        declared = raw_step.get("depends_on")
+        if isinstance(declared, list):
+            depends_on = frozenset(
+                dep for dep in declared if isinstance(dep, int) and 0 <= dep < index
+            )
+        elif agent_name == "researcher":
+            depends_on = frozenset(range(self._barrier + 1))
+        else:
+            depends_on = frozenset(range(index))
+        if agent_name != "researcher":
+            self._barrier = index
+        step = PlanStep(
+            index=index,
+            agent_name=agent_name,
+            title=str(raw_step.get("title", "")),
+            description=str(raw_step.get("description", "")),
+            note=str(raw_step.get("note") or ""),
+            depends_on=depends_on,
+        )
+        self.steps.append(step)
+        return step
+
+
+def parse_plan(full_plan: Optional[str]) -> list[PlanStep]:
+    """
+    Parse the planner output into steps with their dependencies.
+
+    Args:
+        full_plan: The JSON plan produced by the planner
+
+    Returns:
+        The steps in plan order, empty if the plan has no usable steps
+    """
+    if not full_plan:
+        return []
+    try:
+        plan = json_repair.loads(full_plan)
+    except Exception as e:
+        logger.warning(f"Could not parse plan for execution: {e}")
+        return []
+    raw_steps = plan.get("steps") if isinstance(plan, dict) else None
+    if not isinstance(raw_steps, list):
+        return []
+
+    builder = PlanStepBuilder()
+    for raw_step in raw_steps:
+        builder.add(raw_step)
+    return builder.steps
+
+
+class IncrementalPlanParser:
+    """Parses plan steps out of a streamed planner response.
+
+    Each step is returned as soon as its JSON object is closed, without
+    waiting for the rest of the plan. The steps are built exactly like
+    `parse_plan` builds them from the complete response.
+    """
+
+    _STEPS_KEY = re.compile(r'"steps"\s*:\s*\[')
+
+    def __init__(self):
+        self._builder = PlanStepBuilder()
+        self._buffer = ""
+        self._position = -1  # scan position inside the steps array, -1 before it
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start = 0
+        self._finished = False
+
+    @property
+    def steps(self) -> list[PlanStep]:
+        return self._builder.steps
+
+    def feed(self, chunk: str) -> list[PlanStep]:
+        """
+        Consume the next chunk of the response.
+
+        Args:
+            chunk: Text streamed by the planner
+
+        Returns:
+            The steps completed by this chunk
+        """
+        if self._finished or not chunk:
+            return []
+        self._buffer += chunk
+        if self._position < 0:
+            match = self._STEPS_KEY.search(self._buffer)
+            if match is None:
+                return []
+            self._position = match.end()
+
+        completed = []
+        buffer = self._buffer
+        while self._position < len(buffer):
+            char = buffer[self._position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._object_start = self._position
+                self._depth += 1
+            elif char == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    step = self._parse_step(
+                        buffer[self._object_start : self._position + 1]
+                    )
+                    if step is not None:
+                        completed.append(step)
+            elif char == "]" and self._depth == 0:
+                self._finished = True
+                break
+            self._position += 1
+        return completed
+
+    def _parse_step(self, text: str) -> Optional[PlanStep]:
+        try:
+            raw_step = json_repair.loads(text)
+        except Exception:
+            return None
+        return self._builder.add(raw_step)
+
+
+class PrelaunchedSteps:
+    """Plan steps started while the planner is still streaming the plan.
+
+    Stored in the workflow session, so the plan executor can pick up a step's
+    running task instead of starting it again. Tasks that are never picked up
+    are cancelled when the session closes.
+    """
+
+    def __init__(self):
+        self._tasks: dict[int, tuple[PlanStep, asyncio.Task]] = {}
+
+    def launch(self, step: PlanStep, coroutine: Coroutine) -> None:
+        """Start executing a step in the background."""
+        # Detach from the planner's run, otherwise the step's LLM output would
+        # be streamed to the client as planner output
+        context = contextvars.copy_context()
+        context.run(var_child_runnable_config.set, None)
+        task = asyncio.create_task(coroutine, context=context)
+        self._tasks[step.index] = (step, task)
+        logger.info(f"Started plan step {step.index} before the plan was complete")
+
+    def take(self, step: PlanStep) -> Optional[asyncio.Task]:
+        """Return the task started for exactly this step, if there is one."""
+        launched = self._tasks.get(step.index)
+        if launched is None or launched[0] != step:
+            return None
+        del self._tasks[step.index]
+        return launched[1]
+
+    async def close(self) -> None:
+        tasks, self._tasks = self._tasks, {}
+        for _, task in tasks.values():
+            task.cancel()
+        await asyncio.gather(
+            *(task for _, task in tasks.values()), return_exceptions=True
+        )
+
+
+def ready_steps(steps: Iterable[PlanStep], completed: Iterable[int]) -> list[PlanStep]:
+    """
+    Return the steps that can run now and may be executed in parallel.
+
+    Args:
+        steps: All steps of the plan
+        completed: Indexes of the steps that already have a result
+
+    Returns:
+        Pending steps of parallel agents whose dependencies are all completed
+    """
+    completed = set(completed)
+    return [
+        step
+        for step in steps
+        if step.index not in completed
+        and step.agent_name in PARALLEL_AGENTS
+        and step.depends_on <= completed
+    ]
+
+
+class PlanRoute(NamedTuple):
+    """A routing decision taken from the plan.
+
+    `step` is None when every step of the plan is completed.
+    """
+
+    step: Optional[PlanStep]
+    completed: list[int]
+
+
+def route_by_plan(
+    steps: list[PlanStep],
+    completed: Iterable[int],
+    current_step: Optional[int],
+    last_message: Any,
+) -> Optional[PlanRoute]:
+    """
+    Choose the next plan step without asking the LLM.
+
+    The step in progress counts as completed once the last message is a
+    successful reply from its agent. The next step is the first pending one
+    in plan order.
+
+    Args:
+        steps: All steps of the plan
+        completed: Indexes of the steps known to be completed
+        current_step: Index of the step the supervisor dispatched last
+        last_message: The newest message in the history
+
+    Returns:
+        The route, or None when the decision is ambiguous and needs the LLM
+    """
+    if not steps:
+        return None
+    completed = list(completed)
+    if current_step is not None and current_step not in completed:
+        if current_step >= len(steps):
+            return None
+        content = getattr(last_message, "content", None)
+        if (
+            getattr(last_message, "name", None) != steps[current_step].agent_name
+            or not isinstance(content, str)
+            or any(marker in content for marker in FAILURE_MARKERS)
+        ):
+            return None
+        completed.append(current_step)
+
+    done = set(completed)
+    for step in steps:
+        if step.index in done:
+            continue
+        if step.agent_name not in TEAM_MEMBERS or not step.depends_on <= done:
+            return None
+        return PlanRoute(step, completed)
+    return PlanRoute(None, completed)
+
+
+class RoutingStats(Counters):
+    """Counters of supervisor routing decisions."""
+
+    fields = ("local_decisions", "llm_decisions", "recovered_decisions")
+
+    def record(self, local: bool) -> None:
+        self.add(**{"local_decisions" if local else "llm_decisions": 1})
+
+    def record_recovery(self) -> None:
+        """Count an LLM decision recovered from an unparsable structured response."""
+        self.add(recovered_decisions=1)
+
+    def to_dict(self) -> dict:
+        counts = self.snapshot()
+        total = counts["local_decisions"] + counts["llm_decisions"]
+        return {**counts, "local_ratio": ratio(counts["local_decisions"], total)}
+
+
+routing_stats = RoutingStats()
@@ -1,4 +1,4 @@
-from typing import Literal, Optional
+from typing import Annotated, Literal, Optional
 from typing_extensions import TypedDict
 from langgraph.graph import MessagesState
 
@@ -15,6 +15,13 @@ class Router(TypedDict, total=False):
     browser_instruction: Optional[str]  # 可选的浏览器指令字段
 
 
+def merge_step_results(
+    left: Optional[dict[int, str]], right: Optional[dict[int, str]]
+) -> dict[int, str]:
+    """Merge the results of plan steps that finished in the same superstep."""
+    return {**(left or {}), **(right or {})}
+
+
 class State(MessagesState):
     """State for the agent system, extends MessagesState with next field."""
 
@@ -32,3 +39,10 @@ class State(MessagesState):
     needs_revision: bool = False  # 是否需要修订
     revision_processed: bool = False  # 修订是否已处理
     reflection_completed: bool = False  # 反思是否已完成
+    parallel_plan_execution: bool = False  # 是否并行执行计划中相互独立的步骤
+    plan_step_results: Annotated[
+        dict[int, str], merge_step_results
+    ]  # 计划步骤索引 -> 执行结果
+    merged_plan_steps: list[int]  # 结果已写入消息历史的步骤索引
+    current_plan_step: Optional[int]  # supervisor按计划派发的当前步骤
+    off_plan: bool  # supervisor偏离计划后不再按计划路由
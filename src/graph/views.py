@@ -0,0 +1,64 @@
+"""
+Copy-free views over the message history used to build LLM prompts.
+"""
+
+from collections.abc import Sequence
+from typing import Any, Optional
+
+from langchain_core.messages import BaseMessage
+
+from src.service.session import get_current_session
+
+
+def _formatted_messages() -> Optional[dict]:
+    # Formatted copies live as long as the workflow whose history they belong to
+    session = get_current_session()
+    if session is None or session.closed:
+        return None
+    return session.get_resource("formatted_messages", dict)
+
+
+class FormattedMessageView(Sequence):
+    """Read-only view that presents team members' messages in a response format.
+
+    The underlying messages are never copied or mutated. A message is
+    formatted the first time it is read and, within a workflow, the formatted
+    copy of a message with an id is reused on later turns, so preparing a
+    prompt no longer clones the whole history.
+
+    Args:
+        messages: The prompt messages, usually from `apply_prompt_template`
+        names: Message names whose content should be formatted
+        response_format: Format string receiving the name and the content
+    """
+
+    def __init__(self, messages: list, names: list[str], response_format: str):
+        self._messages = messages
+        self._names = frozenset(names)
+        self._response_format = response_format
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._format(message) for message in self._messages[index]]
+        return self._format(self._messages[index])
+
+    def _format(self, message: Any) -> Any:
+        if not isinstance(message, BaseMessage) or message.name not in self._names:
+            return message
+        memo = _formatted_messages() if message.id else None
+        key = (self._response_format, message.id)
+        cached = memo.get(key) if memo is not None else None
+        # Reuse the copy only if it was made from this exact content
+        if cached is not None and cached[0] is message.content:
+            return cached[1]
+        formatted = message.model_copy(
+            update={
+                "content": self._response_format.format(message.name, message.content)
+            }
+        )
+        if memo is not None:
+            memo[key] = (message.content, formatted)
+        return formatted
@@ -0,0 +1,284 @@
+"""
+Exact-match response cache for chat models.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import operator
+from functools import reduce
+from typing import Any, AsyncIterator, Iterator, Optional, Type, TypeVar
+
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_TTL,
+)
+from src.utils.cache import LRUCache, SQLiteCache, TieredCache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ResponseCache:
+    """Stores chat model responses as the list of messages or chunks they produced.
+
+    Args:
+        cache: The tiered cache backing the response cache
+    """
+
+    def __init__(self, cache: TieredCache):
+        self._cache = cache
+
+    def lookup(self, key: str) -> Optional[list[BaseMessage]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        try:
+            return messages_from_dict(entry)
+        except Exception as e:
+            logger.warning(f"Dropping unreadable LLM cache entry: {e}")
+            self._cache.delete(key)
+            return None
+
+    def update(self, key: str, messages: list[BaseMessage]) -> None:
+        if not messages:
+            return
+        self._cache.set(key, [message_to_dict(message) for message in messages])
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None when caching is disabled."""
+    global _response_cache
+    if _response_cache is None and LLM_CACHE_ENABLED:
+        disk = (
+            SQLiteCache(
+                LLM_CACHE_PATH, max_bytes=LLM_CACHE_MAX_BYTES, ttl=LLM_CACHE_TTL
+            )
+            if LLM_CACHE_PATH
+            else None
+        )
+        _response_cache = ResponseCache(
+            TieredCache(LRUCache(LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL), disk)
+        )
+    return _response_cache
+
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    """Replace the process-wide response cache, None disables caching."""
+    global _response_cache
+    _response_cache = cache
+
+
+def _normalize_message(message: BaseMessage) -> dict:
+    # Message and tool call ids are assigned per run, so they are left out
+    content = message.content
+    if isinstance(content, str):
+        content = content.strip()
+    normalized = {"type": message.type, "content": content}
+    if message.name:
+        normalized["name"] = message.name
+    if isinstance(message, AIMessage) and message.tool_calls:
+        normalized["tool_calls"] = [
+            {"name": call["name"], "args": call["args"]} for call in message.tool_calls
+        ]
+    return normalized
+
+
+def _merge_chunks(messages: list[BaseMessage]) -> BaseMessage:
+    if len(messages) == 1:
+        message = messages[0]
+    else:
+        message = reduce(operator.add, messages)
+    if isinstance(message, AIMessageChunk):
+        return message_chunk_to_message(message)
+    return message
+
+
+def _to_chunk(message: BaseMessage) -> AIMessageChunk:
+    if isinstance(message, AIMessageChunk):
+        return message
+    tool_call_chunks = [
+        {
+            "name": call["name"],
+            "args": json.dumps(call["args"]),
+            "id": call.get("id"),
+            "index": index,
+        }
+        for index, call in enumerate(getattr(message, "tool_calls", []) or [])
+    ]
+    return AIMessageChunk(
+        content=message.content,
+        additional_kwargs=message.additional_kwargs,
+        response_metadata=message.response_metadata,
+        tool_call_chunks=tool_call_chunks,
+    )
+
+
+def _is_cacheable(messages: list[BaseMessage]) -> bool:
+    message = _merge_chunks(messages)
+    return bool(message.content) or bool(getattr(message, "tool_calls", None))
+
+
+class ResponseCacheMixin:
+    """A mixin that answers chat model calls from the response cache.
+
+    Requests are keyed on the normalized message list plus the model and
+    sampling parameters, including bound arguments such as tools or the
+    response format. Streaming calls replay the cached chunks.
+    """
+
+    def _response_cache_key(
+        self, messages: list[BaseMessage], stop: Optional[list[str]], kwargs: dict
+    ) -> str:
+        payload = {
+            "messages": [_normalize_message(message) for message in messages],
+            "params": self._get_invocation_params(stop=stop, **kwargs),
+        }
+        serialized = json.dumps(
+            payload, sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        cache = get_response_cache()
+        if cache is None:
+            return super()._generate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+        key = self._response_cache_key(messages, stop, kwargs)
+        cached = cache.lookup(key)
+        if cached is not None:
+            return ChatResult(
+                generations=[ChatGeneration(message=_merge_chunks(cached))]
+            )
+        result = super()._generate(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        self._store_result(cache, key, result)
+        return result
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        cache = get_response_cache()
+        if cache is None:
+            return await super()._agenerate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+        key = self._response_cache_key(messages, stop, kwargs)
+        cached = await asyncio.to_thread(cache.lookup, key)
+        if cached is not None:
+            return ChatResult(
+                generations=[ChatGeneration(message=_merge_chunks(cached))]
+            )
+        result = await super()._agenerate(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        await asyncio.to_thread(self._store_result, cache, key, result)
+        return result
+
+    def _stream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> Iterator[ChatGenerationChunk]:
+        cache = get_response_cache()
+        if cache is None:
+            yield from super()._stream(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+            return
+        key = self._response_cache_key(messages, stop, kwargs)
+        cached = cache.lookup(key)
+        if cached is not None:
+            for message in cached:
+                chunk = ChatGenerationChunk(message=_to_chunk(message))
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        chunks = []
+        for chunk in super()._stream(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        ):
+            chunks.append(chunk.message)
+            yield chunk
+        if _is_cacheable(chunks):
+            cache.update(key, chunks)
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        cache = get_response_cache()
+        if cache is None:
+            async for chunk in super()._astream(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            ):
+                yield chunk
+            return
+        key = self._response_cache_key(messages, stop, kwargs)
+        cached = await asyncio.to_thread(cache.lookup, key)
+        if cached is not None:
+            for message in cached:
+                chunk = ChatGenerationChunk(message=_to_chunk(message))
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        chunks = []
+        async for chunk in super()._astream(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        ):
+            chunks.append(chunk.message)
+            yield chunk
+        if _is_cacheable(chunks):
+            await asyncio.to_thread(cache.update, key, chunks)
+
+    @staticmethod
+    def _store_result(cache: ResponseCache, key: str, result: ChatResult) -> None:
+        # Only single-generation results can be replayed faithfully
+        if len(result.generations) != 1:
+            return
+        message = result.generations[0].message
+        if _is_cacheable([message]):
+            cache.update(key, [message])
+
+
+def create_cached_chat_model(base_model_class: Type[T]) -> Type[T]:
+    """
+    Factory function to create a version of a chat model class backed by the response cache.
+
+    Args:
+        base_model_class: The original chat model class
+
+    Returns:
+        A new class that inherits from both ResponseCacheMixin and the base model class
+    """
+
+    class CachedChatModel(ResponseCacheMixin, base_model_class):
+        pass
+
+    CachedChatModel.__name__ = f"Cached{base_model_class.__name__}"
+    return CachedChatModel
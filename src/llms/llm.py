@@ -1,6 +1,7 @@
 from langchain_openai import ChatOpenAI, AzureChatOpenAI
 from langchain_deepseek import ChatDeepSeek
 from src.llms.litellm_v2 import ChatLiteLLMV2 as ChatLiteLLM
+from src.llms.cache import create_cached_chat_model
 from typing import Optional
 from litellm import LlmProviders
 
@@ -23,6 +24,12 @@ from src.config import (
 )
 from src.config.agents import LLMType
 
+# Chat model classes that answer repeated requests from the response cache
+CachedChatOpenAI = create_cached_chat_model(ChatOpenAI)
+CachedChatDeepSeek = create_cached_chat_model(ChatDeepSeek)
+CachedAzureChatOpenAI = create_cached_chat_model(AzureChatOpenAI)
+CachedChatLiteLLM = create_cached_chat_model(ChatLiteLLM)
+
 
 def create_openai_llm(
     model: str,
@@ -35,7 +42,13 @@ def create_openai_llm(
     Create a ChatOpenAI instance with the specified configuration
     """
     # Only include base_url in the arguments if it's not None or empty
-    llm_kwargs = {"model": model, "temperature": temperature, **kwargs}
+    # stream_usage reports token usage (including cached tokens) for streamed calls
+    llm_kwargs = {
+        "model": model,
+        "temperature": temperature,
+        "stream_usage": True,
+        **kwargs,
+    }
 
     if base_url:  # This will handle None or empty string
         llm_kwargs["base_url"] = base_url
@@ -43,7 +56,7 @@ def create_openai_llm(
     if api_key:  # This will handle None or empty string
         llm_kwargs["api_key"] = api_key
 
-    return ChatOpenAI(**llm_kwargs)
+    return CachedChatOpenAI(**llm_kwargs)
 
 
 def create_deepseek_llm(
@@ -65,7 +78,7 @@ def create_deepseek_llm(
     if api_key:  # This will handle None or empty string
         llm_kwargs["api_key"] = api_key
 
-    return ChatDeepSeek(**llm_kwargs)
+    return CachedChatDeepSeek(**llm_kwargs)
 
 
 def create_azure_llm(
@@ -78,7 +91,7 @@ def create_azure_llm(
     """
     create azure llm instance with specified configuration
     """
-    return AzureChatOpenAI(
+    return CachedAzureChatOpenAI(
         azure_deployment=azure_deployment,
         azure_endpoint=azure_endpoint,
         api_version=api_version,
@@ -106,7 +119,7 @@ def create_litellm_model(
     if api_key:  # This will handle None or empty string
         llm_kwargs["api_key"] = api_key
 
-    return ChatLiteLLM(**llm_kwargs)
+    return CachedChatLiteLLM(**llm_kwargs)
 
 
 # Cache for LLM instances
@@ -0,0 +1,154 @@
+"""
+Prompt cache usage reporting for chat model calls.
+"""
+
+import logging
+import time
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from src.utils.counters import Counters, ratio
+
+logger = logging.getLogger(__name__)
+
+
+class PromptCacheStats(Counters):
+    """Counters of input tokens served from provider prompt caches."""
+
+    fields = (
+        "calls",
+        "input_tokens",
+        "cached_input_tokens",
+        "ttft_total",
+        "ttft_count",
+    )
+
+    def record(
+        self,
+        input_tokens: int,
+        cached_input_tokens: int,
+        time_to_first_token: Optional[float] = None,
+    ) -> None:
+        timed = time_to_first_token is not None
+        self.add(
+            calls=1,
+            input_tokens=input_tokens,
+            cached_input_tokens=cached_input_tokens,
+            ttft_total=time_to_first_token if timed else 0.0,
+            ttft_count=1 if timed else 0,
+        )
+
+    def to_dict(self) -> dict:
+        counts = self.snapshot()
+        return {
+            "calls": counts["calls"],
+            "input_tokens": counts["input_tokens"],
+            "cached_input_tokens": counts["cached_input_tokens"],
+            "cache_hit_rate": ratio(
+                counts["cached_input_tokens"], counts["input_tokens"]
+            ),
+            "avg_time_to_first_token": (
+                counts["ttft_total"] / counts["ttft_count"]
+                if counts["ttft_count"]
+                else None
+            ),
+        }
+
+
+prompt_cache_stats = PromptCacheStats()
+
+
+def extract_prompt_cache_usage(response: LLMResult) -> tuple[int, int]:
+    """
+    Read input and cached input token counts from an LLM result.
+
+    Understands LangChain usage metadata as well as the raw usage payloads of
+    OpenAI (`prompt_tokens_details.cached_tokens`), DeepSeek
+    (`prompt_cache_hit_tokens`) and Anthropic (`cache_read_input_tokens`).
+
+    Args:
+        response: The result passed to `on_llm_end`
+
+    Returns:
+        A tuple of (input tokens, cached input tokens)
+    """
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                details = usage.get("input_token_details") or {}
+                return usage.get("input_tokens", 0), details.get("cache_read", 0) or 0
+            token_usage = (
+                getattr(message, "response_metadata", {}).get("token_usage")
+                if message is not None
+                else None
+            )
+            if token_usage:
+                return _parse_token_usage(token_usage)
+    token_usage = (response.llm_output or {}).get("token_usage")
+    if token_usage:
+        return _parse_token_usage(token_usage)
+    return 0, 0
+
+
+def _parse_token_usage(token_usage: Any) -> tuple[int, int]:
+    if not isinstance(token_usage, dict):
+        token_usage = getattr(token_usage, "__dict__", {})
+    input_tokens = (
+        token_usage.get("prompt_tokens") or token_usage.get("input_tokens") or 0
+    )
+    details = token_usage.get("prompt_tokens_details") or {}
+    if not isinstance(details, dict):
+        details = getattr(details, "__dict__", {})
+    cached = (
+        details.get("cached_tokens")
+        or token_usage.get("prompt_cache_hit_tokens")
+        or token_usage.get("cache_read_input_tokens")
+        or 0
+    )
+    return input_tokens, cached
+
+
+class PromptCacheUsageHandler(BaseCallbackHandler):
+    """Callback handler that records prompt cache hits and time to first token.
+
+    Every call is recorded on the handler's own stats and on the process-wide
+    `prompt_cache_stats`.
+    """
+
+    def __init__(self):
+        self.stats = PromptCacheStats()
+        self._started: dict[UUID, float] = {}
+        self._first_token: dict[UUID, float] = {}
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id: UUID, **kwargs
+    ) -> None:
+        self._started[run_id] = time.monotonic()
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs) -> None:
+        self._started[run_id] = time.monotonic()
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs) -> None:
+        if run_id in self._started and run_id not in self._first_token:
+            self._first_token[run_id] = time.monotonic()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs) -> None:
+        started = self._started.pop(run_id, None)
+        first_token = self._first_token.pop(run_id, None)
+        time_to_first_token = (
+            first_token - started if started is not None and first_token else None
+        )
+        input_tokens, cached_input_tokens = extract_prompt_cache_usage(response)
+        self.stats.record(input_tokens, cached_input_tokens, time_to_first_token)
+        prompt_cache_stats.record(
+            input_tokens, cached_input_tokens, time_to_first_token
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._started.pop(run_id, None)
+        self._first_token.pop(run_id, None)
@@ -0,0 +1,349 @@
+"""
+Per-agent views and rolling compaction of the message history sent to the LLMs.
+"""
+
+import logging
+from typing import Any, Optional
+
+from langchain_core.messages import BaseMessage
+
+from src.config.agents import AGENT_CONTEXT_BUDGET, AGENT_HISTORY_VIEW
+from src.utils.cache import LRUCache
+from src.utils.counters import Counters, ratio
+
+logger = logging.getLogger(__name__)
+
+# Most recent messages that are always sent verbatim
+KEEP_RECENT_MESSAGES = 4
+
+# Characters of an agent output kept in its compacted form
+SUMMARY_CHARS = 600
+
+# Outputs of other agents up to this size are shown in full in every view
+STUB_MIN_TOKENS = 120
+
+# Messages every view shows in full: the plan, handoff instructions and
+# reflection feedback asking for revisions
+HANDOFF_NAMES = frozenset({"planner", "plan_executor", "reflection"})
+
+# Token estimates, compacted copies and stubs, keyed by message id
+_token_counts = LRUCache(max_entries=8192)
+_compacted_messages = LRUCache(max_entries=4096)
+_stubbed_messages = LRUCache(max_entries=4096)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text without a tokenizer.
+
+    ASCII text averages about four characters per token, while CJK and other
+    non-ASCII characters usually take a token each.
+
+    Args:
+        text: The text to measure
+
+    Returns:
+        The estimated token count
+    """
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    return (len(text) - non_ascii) // 4 + non_ascii + 1
+
+
+def _content_text(message: Any) -> str:
+    content = (
+        message.get("content")
+        if isinstance(message, dict)
+        else getattr(message, "content", "")
+    )
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        )
+    return str(content or "")
+
+
+def count_message_tokens(message: Any) -> int:
+    """Estimate the tokens of a message, memoized per message id."""
+    if not isinstance(message, BaseMessage) or not message.id:
+        return estimate_tokens(_content_text(message))
+    # Compacted copies and stubs share the id of the original message
+    key = f"{message.id}:{id(message.content)}"
+    cached = _token_counts.get(key)
+    # Reuse the count only if it was made from this exact content
+    if cached is not None and cached[0] is message.content:
+        return cached[1]
+    tokens = estimate_tokens(_content_text(message))
+    _token_counts.set(key, (message.content, tokens))
+    return tokens
+
+
+def summarize_content(content: str, limit: int = SUMMARY_CHARS) -> str:
+    """
+    Build an extractive summary of an agent output.
+
+    Markdown headings are kept to preserve the outline, followed by the
+    opening lines of the body, up to `limit` characters.
+
+    Args:
+        content: The original output
+        limit: Maximum length of the summary
+
+    Returns:
+        The summary
+    """
+    lines = [line.strip() for line in content.splitlines() if line.strip()]
+    headings = [line for line in lines if line.startswith("#")]
+    body = [line for line in lines if not line.startswith("#")]
+    summary = ""
+    for line in [*headings, *body]:
+        if len(summary) + len(line) + 1 > limit:
+            remaining = limit - len(summary)
+            if remaining > 40:
+                summary += line[:remaining].rstrip() + "…"
+            break
+        summary += line + "\n"
+    return summary.strip()
+
+
+def _compact(message: BaseMessage, tokens: int) -> tuple[BaseMessage, int]:
+    key = message.id or str(id(message))
+    cached = _compacted_messages.get(key)
+    if cached is not None and cached[0] is message.content:
+        return cached[1], cached[2]
+    source = message.name or message.type
+    compacted = message.model_copy(
+        update={
+            "content": (
+                f"[Earlier output from {source}, compacted from about {tokens} tokens]\n"
+                f"{summarize_content(message.content)}"
+            )
+        }
+    )
+    compacted_tokens = estimate_tokens(compacted.content)
+    _compacted_messages.set(key, (message.content, compacted, compacted_tokens))
+    return compacted, compacted_tokens
+
+
+def _stub(message: BaseMessage, tokens: int) -> BaseMessage:
+    key = message.id or str(id(message))
+    cached = _stubbed_messages.get(key)
+    if cached is not None and cached[0] is message.content:
+        return cached[1]
+    first_line = next(
+        (line.strip() for line in message.content.splitlines() if line.strip()), ""
+    )
+    stub = message.model_copy(
+        update={
+            "content": (
+                f"[Output from {message.name} omitted, about {tokens} tokens] "
+                f"{first_line[:160]}"
+            )
+        }
+    )
+    _stubbed_messages.set(key, (message.content, stub))
+    return stub
+
+
+def apply_history_view(messages: list, visible_agents: Optional[list[str]]) -> list:
+    """
+    Filter the message history down to what an agent needs.
+
+    User turns, the plan, handoff instructions, reflection feedback and the
+    model and tool messages of the agent's own run are always shown. Outputs
+    of the agents in `visible_agents` are shown in full, large outputs of
+    every other agent are replaced by a one-line stub.
+
+    Args:
+        messages: The message history
+        visible_agents: Agents whose outputs are shown in full, None shows everything
+
+    Returns:
+        The filtered history, the same list when nothing was replaced
+    """
+    if visible_agents is None:
+        return messages
+    filtered = None
+    for index, message in enumerate(messages):
+        # Agent outputs are named human messages. Model turns and tool results,
+        # named after their tool by ToolNode, belong to the agent's own run.
+        if (
+            not isinstance(message, BaseMessage)
+            or message.type != "human"
+            or not isinstance(message.content, str)
+            or not message.name
+            or message.name in HANDOFF_NAMES
+            or message.name in visible_agents
+        ):
+            continue
+        tokens = count_message_tokens(message)
+        if tokens <= STUB_MIN_TOKENS:
+            continue
+        if filtered is None:
+            filtered = list(messages)
+        filtered[index] = _stub(message, tokens)
+    return messages if filtered is None else filtered
+
+
+def _is_compactable(message: Any) -> bool:
+    # User turns stay verbatim, only agent, model and tool outputs are compacted
+    if not isinstance(message, BaseMessage) or not isinstance(message.content, str):
+        return False
+    if message.type == "human" and not message.name:
+        return False
+    return message.name != "planner"
+
+
+def _saved_ratio(tokens_before: int, tokens_after: int) -> float:
+    return 1 - ratio(tokens_after, tokens_before) if tokens_before else 0.0
+
+
+class _AgentCompactionStats(Counters):
+    fields = ("prompts", "tokens_before", "tokens_after")
+
+
+class CompactionStats(Counters):
+    """Counters of history tokens before and after views and compaction, also per agent."""
+
+    fields = (
+        "prompts",
+        "compacted_prompts",
+        "compacted_messages",
+        "tokens_before",
+        "tokens_after",
+    )
+
+    def __init__(self):
+        super().__init__()
+        self._by_agent: dict[str, _AgentCompactionStats] = {}
+
+    def record(
+        self, agent: str, tokens_before: int, tokens_after: int, compacted_messages: int
+    ) -> None:
+        self.add(
+            prompts=1,
+            compacted_prompts=1 if compacted_messages else 0,
+            compacted_messages=compacted_messages,
+            tokens_before=tokens_before,
+            tokens_after=tokens_after,
+        )
+        with self._lock:
+            totals = self._by_agent.get(agent)
+            if totals is None:
+                totals = self._by_agent[agent] = _AgentCompactionStats()
+        totals.add(prompts=1, tokens_before=tokens_before, tokens_after=tokens_after)
+
+    def to_dict(self) -> dict:
+        counts = self.snapshot()
+        with self._lock:
+            by_agent = {
+                agent: totals.snapshot() for agent, totals in self._by_agent.items()
+            }
+        return {
+            "prompts": counts["prompts"],
+            "compacted_prompts": counts["compacted_prompts"],
+            "compacted_messages": counts["compacted_messages"],
+            "history_tokens_before": counts["tokens_before"],
+            "history_tokens_after": counts["tokens_after"],
+            "saved_ratio": _saved_ratio(
+                counts["tokens_before"], counts["tokens_after"]
+            ),
+            "by_agent": {
+                agent: {
+                    "prompts": totals["prompts"],
+                    "history_tokens_before": totals["tokens_before"],
+                    "history_tokens_after": totals["tokens_after"],
+                    "saved_ratio": _saved_ratio(
+                        totals["tokens_before"], totals["tokens_after"]
+                    ),
+                }
+                for agent, totals in by_agent.items()
+            },
+        }
+
+
+compaction_stats = CompactionStats()
+
+
+def compact_messages(messages: list, budget: Optional[int], agent: str = "") -> list:
+    """
+    Fit the message history into a token budget.
+
+    The first message (the original request), the plan and the most recent
+    messages are always kept verbatim. Older agent, model and tool outputs
+    are replaced by a short extractive summary, oldest first, until the
+    history fits the budget. Compacted copies are memoized so the history
+    stays byte-stable between turns. The stored history is never modified.
+
+    Args:
+        messages: The message history
+        budget: Token budget for the history, None disables compaction
+        agent: Name of the agent the prompt is for, used in logs
+
+    Returns:
+        The history to send, the same list when nothing had to be compacted
+    """
+    counts = [count_message_tokens(message) for message in messages]
+    tokens_before = sum(counts)
+    if budget is None or tokens_before <= budget:
+        return messages
+
+    compacted = list(messages)
+    tokens_after = tokens_before
+    compacted_count = 0
+    last_candidate = len(messages) - KEEP_RECENT_MESSAGES
+    for index in range(1, last_candidate):
+        if tokens_after <= budget:
+            break
+        message = messages[index]
+        if not _is_compactable(message):
+            continue
+        replacement, replacement_tokens = _compact(message, counts[index])
+        if replacement_tokens >= counts[index]:
+            continue
+        compacted[index] = replacement
+        tokens_after -= counts[index] - replacement_tokens
+        compacted_count += 1
+
+    logger.debug(
+        f"Compacted {compacted_count} messages for {agent}: "
+        f"{tokens_before} -> {tokens_after} tokens (budget {budget})"
+    )
+    if tokens_after > budget:
+        logger.warning(
+            f"History for {agent} is still over budget after compaction: "
+            f"{tokens_after} > {budget} tokens"
+        )
+    return compacted
+
+
+def prepare_history(messages: list, agent: str) -> list:
+    """
+    Build the history an agent's prompt is sent with.
+
+    Applies the agent's view from AGENT_HISTORY_VIEW, then compacts the result
+    to the agent's budget in AGENT_CONTEXT_BUDGET, and records the token
+    counts before and after.
+
+    Args:
+        messages: The message history
+        agent: Name of the prompt, usually the agent name
+
+    Returns:
+        The history to send
+    """
+    history = apply_history_view(messages, AGENT_HISTORY_VIEW.get(agent))
+    history = compact_messages(history, AGENT_CONTEXT_BUDGET.get(agent), agent)
+    if history is messages:
+        tokens = sum(count_message_tokens(message) for message in messages)
+        compaction_stats.record(agent, tokens, tokens, 0)
+        return history
+    compaction_stats.record(
+        agent,
+        sum(count_message_tokens(message) for message in messages),
+        sum(count_message_tokens(message) for message in history),
+        sum(1 for old, new in zip(messages, history) if old is not new),
+    )
+    return history
@@ -1,8 +1,22 @@
+import json
 import os
+import time
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from typing import Any, Optional
+from jinja2 import Environment, FileSystemLoader, Template, meta, select_autoescape
 from langgraph.prebuilt.chat_agent_executor import AgentState
 
+from src.config import PROMPT_TIME_MODE, PROMPT_TIME_GRANULARITY
+from src.utils.cache import LRUCache
+from .compaction import prepare_history
+
+TIME_FORMAT = "%a %b %d %Y %H:%M:%S %z"
+
+# Rendered in place of the time when it is sent in a trailing message instead
+TRAILING_TIME_PLACEHOLDER = (
+    "see the CURRENT_TIME message at the end of the conversation"
+)
+
 # Initialize Jinja2 environment
 env = Environment(
     loader=FileSystemLoader(os.path.dirname(__file__)),
@@ -12,6 +26,99 @@ env = Environment(
 )
 
 
+class CompiledPrompt:
+    """A precompiled prompt template and the state keys it reads."""
+
+    def __init__(self, name: str, template: Template, dependencies: frozenset[str]):
+        self.name = name
+        self.template = template
+        self.dependencies = dependencies
+
+
+def compile_prompt(prompt_name: str) -> CompiledPrompt:
+    """
+    Compile a prompt template and derive the variables it depends on.
+
+    The dependencies are read from the template source itself, so they can
+    never drift from what the template actually renders.
+
+    Args:
+        prompt_name: Name of the prompt template file (without .md extension)
+
+    Returns:
+        The compiled prompt
+    """
+    source, _, _ = env.loader.get_source(env, f"{prompt_name}.md")
+    dependencies = frozenset(meta.find_undeclared_variables(env.parse(source)))
+    return CompiledPrompt(
+        prompt_name, env.get_template(f"{prompt_name}.md"), dependencies
+    )
+
+
+def _compile_all_prompts() -> dict[str, CompiledPrompt]:
+    prompts = {}
+    for filename in sorted(os.listdir(os.path.dirname(__file__))):
+        if not filename.endswith(".md"):
+            continue
+        prompt_name = filename.removesuffix(".md")
+        try:
+            prompts[prompt_name] = compile_prompt(prompt_name)
+        except Exception as e:
+            raise ValueError(f"Invalid prompt template {prompt_name}: {e}")
+        if "messages" in prompts[prompt_name].dependencies:
+            # Rendering would depend on the whole history and defeat memoization
+            raise ValueError(
+                f"Invalid prompt template {prompt_name}: templates must not read messages"
+            )
+    return prompts
+
+
+# Precompile and validate every prompt at startup
+_compiled_prompts = _compile_all_prompts()
+
+# Rendered system prompts memoized on the values of their dependencies
+_rendered_prompts = LRUCache(max_entries=256)
+
+
+def get_compiled_prompt(prompt_name: str) -> CompiledPrompt:
+    """Return the compiled prompt, compiling templates added after startup on demand."""
+    compiled = _compiled_prompts.get(prompt_name)
+    if compiled is None:
+        compiled = compile_prompt(prompt_name)
+        _compiled_prompts[prompt_name] = compiled
+    return compiled
+
+
+def get_prompt_dependencies(prompt_name: str) -> frozenset[str]:
+    """Return the state keys a prompt template reads."""
+    return get_compiled_prompt(prompt_name).dependencies
+
+
+def _freeze(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def render_prompt(prompt_name: str, variables: dict) -> str:
+    """
+    Render a prompt, reusing the previous result when its dependencies are unchanged.
+
+    Args:
+        prompt_name: Name of the prompt template to render
+        variables: Template variables, only the template's dependencies are read
+
+    Returns:
+        The rendered prompt
+    """
+    compiled = get_compiled_prompt(prompt_name)
+    values = {key: variables[key] for key in compiled.dependencies if key in variables}
+    cache_key = f"{prompt_name}:{_freeze(values)}"
+    rendered = _rendered_prompts.get(cache_key)
+    if rendered is None:
+        rendered = compiled.template.render(**values)
+        _rendered_prompts.set(cache_key, rendered)
+    return rendered
+
+
 def get_prompt_template(prompt_name: str) -> str:
     """
     Load and return a prompt template using Jinja2.
@@ -23,16 +130,44 @@ def get_prompt_template(prompt_name: str) -> str:
         The template string with proper variable substitution syntax
     """
     try:
-        template = env.get_template(f"{prompt_name}.md")
-        return template.render()
+        return render_prompt(prompt_name, {})
     except Exception as e:
         raise ValueError(f"Error loading template {prompt_name}: {e}")
 
 
+def get_current_time(granularity: Optional[int] = None) -> str:
+    """
+    Format the current time, rounded down to a number of seconds.
+
+    Rounding keeps the rendered system prompt byte-stable within each window,
+    so provider-side prompt prefix caches keep hitting.
+
+    Args:
+        granularity: Rounding window in seconds, 1 or less keeps the exact time
+
+    Returns:
+        The formatted time
+    """
+    now = time.time()
+    if granularity and granularity > 1:
+        now -= now % granularity
+    return datetime.fromtimestamp(now).strftime(TIME_FORMAT)
+
+
 def apply_prompt_template(prompt_name: str, state: AgentState) -> list:
     """
     Apply template variables to a prompt template and return formatted messages.
 
+    How CURRENT_TIME is rendered depends on PROMPT_TIME_MODE: "inline" stamps
+    the exact time into the system prompt, "coarse" rounds it to
+    PROMPT_TIME_GRANULARITY seconds, and "trailing" appends it as a last user
+    message so the leading system prompt never changes. The trailing message
+    is a user message because some providers reject system messages after
+    tool messages.
+
+    The history is filtered by the agent's view in AGENT_HISTORY_VIEW and
+    compacted to its budget in AGENT_CONTEXT_BUDGET.
+
     Args:
         prompt_name: Name of the prompt template to use
         state: Current agent state containing variables to substitute
@@ -40,15 +175,28 @@ def apply_prompt_template(prompt_name: str, state: AgentState) -> list:
     Returns:
         List of messages with the system prompt as the first message
     """
+    trailing_time = None
+    if PROMPT_TIME_MODE == "trailing":
+        trailing_time = get_current_time()
+        current_time = TRAILING_TIME_PLACEHOLDER
+    elif PROMPT_TIME_MODE == "coarse":
+        current_time = get_current_time(PROMPT_TIME_GRANULARITY)
+    else:
+        current_time = get_current_time()
+
     # Convert state to dict for template rendering
     state_vars = {
-        "CURRENT_TIME": datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"),
+        "CURRENT_TIME": current_time,
         **state,
     }
 
     try:
-        template = env.get_template(f"{prompt_name}.md")
-        system_prompt = template.render(**state_vars)
-        return [{"role": "system", "content": system_prompt}] + state["messages"]
+        system_prompt = render_prompt(prompt_name, state_vars)
+        history = prepare_history(state["messages"], prompt_name)
+        messages = [{"role": "system", "content": system_prompt}] + history
     except Exception as e:
         raise ValueError(f"Error applying template {prompt_name}: {e}")
+
+    if trailing_time:
+        messages.append({"role": "user", "content": f"CURRENT_TIME: {trailing_time}"})
+    return messages
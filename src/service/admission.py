@@ -0,0 +1,158 @@
+"""
+Admission control for workflow runs.
+
+Limits how many workflows run at once in a process and keeps a bounded FIFO
+queue for the requests waiting for a slot.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when both the running slots and the wait queue are full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many workflows are running, please retry later")
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A request's place in the admission queue."""
+
+    def __init__(self):
+        self.admitted = False
+        self.released = False
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def wait_time(self) -> float:
+        """Seconds spent waiting for a slot so far."""
+        end = self.admitted_at if self.admitted_at is not None else time.monotonic()
+        return end - self.enqueued_at
+
+
+class AdmissionController:
+    """Grants a bounded number of workflow slots in FIFO order.
+
+    Args:
+        max_concurrent: Maximum number of workflows running at the same time
+        max_queued: Maximum number of requests waiting for a slot
+        retry_after: Seconds a rejected client is told to wait before retrying
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int, retry_after: int = 5):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.max_queued = max(0, max_queued)
+        self.retry_after = retry_after
+        self._in_flight = 0
+        self._queue: deque[AdmissionTicket] = deque()
+        self._admitted_total = 0
+        self._rejected_total = 0
+        self._completed_total = 0
+        self._abandoned_total = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def reserve(self) -> AdmissionTicket:
+        """Reserve a slot or a place in the queue.
+
+        Raises:
+            QueueFullError: If no slot is free and the queue is full
+        """
+        ticket = AdmissionTicket()
+        if self._in_flight < self.max_concurrent and not self._queue:
+            self._admit(ticket)
+        elif len(self._queue) < self.max_queued:
+            self._queue.append(ticket)
+            logger.info(f"Workflow queued at position {len(self._queue)}")
+        else:
+            self._rejected_total += 1
+            logger.warning("Workflow rejected, admission queue is full")
+            raise QueueFullError(self.retry_after)
+        return ticket
+
+    def position(self, ticket: AdmissionTicket) -> int:
+        """Return the 1-based queue position of a ticket, 0 once it is admitted."""
+        if ticket.admitted:
+            return 0
+        try:
+            return self._queue.index(ticket) + 1
+        except ValueError:
+            return 0
+
+    async def wait_for_slot(self, ticket: AdmissionTicket) -> AsyncIterator[int]:
+        """Wait until the ticket is admitted, yielding its queue position on every move."""
+        while not ticket.admitted:
+            ticket._changed.clear()
+            yield self.position(ticket)
+            if not ticket.admitted:
+                await ticket._changed.wait()
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """Give back the slot or queue place held by a ticket."""
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.admitted:
+            self._in_flight -= 1
+            self._completed_total += 1
+        else:
+            try:
+                self._queue.remove(ticket)
+            except ValueError:
+                pass
+            self._abandoned_total += 1
+        self._admit_waiting()
+
+    def _admit(self, ticket: AdmissionTicket) -> None:
+        ticket.admitted = True
+        ticket.admitted_at = time.monotonic()
+        self._in_flight += 1
+        self._admitted_total += 1
+        self._wait_time_total += ticket.wait_time
+        self._wait_time_max = max(self._wait_time_max, ticket.wait_time)
+        ticket._changed.set()
+
+    def _admit_waiting(self) -> None:
+        while self._queue and self._in_flight < self.max_concurrent:
+            self._admit(self._queue.popleft())
+        # Wake the remaining waiters so they can report their new position
+        for waiting in self._queue:
+            waiting._changed.set()
+
+    def stats(self) -> dict:
+        """Return counters used to size workers."""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._queue),
+            "admitted_total": self._admitted_total,
+            "rejected_total": self._rejected_total,
+            "completed_total": self._completed_total,
+            "abandoned_total": self._abandoned_total,
+            "avg_wait_seconds": (
+                self._wait_time_total / self._admitted_total
+                if self._admitted_total
+                else 0.0
+            ),
+            "max_wait_seconds": self._wait_time_max,
+        }
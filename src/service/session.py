@@ -0,0 +1,126 @@
+"""
+Per-workflow session state for the agent workflow service.
+"""
+
+import contextvars
+import inspect
+import logging
+import uuid
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Number of coordinator chunks buffered before deciding whether it is a handoff
+MAX_CACHE_SIZE = 3
+
+_current_session: contextvars.ContextVar[Optional["WorkflowSession"]] = (
+    contextvars.ContextVar("current_workflow_session", default=None)
+)
+
+
+def get_current_session() -> Optional["WorkflowSession"]:
+    """Return the workflow session bound to the running context, if any."""
+    return _current_session.get()
+
+
+class WorkflowSession:
+    """State owned by a single run of the agent workflow.
+
+    Every call to `run_agent_workflow` gets its own session, so concurrent
+    workflows never share coordinator buffers or browser handles. Tools reach
+    the session of the workflow they run in through `get_current_session()`,
+    which relies on the context being copied into graph tasks and executor
+    threads.
+    """
+
+    def __init__(self, workflow_id: Optional[str] = None):
+        self.workflow_id = workflow_id or str(uuid.uuid4())
+        self.coordinator_cache: list[str] = []
+        self.is_handoff_case = False
+        self.closed = False
+        self._resources: dict[str, Any] = {}
+        self._token: Optional[contextvars.Token] = None
+
+    def activate(self) -> "WorkflowSession":
+        """Bind this session to the current context."""
+        self._token = _current_session.set(self)
+        return self
+
+    def deactivate(self) -> None:
+        """Unbind this session from the current context."""
+        if self._token is None:
+            return
+        try:
+            _current_session.reset(self._token)
+        except ValueError:
+            # The token belongs to another context (e.g. the generator was
+            # finalized from a different task), clearing is enough there.
+            _current_session.set(None)
+        self._token = None
+
+    def buffer_coordinator_content(self, content: str) -> Optional[str]:
+        """Buffer the first coordinator chunks to detect a handoff.
+
+        Args:
+            content: The streamed chunk emitted by the coordinator
+
+        Returns:
+            The content to forward to the client, or None if it must be held back
+        """
+        if len(self.coordinator_cache) < MAX_CACHE_SIZE:
+            self.coordinator_cache.append(content)
+            cached_content = "".join(self.coordinator_cache)
+            if cached_content.startswith("handoff"):
+                self.is_handoff_case = True
+                return None
+            if len(self.coordinator_cache) < MAX_CACHE_SIZE:
+                return None
+            return cached_content
+        if self.is_handoff_case:
+            return None
+        return content
+
+    def get_resource(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Return the session resource stored under `key`, creating it on first use.
+
+        Resources that expose a `close()` method (sync or async) are closed
+        together with the session.
+        """
+        if key not in self._resources:
+            if self.closed:
+                raise RuntimeError(f"Workflow session {self.workflow_id} is closed")
+            self._resources[key] = factory()
+        return self._resources[key]
+
+    def find_resource(self, key: str) -> Optional[Any]:
+        """Return the session resource stored under `key`, or None if there is none."""
+        return self._resources.get(key)
+
+    def add_resource(self, key: str, resource: Any) -> Any:
+        """Register a resource to be closed together with the session."""
+        self._resources[key] = resource
+        return resource
+
+    async def aclose(self) -> None:
+        """Close every resource owned by the session."""
+        self.closed = True
+        resources, self._resources = self._resources, {}
+        for key, resource in resources.items():
+            close = getattr(resource, "close", None)
+            if close is None:
+                continue
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error closing session resource {key}: {str(e)}")
+
+    async def __aenter__(self) -> "WorkflowSession":
+        return self.activate()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            await self.aclose()
+        finally:
+            self.deactivate()
@@ -1,12 +1,11 @@
 import logging
-from typing import Optional
 import asyncio
 
 from src.config import TEAM_MEMBERS
 from src.graph import build_graph
-from src.tools.browser import browser_tool
 from langchain_community.adapters.openai import convert_message_to_dict
-import uuid
+from src.llms.usage import PromptCacheUsageHandler
+from src.service.session import WorkflowSession
 from src.utils.log_handler import setup_logging, enable_debug_logging
 
 # 创建日志记录器
@@ -15,19 +14,13 @@ logger = logging.getLogger(__name__)
 # Create the graph
 graph = build_graph()
 
-# Cache for coordinator messages
-coordinator_cache = []
-MAX_CACHE_SIZE = 3
-
-# Global variable to track current browser tool instance
-current_browser_tool: Optional[browser_tool] = None
-
 
 async def run_agent_workflow(
     user_input_messages: list,
     debug: bool = False,
     deep_thinking_mode: bool = False,
     search_before_planning: bool = False,
+    parallel_plan_execution: bool = False,
 ):
     """Runs the agent workflow with the provided input messages.
 
@@ -36,6 +29,7 @@ async def run_agent_workflow(
         debug: If True, enables debug level logging
         deep_thinking_mode: If True, uses more powerful reasoning capabilities
         search_before_planning: If True, performs a search before planning
+        parallel_plan_execution: If True, runs independent plan steps in parallel
 
     Returns:
         The final state after the workflow completes
@@ -52,16 +46,14 @@ async def run_agent_workflow(
 
     logger.info(f"Starting workflow with user input: {user_input_messages}")
 
-    workflow_id = str(uuid.uuid4())
+    # Each workflow owns its buffers and browser, so concurrent runs never interfere
+    session = WorkflowSession().activate()
+    workflow_id = session.workflow_id
 
     streaming_llm_agents = [*TEAM_MEMBERS, "planner", "coordinator"]
 
-    # Reset coordinator cache at the start of each workflow
-    global coordinator_cache, current_browser_tool
-    coordinator_cache = []
-    current_browser_tool = browser_tool
-    global is_handoff_case
-    is_handoff_case = False
+    # Collects provider prompt cache hits for every LLM call of this workflow
+    usage_handler = PromptCacheUsageHandler()
 
     try:
         async for event in graph.astream_events(
@@ -72,7 +64,9 @@ async def run_agent_workflow(
                 "messages": user_input_messages,
                 "deep_thinking_mode": deep_thinking_mode,
                 "search_before_planning": search_before_planning,
+                "parallel_plan_execution": parallel_plan_execution,
             },
+            config={"callbacks": [usage_handler]},
             version="v2",
         ):
             kind = event.get("event")
@@ -90,6 +84,11 @@ async def run_agent_workflow(
                 else str(metadata["langgraph_step"])
             )
             run_id = "" if (event.get("run_id") is None) else str(event["run_id"])
+            agent_id = f"{workflow_id}_{name}_{langgraph_step}"
+            langgraph_path = metadata.get("langgraph_path") or ()
+            if langgraph_path and langgraph_path[0] == "__pregel_push":
+                # Plan steps running in parallel share a step, tell them apart
+                agent_id = f"{agent_id}_{langgraph_path[1]}"
 
             if kind == "on_chain_start" and name in streaming_llm_agents:
                 if name == "planner":
@@ -104,7 +103,7 @@ async def run_agent_workflow(
                     "event": "start_of_agent",
                     "data": {
                         "agent_name": name,
-                        "agent_id": f"{workflow_id}_{name}_{langgraph_step}",
+                        "agent_id": agent_id,
                     },
                 }
             elif kind == "on_chain_end" and name in streaming_llm_agents:
@@ -112,7 +111,7 @@ async def run_agent_workflow(
                     "event": "end_of_agent",
                     "data": {
                         "agent_name": name,
-                        "agent_id": f"{workflow_id}_{name}_{langgraph_step}",
+                        "agent_id": agent_id,
                     },
                 }
             elif kind == "on_chat_model_start" and node in streaming_llm_agents:
@@ -145,40 +144,19 @@ async def run_agent_workflow(
                 else:
                     # Check if the message is from the coordinator
                     if node == "coordinator":
-                        if len(coordinator_cache) < MAX_CACHE_SIZE:
-                            coordinator_cache.append(content)
-                            cached_content = "".join(coordinator_cache)
-                            if cached_content.startswith("handoff"):
-                                is_handoff_case = True
-                                continue
-                            if len(coordinator_cache) < MAX_CACHE_SIZE:
-                                continue
-                            # Send the cached message
-                            ydata = {
-                                "event": "message",
-                                "data": {
-                                    "message_id": data["chunk"].id,
-                                    "delta": {"content": cached_content},
-                                },
-                            }
-                        elif not is_handoff_case:
-                            # For other agents, send the message directly
-                            ydata = {
-                                "event": "message",
-                                "data": {
-                                    "message_id": data["chunk"].id,
-                                    "delta": {"content": content},
-                                },
-                            }
-                    else:
-                        # For other agents, send the message directly
-                        ydata = {
-                            "event": "message",
-                            "data": {
-                                "message_id": data["chunk"].id,
-                                "delta": {"content": content},
-                            },
-                        }
+                        content = session.buffer_coordinator_content(content)
+                        if content is None:
+                            continue
+                    ydata = {
+                        "event": "message",
+                        "data": {
+                            "message_id": data["chunk"].id,
+                            "delta": {"content": content},
+                        },
+                    }
+            elif kind == "on_custom_event" and name == "plan_step":
+                # A plan step was parsed while the planner is still streaming
+                ydata = {"event": "plan_step", "data": data}
             elif kind == "on_tool_start" and node in TEAM_MEMBERS:
                 ydata = {
                     "event": "tool_call",
@@ -203,16 +181,20 @@ async def run_agent_workflow(
                 continue
             yield ydata
     except asyncio.CancelledError:
-        logger.info("Workflow cancelled, terminating browser agent if exists")
-        if current_browser_tool:
-            await current_browser_tool.terminate()
+        logger.info(f"Workflow {workflow_id} cancelled, closing its session resources")
         raise
     finally:
-        if current_browser_tool:
-            await current_browser_tool.terminate()
-        current_browser_tool = None
-
-    if is_handoff_case:
+        tool_results = session.find_resource("tool_results")
+        if tool_results is not None:
+            logger.info(f"Tool result reuse: {tool_results.stats.to_dict()}")
+        dedup_stats = session.find_resource("dedup_stats")
+        if dedup_stats is not None:
+            logger.info(f"Near-duplicate content: {dedup_stats.to_dict()}")
+        await session.aclose()
+        session.deactivate()
+        logger.info(f"Prompt cache usage: {usage_handler.stats.to_dict()}")
+
+    if session.is_handoff_case:
         # TODO: remove messages attributes after Frontend being compatible with final_session_state event.
         yield {
             "event": "end_of_workflow",
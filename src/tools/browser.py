@@ -7,6 +7,7 @@ from langchain.tools import BaseTool
 from browser_use import AgentHistoryList, Browser, BrowserConfig
 from browser_use import Agent as BrowserAgent
 from src.llms.llm import vl_llm
+from src.service.session import get_current_session
 from src.tools.decorators import create_logged_tool
 from src.config import (
     CHROME_INSTANCE_PATH,
@@ -53,6 +54,31 @@ class BrowserTool(BaseTool):
 
     _agent: Optional[BrowserAgent] = None
 
+    def _create_agent(self, instruction: str, generated_gif_path: str) -> BrowserAgent:
+        """Create a browser agent bound to the current workflow session.
+
+        Inside a workflow every session owns its own browser, so terminating
+        one workflow never closes the browser another workflow is using.
+        """
+        session = get_current_session()
+        if session is None:
+            self._agent = BrowserAgent(
+                task=instruction,
+                llm=vl_llm,
+                browser=expected_browser,
+                generate_gif=generated_gif_path,
+            )
+            return self._agent
+        browser = session.get_resource(
+            "browser", lambda: Browser(config=browser_config)
+        )
+        return BrowserAgent(
+            task=instruction,
+            llm=vl_llm,
+            browser=browser,
+            generate_gif=generated_gif_path,
+        )
+
     def _generate_browser_result(
         self, result_content: str, generated_gif_path: str
     ) -> dict:
@@ -72,18 +98,13 @@ class BrowserTool(BaseTool):
         # 记录开始执行浏览器任务
         logger.info(f"开始执行浏览器任务: {instruction}")
         
-        self._agent = BrowserAgent(
-            task=instruction,  # Will be set per request
-            llm=vl_llm,
-            browser=expected_browser,
-            generate_gif=generated_gif_path,
-        )
+        agent = self._create_agent(instruction, generated_gif_path)
 
         try:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
-                result = loop.run_until_complete(self._agent.run())
+                result = loop.run_until_complete(agent.run())
 
                 # 检查结果并生成有效的响应
                 if isinstance(result, AgentHistoryList):
@@ -131,14 +152,9 @@ class BrowserTool(BaseTool):
         # 记录开始执行浏览器任务
         logger.info(f"开始异步执行浏览器任务: {instruction}")
         
-        self._agent = BrowserAgent(
-            task=instruction,
-            llm=vl_llm,
-            browser=expected_browser,
-            generate_gif=generated_gif_path,  # Will be set per request
-        )
+        agent = self._create_agent(instruction, generated_gif_path)
         try:
-            result = await self._agent.run()
+            result = await agent.run()
             
             # 检查结果并生成有效的响应
             if isinstance(result, AgentHistoryList):
@@ -168,7 +184,9 @@ class BrowserTool(BaseTool):
                 self._generate_browser_result(error_message, generated_gif_path)
             )
         finally:
-            await self.terminate()
+            # Session browsers are closed together with their workflow session
+            if get_current_session() is None:
+                await self.terminate()
 
 
 BrowserTool = create_logged_tool(BrowserTool)
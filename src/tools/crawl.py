@@ -1,26 +1,190 @@
 import logging
-from typing import Annotated
+from typing import Annotated, Any, Optional, Union
 
 from langchain_core.messages import HumanMessage
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from .decorators import log_io
+from .dedup import duplicate_note, get_dedup_index
+from .result_store import ToolResultStore, get_tool_result_store, normalize_url
 
+from src.config import CRAWL_MANY_MAX_URLS
 from src.crawler import Crawler
+from src.prompts.compaction import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+# The crawler is stateless and its HTTP connections are pooled process-wide
+crawler = Crawler()
+
+
+def _stored_crawl(
+    url: str, query: Optional[str] = None
+) -> tuple[Optional[ToolResultStore], str, Optional[Any]]:
+    # Pages already crawled in this workflow are not fetched again
+    store = get_tool_result_store()
+    arguments = [normalize_url(url), query] if query else normalize_url(url)
+    key = ToolResultStore.key("crawl_tool", arguments)
+    if store is None:
+        return None, key, None
+    stored = store.get(key)
+    if stored is not None:
+        logger.info(f"Reusing crawled content of {url} in this workflow")
+    return store, key, stored
+
+
+def _crawl_result(
+    store: Optional[ToolResultStore], key: str, article, query: Optional[str] = None
+) -> dict:
+    result = {"role": "user", "content": article.to_message(query=query)}
+    if store is not None:
+        store.set(key, result)
+    return result
+
+
+def _deduped(url: str, result: dict) -> dict:
+    # Mirrors and syndicated copies of a page the agent already read are not
+    # repeated. The stored result stays whole for agents that did not read it.
+    index = get_dedup_index()
+    if index is None:
+        return result
+    text = "\n\n".join(
+        block["text"] for block in result["content"] if block["type"] == "text"
+    )
+    reference = index.check(url, text, estimate_tokens(duplicate_note(url, url)))
+    if reference is None:
+        return result
+    return {
+        **result,
+        "content": [{"type": "text", "text": duplicate_note(url, reference)}],
+    }
+
 
-@tool
 @log_io
-def crawl_tool(
+def crawl(
     url: Annotated[str, "The url to crawl."],
+    query: Annotated[
+        Optional[str],
+        "What you are looking for on the page. Long pages are then cut down to their most relevant sections.",
+    ] = None,
 ) -> HumanMessage:
     """Use this to crawl a url and get a readable content in markdown format."""
+    store, key, stored = _stored_crawl(url, query)
+    if stored is not None:
+        return _deduped(url, stored)
     try:
-        crawler = Crawler()
         article = crawler.crawl(url)
-        return {"role": "user", "content": article.to_message()}
+        return _deduped(url, _crawl_result(store, key, article, query))
     except BaseException as e:
         error_msg = f"Failed to crawl. Error: {repr(e)}"
         logger.error(error_msg)
         return error_msg
+
+
+@log_io
+async def acrawl(
+    url: Annotated[str, "The url to crawl."],
+    query: Annotated[
+        Optional[str],
+        "What you are looking for on the page. Long pages are then cut down to their most relevant sections.",
+    ] = None,
+) -> HumanMessage:
+    """Use this to crawl a url and get a readable content in markdown format."""
+    store, key, stored = _stored_crawl(url, query)
+    if stored is not None:
+        return _deduped(url, stored)
+    try:
+        article = await crawler.acrawl(url)
+        return _deduped(url, _crawl_result(store, key, article, query))
+    except Exception as e:
+        error_msg = f"Failed to crawl. Error: {repr(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+
+# Agents invoked with `ainvoke` crawl on the event loop, sync callers block
+crawl_tool = StructuredTool.from_function(
+    func=crawl,
+    coroutine=acrawl,
+    name="crawl_tool",
+)
+
+
+def _plan_batch(urls: list[str], query: Optional[str]) -> tuple[list[tuple], list[str]]:
+    # One entry per distinct page, pages stored in this workflow are not fetched again
+    pages: dict[str, str] = {}
+    for url in urls:
+        pages.setdefault(normalize_url(url), url)
+    distinct = list(pages.values())
+    entries = [
+        (url, *_stored_crawl(url, query)) for url in distinct[:CRAWL_MANY_MAX_URLS]
+    ]
+    return entries, distinct[CRAWL_MANY_MAX_URLS:]
+
+
+def _batch_result(
+    entries: list[tuple],
+    outcomes: dict[str, Union[Any, Exception]],
+    skipped: list[str],
+    query: Optional[str],
+) -> dict:
+    content = []
+    for url, store, key, stored in entries:
+        outcome = stored if stored is not None else outcomes[url]
+        try:
+            if isinstance(outcome, Exception):
+                raise outcome
+            if stored is None:
+                outcome = _crawl_result(store, key, outcome, query)
+        except Exception as e:
+            error_msg = f"Failed to crawl {url}. Error: {repr(e)}"
+            logger.error(error_msg)
+            content.append({"type": "text", "text": error_msg})
+            continue
+        content.append({"type": "text", "text": f"# Crawled content of {url}"})
+        content.extend(_deduped(url, outcome)["content"])
+    if skipped:
+        content.append(
+            {
+                "type": "text",
+                "text": f"Not crawled, at most {CRAWL_MANY_MAX_URLS} urls per call: {', '.join(skipped)}",
+            }
+        )
+    return {"role": "user", "content": content}
+
+
+@log_io
+def crawl_many(
+    urls: Annotated[list[str], "The urls to crawl."],
+    query: Annotated[
+        Optional[str],
+        "What you are looking for on the pages. Long pages are then cut down to their most relevant sections.",
+    ] = None,
+) -> HumanMessage:
+    """Use this to crawl several urls at once and get their readable content in markdown format. Prefer it over calling crawl_tool once per url."""
+    entries, skipped = _plan_batch(urls, query)
+    pending = [entry[0] for entry in entries if entry[3] is None]
+    outcomes = dict(zip(pending, crawler.crawl_many(pending)))
+    return _batch_result(entries, outcomes, skipped, query)
+
+
+@log_io
+async def acrawl_many(
+    urls: Annotated[list[str], "The urls to crawl."],
+    query: Annotated[
+        Optional[str],
+        "What you are looking for on the pages. Long pages are then cut down to their most relevant sections.",
+    ] = None,
+) -> HumanMessage:
+    """Use this to crawl several urls at once and get their readable content in markdown format. Prefer it over calling crawl_tool once per url."""
+    entries, skipped = _plan_batch(urls, query)
+    pending = [entry[0] for entry in entries if entry[3] is None]
+    outcomes = dict(zip(pending, await crawler.acrawl_many(pending)))
+    return _batch_result(entries, outcomes, skipped, query)
+
+
+# Pages are fetched concurrently, at most CRAWL_PER_HOST_CONCURRENCY per host
+crawl_many_tool = StructuredTool.from_function(
+    func=crawl_many,
+    coroutine=acrawl_many,
+    name="crawl_many_tool",
+)
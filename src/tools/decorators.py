@@ -1,5 +1,6 @@
 import logging
 import functools
+import inspect
 from typing import Any, Callable, Type, TypeVar
 
 logger = logging.getLogger(__name__)
@@ -18,20 +19,33 @@ def log_io(func: Callable) -> Callable:
         The wrapped function with input/output logging
     """
 
-    @functools.wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
-        # Log input parameters
-        func_name = func.__name__
+    def log_input(args: tuple, kwargs: dict) -> None:
         params = ", ".join(
             [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
         )
-        logger.debug(f"Tool {func_name} called with parameters: {params}")
+        logger.debug(f"Tool {func.__name__} called with parameters: {params}")
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            log_input(args, kwargs)
+            result = await func(*args, **kwargs)
+            logger.debug(f"Tool {func.__name__} returned: {result}")
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        # Log input parameters
+        log_input(args, kwargs)
 
         # Execute the function
         result = func(*args, **kwargs)
 
         # Log the output
-        logger.debug(f"Tool {func_name} returned: {result}")
+        logger.debug(f"Tool {func.__name__} returned: {result}")
 
         return result
 
@@ -58,6 +72,15 @@ class LoggedToolMixin:
         )
         return result
 
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        """Override _arun method to add logging."""
+        self._log_operation("_arun", *args, **kwargs)
+        result = await super()._arun(*args, **kwargs)
+        logger.debug(
+            f"Tool {self.__class__.__name__.replace('Logged', '')} returned: {result}"
+        )
+        return result
+
 
 def create_logged_tool(base_tool_class: Type[T]) -> Type[T]:
     """
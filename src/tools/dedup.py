@@ -0,0 +1,294 @@
+"""
+Near-duplicate detection of crawled pages and search results within one agent run.
+"""
+
+import contextvars
+import functools
+import hashlib
+import logging
+import threading
+from typing import Any, Optional, Type, TypeVar
+
+import numpy as np
+
+from src.config import DEDUP_ENABLED, DEDUP_MIN_SIMILARITY, DEDUP_MIN_WORDS
+from src.crawler.ranking import tokenize
+from src.prompts.compaction import estimate_tokens
+from src.service.session import get_current_session
+from src.utils.counters import Counters
+from src.utils.urls import normalize_url
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Words per shingle, the features compared between documents
+SHINGLE_WORDS = 3
+
+# MinHash signature: NUM_PERMUTATIONS values, split into LSH_BANDS bands
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+# Random universal hash functions (a * h + b) mod p, fixed so signatures are comparable
+_PRIME = np.uint64((1 << 32) + 15)
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def minhash(words: list[str]) -> np.ndarray:
+    """
+    Compute the MinHash signature of a text from its word shingles.
+
+    The share of equal values in two signatures estimates the Jaccard
+    similarity of the texts' shingle sets.
+
+    Args:
+        words: The tokenized text
+
+    Returns:
+        The signature, NUM_PERMUTATIONS values
+    """
+    shingles = {
+        " ".join(words[i : i + SHINGLE_WORDS])
+        for i in range(max(1, len(words) - SHINGLE_WORDS + 1))
+    }
+    hashes = np.fromiter(
+        (
+            int.from_bytes(
+                hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "big"
+            )
+            for shingle in shingles
+        ),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # Every product stays below 2**63, so nothing overflows
+    return ((hashes[:, None] * _A + _B) % _PRIME).min(axis=0)
+
+
+def similarity(signature: np.ndarray, other: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two documents from their signatures."""
+    return float(np.count_nonzero(signature == other)) / NUM_PERMUTATIONS
+
+
+class DedupStats(Counters):
+    """Counters of documents checked and near-duplicates collapsed."""
+
+    fields = ("documents", "duplicates", "tokens_saved")
+
+    def record(self, duplicate: bool, tokens_saved: int = 0) -> None:
+        if duplicate:
+            self.add(documents=1, duplicates=1, tokens_saved=tokens_saved)
+        else:
+            self.add(documents=1)
+
+    def to_dict(self) -> dict:
+        return self.snapshot()
+
+
+dedup_stats = DedupStats()
+
+
+class DedupIndex:
+    """MinHash signatures of the documents an agent received during one run.
+
+    Signatures are indexed by locality-sensitive hashing: each of LSH_BANDS
+    bands of a signature is a bucket key. Near-duplicates share a band with
+    high probability, so a lookup only compares against the documents in the
+    buckets of its own bands instead of every document seen so far.
+
+    Args:
+        min_similarity: Estimated Jaccard similarity from which documents are near-duplicates
+        min_words: Documents with fewer words are not checked
+        stats: Counters to record into, e.g. those of the workflow, a new one by default
+    """
+
+    def __init__(
+        self,
+        min_similarity: float = DEDUP_MIN_SIMILARITY,
+        min_words: int = DEDUP_MIN_WORDS,
+        stats: Optional[DedupStats] = None,
+    ):
+        self.min_similarity = min_similarity
+        self.min_words = min_words
+        self._buckets: list[dict[bytes, list[int]]] = [{} for _ in range(LSH_BANDS)]
+        self._signatures: list[np.ndarray] = []
+        self._sources: list[str] = []
+        self._pages: list[str] = []
+        self._lock = threading.Lock()
+        self.stats = stats if stats is not None else DedupStats()
+
+    @staticmethod
+    def _band_keys(signature: np.ndarray) -> list[bytes]:
+        return [
+            signature[i * _ROWS : (i + 1) * _ROWS].tobytes() for i in range(LSH_BANDS)
+        ]
+
+    def _find(
+        self, band_keys: list[bytes], signature: np.ndarray, page: str
+    ) -> Optional[int]:
+        seen = set()
+        for key, buckets in zip(band_keys, self._buckets):
+            for document in buckets.get(key, ()):
+                if document in seen:
+                    continue
+                seen.add(document)
+                # Another view of the same page, e.g. its sections for another
+                # query, is never a reference to itself
+                if page and self._pages[document] == page:
+                    continue
+                if (
+                    similarity(self._signatures[document], signature)
+                    >= self.min_similarity
+                ):
+                    return document
+        return None
+
+    def _add(
+        self, band_keys: list[bytes], signature: np.ndarray, source: str, page: str
+    ) -> None:
+        document = len(self._signatures)
+        self._signatures.append(signature)
+        self._sources.append(source)
+        self._pages.append(page)
+        for key, buckets in zip(band_keys, self._buckets):
+            buckets.setdefault(key, []).append(document)
+
+    def check(self, source: str, text: str, reference_tokens: int = 0) -> Optional[str]:
+        """
+        Look up a near-duplicate of a text, or remember the text as new.
+
+        Args:
+            source: Where the text comes from, e.g. its URL
+            text: The text about to be added to the messages
+            reference_tokens: Tokens of the reference replacing a duplicate
+
+        Returns:
+            The source of an earlier near-duplicate from another page, or None
+            if the text is new
+        """
+        words = tokenize(text)
+        if len(words) < self.min_words:
+            return None
+        signature = minhash(words)
+        band_keys = self._band_keys(signature)
+        page = normalize_url(source) if source else ""
+        with self._lock:
+            document = self._find(band_keys, signature, page)
+            if document is None:
+                self._add(band_keys, signature, source, page)
+                reference = None
+            else:
+                reference = self._sources[document]
+        saved = max(0, estimate_tokens(text) - reference_tokens) if reference else 0
+        self.stats.record(reference is not None, saved)
+        dedup_stats.record(reference is not None, saved)
+        if reference is not None:
+            logger.info(f"Content of {source} is a near-duplicate of {reference}")
+        return reference
+
+
+_current_index: contextvars.ContextVar[Optional[DedupIndex]] = contextvars.ContextVar(
+    "dedup_index", default=None
+)
+
+
+def get_dedup_index() -> Optional[DedupIndex]:
+    """Return the dedup index of the running agent, or None outside a deduplicated agent run."""
+    return _current_index.get()
+
+
+def dedup_scoped(node):
+    """Give every run of an agent node its own dedup index.
+
+    Tool results only stay in the messages of the agent run that called the
+    tool, other agents and later runs see its final reply. A result is thus
+    only collapsed into a reference to content the same run already received.
+    The counters of all runs add up in the workflow's "dedup_stats".
+    """
+
+    @functools.wraps(node)
+    async def wrapper(state):
+        session = get_current_session()
+        if not DEDUP_ENABLED or session is None or session.closed:
+            return await node(state)
+        index = DedupIndex(stats=session.get_resource("dedup_stats", DedupStats))
+        token = _current_index.set(index)
+        try:
+            return await node(state)
+        finally:
+            _current_index.reset(token)
+
+    return wrapper
+
+
+def duplicate_note(source: str, reference: str) -> str:
+    return f"[The content of {source} is a near-duplicate of {reference}, already provided above.]"
+
+
+def dedup_search_results(results: Any) -> Any:
+    """
+    Collapse search results whose content the running agent already received.
+
+    Args:
+        results: Search results, a list of dicts with `url` and `content`
+
+    Returns:
+        The results, near-duplicates with a reference instead of their content
+    """
+    index = get_dedup_index()
+    if index is None or not isinstance(results, list):
+        return results
+    deduped = []
+    for result in results:
+        content = result.get("content") if isinstance(result, dict) else None
+        if isinstance(content, str):
+            source = result.get("url", "")
+            reference = index.check(
+                source, content, estimate_tokens(duplicate_note(source, source))
+            )
+            if reference is not None:
+                result = {**result, "content": duplicate_note(source, reference)}
+        deduped.append(result)
+    return deduped
+
+
+class DedupResultsToolMixin:
+    """A mixin that collapses near-duplicate results of a search tool.
+
+    Expects the tool to return its results, or results and artifact as a tuple.
+    It must wrap the result store, so stored results are kept whole and only
+    collapsed on their way to the agent.
+    """
+
+    @staticmethod
+    def _deduped(output: Any) -> Any:
+        if isinstance(output, tuple) and len(output) == 2:
+            return dedup_search_results(output[0]), output[1]
+        return dedup_search_results(output)
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        return self._deduped(super()._run(*args, **kwargs))
+
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        return self._deduped(await super()._arun(*args, **kwargs))
+
+
+def create_dedup_results_tool(base_tool_class: Type[T]) -> Type[T]:
+    """
+    Factory function to create a version of a search tool class that collapses near-duplicate results.
+
+    Args:
+        base_tool_class: The original tool class
+
+    Returns:
+        A new class that inherits from both DedupResultsToolMixin and the base tool class
+    """
+
+    class DedupResultsTool(DedupResultsToolMixin, base_tool_class):
+        pass
+
+    DedupResultsTool.__name__ = base_tool_class.__name__
+    return DedupResultsTool
@@ -0,0 +1,382 @@
+"""
+Pool of preloaded Python worker processes, one interpreter session per workflow.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+from typing import NamedTuple, Optional
+
+from src.config import (
+    PYTHON_POOL_SIZE,
+    PYTHON_PRELOAD_MODULES,
+    PYTHON_EXEC_TIMEOUT,
+    PYTHON_MEMORY_LIMIT_MB,
+    PYTHON_OUTPUT_MAX_CHARS,
+)
+from src.service.session import get_current_session
+from src.utils.counters import Counters
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "python_worker.py")
+
+# Seconds a worker may take to import its preloaded modules
+STARTUP_TIMEOUT = 120
+
+
+class PythonWorkerError(Exception):
+    """Raised when a worker timed out or died, its interpreter state is lost."""
+
+
+class ExecutionResult(NamedTuple):
+    """What one execution printed, and its exception if it raised one."""
+
+    output: str
+    error: Optional[str] = None
+
+
+class PythonWorker:
+    """A Python process executing code in a namespace kept between executions.
+
+    Requests and answers are JSON lines over the process's stdin and stdout,
+    see `python_worker.py`. The memory limit applies to what the executed code
+    allocates on top of the preloaded modules.
+
+    Args:
+        preload: Modules imported before the worker is ready
+        memory_limit_mb: Memory the executed code may allocate, 0 for no limit
+    """
+
+    def __init__(self, preload: list[str], memory_limit_mb: int):
+        self._process = subprocess.Popen(
+            [
+                sys.executable,
+                WORKER_SCRIPT,
+                "--preload",
+                ",".join(preload),
+                "--memory-limit-mb",
+                str(memory_limit_mb),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+            env={**os.environ, "MPLBACKEND": "Agg"},
+        )
+        self._timed_out = False
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def _kill(self) -> None:
+        self._timed_out = True
+        self._process.kill()
+
+    def _exchange(self, request: Optional[dict], timeout: float) -> dict:
+        # Code that runs too long kills the worker, which unblocks the read below
+        self._timed_out = False
+        watchdog = threading.Timer(timeout, self._kill)
+        watchdog.start()
+        try:
+            if request is not None:
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+            line = self._process.stdout.readline()
+        except (OSError, ValueError) as e:
+            raise PythonWorkerError(f"The Python worker failed: {e!r}") from e
+        finally:
+            watchdog.cancel()
+        if self._timed_out:
+            raise PythonWorkerError(f"Execution timed out after {timeout:g} seconds")
+        if not line:
+            raise PythonWorkerError(
+                f"The Python worker exited with code {self._process.wait()}"
+            )
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError as e:
+            raise PythonWorkerError(
+                f"The Python worker sent a malformed response: {e}"
+            ) from e
+
+    def wait_ready(self, timeout: float = STARTUP_TIMEOUT) -> list[str]:
+        """
+        Wait until the worker imported its preloaded modules.
+
+        Returns:
+            The modules that failed to import
+
+        Raises:
+            PythonWorkerError: If the worker died or did not start in time
+        """
+        return self._exchange(None, timeout)["failed"]
+
+    def execute(self, code: str, timeout: float, max_output: int) -> ExecutionResult:
+        """
+        Execute code in the worker's namespace.
+
+        Args:
+            code: The Python code
+            timeout: Seconds before the worker is killed
+            max_output: Characters of printed output kept, 0 keeps everything
+
+        Returns:
+            The printed output and the exception raised by the code, if any
+
+        Raises:
+            PythonWorkerError: If the worker timed out or died
+        """
+        response = self._exchange({"code": code, "max_output": max_output}, timeout)
+        output = response["output"]
+        if response["truncated"]:
+            output += (
+                f"\n[... {response['truncated']} more characters of output truncated]"
+            )
+        return ExecutionResult(output, response["error"])
+
+    def close(self) -> None:
+        if self.alive:
+            self._process.kill()
+        self._process.wait()
+        for stream in (self._process.stdin, self._process.stdout):
+            stream.close()
+
+
+class PythonWorkerPool(Counters):
+    """Idle Python workers started ahead of demand with heavy modules imported.
+
+    Every workflow leases a worker of its own, so workflows neither share
+    variables nor wait for each other's code. Idle workers are started in the
+    background, and a workflow only starts a worker itself when none is idle
+    or starting. A released worker is never leased again: its code may have
+    changed os.environ, the working directory, imported or patched modules or
+    left threads running, so it is stopped and a fresh idle worker replaces it.
+
+    Args:
+        size: Idle workers kept ready, 0 starts a worker for every workflow
+        preload: Modules imported by every worker
+        memory_limit_mb: Memory the code of a workflow may allocate, 0 for no limit
+        timeout: Seconds one execution may run before its worker is killed
+        max_output: Characters of output returned per execution, 0 for no cap
+    """
+
+    fields = ("warm_leases", "cold_leases", "recycled", "failed")
+
+    def __init__(
+        self,
+        size: int = PYTHON_POOL_SIZE,
+        preload: Optional[list[str]] = None,
+        memory_limit_mb: int = PYTHON_MEMORY_LIMIT_MB,
+        timeout: float = PYTHON_EXEC_TIMEOUT,
+        max_output: int = PYTHON_OUTPUT_MAX_CHARS,
+    ):
+        super().__init__()
+        self.size = size
+        self.preload = PYTHON_PRELOAD_MODULES if preload is None else preload
+        self.memory_limit_mb = memory_limit_mb
+        self.timeout = timeout
+        self.max_output = max_output
+        self._idle: list[PythonWorker] = []
+        self._starting = 0
+        self._closed = False
+        self._preload_checked = False
+        self._condition = threading.Condition()
+
+    def _new_worker(self) -> PythonWorker:
+        worker = PythonWorker(self.preload, self.memory_limit_mb)
+        try:
+            failed = worker.wait_ready()
+        except PythonWorkerError:
+            worker.close()
+            raise
+        if failed and not self._preload_checked:
+            logger.warning(f"Python workers could not preload {', '.join(failed)}")
+        self._preload_checked = True
+        return worker
+
+    def _start_idle_worker(self) -> None:
+        worker = None
+        try:
+            worker = self._new_worker()
+        except Exception as e:
+            # e.g. an OSError when the interpreter cannot be spawned
+            logger.error(f"Failed to start a Python worker: {e}")
+        finally:
+            # acquire() waits for starting workers, it must always be woken
+            with self._condition:
+                self._starting -= 1
+                if worker is not None and not self._closed:
+                    self._idle.append(worker)
+                    worker = None
+                self._condition.notify_all()
+        if worker is not None:
+            worker.close()
+
+    def fill(self) -> None:
+        """Start workers in the background until `size` are idle or starting."""
+        with self._condition:
+            if self._closed:
+                return
+            missing = max(0, self.size - len(self._idle) - self._starting)
+            self._starting += missing
+        for _ in range(missing):
+            threading.Thread(
+                target=self._start_idle_worker, name="python-worker-start", daemon=True
+            ).start()
+
+    def acquire(self) -> PythonWorker:
+        """
+        Lease a worker with a fresh namespace.
+
+        Raises:
+            PythonWorkerError: If no worker could be started
+        """
+        self.fill()
+        with self._condition:
+            # A worker that is already starting is ready sooner than a new one
+            while not self._idle and self._starting and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                raise PythonWorkerError("The Python worker pool is closed")
+            worker = self._idle.pop() if self._idle else None
+        self.add(**{"warm_leases" if worker else "cold_leases": 1})
+        self.fill()
+        if worker is None or not worker.alive:
+            if worker is not None:
+                worker.close()
+            worker = self._new_worker()
+        return worker
+
+    def release(self, worker: PythonWorker) -> None:
+        """Hand back the worker of a finished workflow, it is replaced in the background."""
+        threading.Thread(
+            target=self._recycle,
+            args=(worker,),
+            name="python-worker-recycle",
+            daemon=True,
+        ).start()
+
+    def _recycle(self, worker: PythonWorker) -> None:
+        worker.close()
+        self.add(recycled=1)
+        self.fill()
+
+    def discard(self, worker: PythonWorker) -> None:
+        """Drop a leased worker that timed out or died."""
+        self.add(failed=1)
+        worker.close()
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for worker in idle:
+            worker.close()
+
+    def stats(self) -> dict:
+        with self._condition:
+            idle, starting = len(self._idle), self._starting
+        return {"idle": idle, "starting": starting, **self.snapshot()}
+
+
+class PythonSession:
+    """The interpreter of one workflow, a worker leased from the pool on first use.
+
+    Variables persist between the executions of the workflow. A worker that
+    times out or dies is replaced by a fresh one on the next execution.
+
+    Args:
+        pool: The pool leasing the worker
+    """
+
+    def __init__(self, pool: PythonWorkerPool):
+        self._pool = pool
+        self._worker: Optional[PythonWorker] = None
+        # Parallel plan steps of one workflow execute one at a time
+        self._lock = threading.Lock()
+
+    def run(self, code: str) -> ExecutionResult:
+        """
+        Execute code in the workflow's interpreter.
+
+        Raises:
+            PythonWorkerError: If no worker could be started
+        """
+        with self._lock:
+            if self._worker is None:
+                self._worker = self._pool.acquire()
+            try:
+                return self._worker.execute(
+                    code, self._pool.timeout, self._pool.max_output
+                )
+            except PythonWorkerError as e:
+                worker, self._worker = self._worker, None
+                self._pool.discard(worker)
+                return ExecutionResult(
+                    "",
+                    f"{e}. The interpreter was restarted, variables of earlier code are gone.",
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._pool.release(worker)
+
+
+_pool: Optional[PythonWorkerPool] = None
+# Code executed outside a workflow shares one session, like the former module-level REPL
+_default_session: Optional[PythonSession] = None
+_pool_lock = threading.Lock()
+
+
+def get_python_pool() -> PythonWorkerPool:
+    """Return the process-wide worker pool, starting its idle workers on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PythonWorkerPool()
+            _pool.fill()
+        return _pool
+
+
+def get_python_session() -> PythonSession:
+    """Return the Python session of the running workflow, or the shared one outside a workflow."""
+    global _default_session
+    session = get_current_session()
+    if session is not None and not session.closed:
+        return session.get_resource(
+            "python_session", lambda: PythonSession(get_python_pool())
+        )
+    pool = get_python_pool()
+    with _pool_lock:
+        if _default_session is None:
+            _default_session = PythonSession(pool)
+        return _default_session
+
+
+def python_pool_stats() -> dict:
+    with _pool_lock:
+        return _pool.stats() if _pool is not None else {"started": False}
+
+
+def close_python_pool() -> None:
+    """Stop the Python workers, e.g. on application shutdown."""
+    global _pool, _default_session
+    with _pool_lock:
+        pool, _pool = _pool, None
+        session, _default_session = _default_session, None
+    if session is not None:
+        session.close()
+    if pool is not None:
+        pool.close()
@@ -1,11 +1,10 @@
 import logging
 from typing import Annotated
 from langchain_core.tools import tool
-from langchain_experimental.utilities import PythonREPL
 from .decorators import log_io
+from .python_pool import get_python_session
 
-# Initialize REPL and logger
-repl = PythonREPL()
+# Initialize logger
 logger = logging.getLogger(__name__)
 
 
@@ -25,16 +24,20 @@ def python_repl_tool(
 
     logger.info("Executing Python code")
     try:
-        result = repl.run(code)
-        # Check if the result is an error message by looking for typical error patterns
-        if isinstance(result, str) and ("Error" in result or "Exception" in result):
-            logger.error(result)
-            return f"Error executing code:\n```python\n{code}\n```\nError: {result}"
-        logger.info("Code execution successful")
+        # Every workflow runs its code in its own worker process
+        result = get_python_session().run(code)
     except BaseException as e:
         error_msg = repr(e)
         logger.error(error_msg)
         return f"Error executing code:\n```python\n{code}\n```\nError: {error_msg}"
 
-    result_str = f"Successfully executed:\n```python\n{code}\n```\nStdout: {result}"
+    if result.error is not None:
+        logger.error(result.error)
+        stdout = f"\nStdout: {result.output}" if result.output else ""
+        return f"Error executing code:\n```python\n{code}\n```\nError: {result.error}{stdout}"
+    logger.info("Code execution successful")
+
+    result_str = (
+        f"Successfully executed:\n```python\n{code}\n```\nStdout: {result.output}"
+    )
     return result_str
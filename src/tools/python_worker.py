@@ -0,0 +1,128 @@
+"""
+Python execution worker, started as a script by the python pool.
+
+Reads one JSON request per line and answers each with one JSON line over the
+original stdin and stdout. Code runs in a namespace kept between executions,
+so the variables of a workflow persist. A worker serves a single workflow and
+is stopped after it. Only the standard library is imported here, the worker
+must not load the app.
+"""
+
+import argparse
+import builtins
+import contextlib
+import importlib
+import io
+import json
+import os
+import re
+import sys
+
+
+class CappedOutput(io.TextIOBase):
+    """Keeps the first `limit` characters written and counts the others.
+
+    Args:
+        limit: Characters kept, 0 keeps everything
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.dropped = 0
+        self._parts: list[str] = []
+        self._kept = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if self.limit and self._kept + len(text) > self.limit:
+            kept = text[: max(0, self.limit - self._kept)]
+            self.dropped += len(text) - len(kept)
+            text = kept
+        self._parts.append(text)
+        self._kept += len(text)
+        return len(text)
+
+    def getvalue(self) -> str:
+        return "".join(self._parts)
+
+
+def sanitize(code: str) -> str:
+    # LLMs sometimes wrap the code in a markdown fence, like PythonREPL strip it
+    code = re.sub(r"^(\s|`)*(?i:python)?\s*", "", code)
+    return re.sub(r"(\s|`)*$", "", code)
+
+
+def new_namespace() -> dict:
+    return {"__name__": "__main__", "__builtins__": builtins}
+
+
+def execute(code: str, namespace: dict, max_output: int) -> dict:
+    output = CappedOutput(max_output)
+    error = None
+    with contextlib.redirect_stdout(output):
+        try:
+            exec(compile(sanitize(code), "<python_repl>", "exec"), namespace)
+        except (Exception, SystemExit) as e:
+            error = repr(e)
+    return {"output": output.getvalue(), "truncated": output.dropped, "error": error}
+
+
+def limit_memory(megabytes: int) -> bool:
+    """Let the code allocate at most `megabytes` beyond what the worker uses now."""
+    try:
+        import resource
+
+        with open("/proc/self/statm") as statm:
+            used = int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (ImportError, OSError, ValueError):
+        return False
+    limit = used + megabytes * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preload", default="")
+    parser.add_argument("--memory-limit-mb", type=int, default=0)
+    args = parser.parse_args()
+
+    # The protocol keeps the original stdin and stdout. Code reading stdin
+    # gets EOF and stray writes to fd 1 go to stderr instead of the answers.
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    answers = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(2, 1)
+
+    loaded, failed = [], []
+    for module in filter(None, args.preload.split(",")):
+        try:
+            importlib.import_module(module)
+            loaded.append(module)
+        except Exception:
+            failed.append(module)
+    memory_limited = args.memory_limit_mb > 0 and limit_memory(args.memory_limit_mb)
+
+    def answer(response: dict) -> None:
+        answers.write(json.dumps(response) + "\n")
+        answers.flush()
+
+    answer(
+        {
+            "ready": True,
+            "loaded": loaded,
+            "failed": failed,
+            "memory_limited": memory_limited,
+        }
+    )
+    namespace = new_namespace()
+    for line in requests:
+        request = json.loads(line)
+        answer(execute(request["code"], namespace, request.get("max_output", 0)))
+
+
+if __name__ == "__main__":
+    main()
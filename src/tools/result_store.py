@@ -0,0 +1,158 @@
+"""
+Workflow-scoped store of tool results, so agents do not repeat searches and crawls.
+"""
+
+import json
+import logging
+import unicodedata
+from typing import Any, Optional, Type, TypeVar
+
+from src.service.session import get_current_session
+from src.utils.counters import Counters, ratio
+from src.utils.urls import normalize_url
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+# Punctuation stripped from the ends of query words, so "rates?" matches "rates"
+# while "c++" and "node.js" stay intact
+_EDGE_PUNCTUATION = "\"'.,;:!?()[]{}<>"
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query for lookups: case, whitespace, full-width forms and
+    punctuation around words are ignored."""
+    words = unicodedata.normalize("NFKC", query).lower().split()
+    return " ".join(
+        word for word in (word.strip(_EDGE_PUNCTUATION) for word in words) if word
+    )
+
+
+class ToolResultStats(Counters):
+    """Counters of tool calls answered from a result store."""
+
+    fields = ("reused", "executed")
+
+    def record(self, reused: bool) -> None:
+        self.add(**{"reused" if reused else "executed": 1})
+
+    def to_dict(self) -> dict:
+        counts = self.snapshot()
+        return {
+            "reused_calls": counts["reused"],
+            "executed_calls": counts["executed"],
+            "reuse_rate": ratio(
+                counts["reused"], counts["reused"] + counts["executed"]
+            ),
+        }
+
+
+tool_result_stats = ToolResultStats()
+
+
+class ToolResultStore:
+    """Results of the search and crawl calls made during one workflow.
+
+    Results are keyed by tool name and normalized arguments and live as
+    long as the workflow session, so an agent repeating a query or URL,
+    also during reflection-driven revisions, gets the stored result.
+    """
+
+    def __init__(self):
+        self._results: dict[str, Any] = {}
+        self.stats = ToolResultStats()
+
+    @staticmethod
+    def key(tool_name: str, arguments: Any) -> str:
+        return f"{tool_name}:{json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)}"
+
+    def get(self, key: str) -> Optional[Any]:
+        result = self._results.get(key)
+        reused = result is not None
+        self.stats.record(reused)
+        tool_result_stats.record(reused)
+        return result
+
+    def set(self, key: str, result: Any) -> None:
+        self._results[key] = result
+
+
+def get_tool_result_store() -> Optional[ToolResultStore]:
+    """Return the result store of the running workflow, or None outside a workflow."""
+    session = get_current_session()
+    if session is None or session.closed:
+        return None
+    return session.get_resource("tool_results", ToolResultStore)
+
+
+def _is_storable(result: Any) -> bool:
+    # Failed calls return an error string, possibly with an empty artifact
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    return bool(result) and not isinstance(result, str)
+
+
+class StoredResultToolMixin:
+    """A mixin that answers repeated tool calls from the workflow's result store.
+
+    String arguments are normalized with `normalize_query` before lookup.
+    """
+
+    def _stored_result_key(self, args: tuple, kwargs: dict) -> str:
+        arguments = [
+            normalize_query(arg) if isinstance(arg, str) else arg for arg in args
+        ]
+        named = {
+            key: normalize_query(value) if isinstance(value, str) else value
+            for key, value in kwargs.items()
+            if key != "run_manager"
+        }
+        return ToolResultStore.key(self.name, [arguments, named])
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        store = get_tool_result_store()
+        if store is None:
+            return super()._run(*args, **kwargs)
+        key = self._stored_result_key(args, kwargs)
+        result = store.get(key)
+        if result is not None:
+            logger.info(f"Reusing stored result of {self.name} in this workflow")
+            return result
+        result = super()._run(*args, **kwargs)
+        if _is_storable(result):
+            store.set(key, result)
+        return result
+
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        store = get_tool_result_store()
+        if store is None:
+            return await super()._arun(*args, **kwargs)
+        key = self._stored_result_key(args, kwargs)
+        result = store.get(key)
+        if result is not None:
+            logger.info(f"Reusing stored result of {self.name} in this workflow")
+            return result
+        result = await super()._arun(*args, **kwargs)
+        if _is_storable(result):
+            store.set(key, result)
+        return result
+
+
+def create_stored_result_tool(base_tool_class: Type[T]) -> Type[T]:
+    """
+    Factory function to create a version of a tool class backed by the workflow's result store.
+
+    Args:
+        base_tool_class: The original tool class
+
+    Returns:
+        A new class that inherits from both StoredResultToolMixin and the base tool class
+    """
+
+    class StoredResultTool(StoredResultToolMixin, base_tool_class):
+        pass
+
+    StoredResultTool.__name__ = base_tool_class.__name__
+    return StoredResultTool
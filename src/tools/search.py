@@ -1,10 +1,285 @@
+import asyncio
+import contextvars
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Any, NamedTuple, Optional
+
 from langchain_community.tools.tavily_search import TavilySearchResults
-from src.config import TAVILY_MAX_RESULTS
-from .decorators import create_logged_tool
+from langchain_core.runnables.config import var_child_runnable_config
+from langchain_core.tools import StructuredTool
+from src.config import (
+    TAVILY_MAX_RESULTS,
+    MULTI_SEARCH_MAX_QUERIES,
+    MULTI_SEARCH_CONCURRENCY,
+    MULTI_SEARCH_MAX_RESULTS,
+    MULTI_SEARCH_CONTENT_CHARS,
+)
+from src.crawler.ranking import ChunkIndex
+from src.service.session import get_current_session
+from src.utils.counters import Counters, ratio
+from src.utils.urls import normalize_url
+from .decorators import create_logged_tool, log_io
+from .dedup import create_dedup_results_tool
+from .result_store import create_stored_result_tool, normalize_query
+from .search_cache import create_search_cache_tool
 
 logger = logging.getLogger(__name__)
 
-# Initialize Tavily search tool with logging
-LoggedTavilySearch = create_logged_tool(TavilySearchResults)
+# Initialize Tavily search tool with logging, collapsing results the agent
+# already received, reusing results within a workflow and caching results
+# across workflows
+LoggedTavilySearch = create_logged_tool(
+    create_dedup_results_tool(
+        create_stored_result_tool(create_search_cache_tool(TavilySearchResults))
+    )
+)
 tavily_tool = LoggedTavilySearch(name="tavily_search", max_results=TAVILY_MAX_RESULTS)
+
+
+class SpeculationStats(Counters):
+    """Counters of speculative searches."""
+
+    fields = ("hits", "misses", "wasted")
+
+    def record(self, outcome: str) -> None:
+        """Count a "hits", "misses" or "wasted" speculative search."""
+        self.add(**{outcome: 1})
+
+    def to_dict(self) -> dict:
+        counts = self.snapshot()
+        return {
+            **counts,
+            "hit_rate": ratio(counts["hits"], counts["hits"] + counts["misses"]),
+        }
+
+
+speculation_stats = SpeculationStats()
+
+
+class SpeculativeSearch:
+    """A search started before it is known whether the planner will need it.
+
+    It is stored in the workflow session. The planner takes the result if
+    it searches for the same query; otherwise the search is cancelled and
+    counted as wasted when the session closes.
+    """
+
+    def __init__(self, query: str):
+        self.query = query
+        self.consumed = False
+        # Detach from the run of the node that starts it, otherwise the search
+        # would be traced and streamed as a child of that node
+        context = contextvars.copy_context()
+        context.run(var_child_runnable_config.set, None)
+        self._task = asyncio.create_task(
+            tavily_tool.ainvoke({"query": query}), context=context
+        )
+
+    def take(self, query: str) -> Optional[asyncio.Task]:
+        """Return the running search if it was started for this query."""
+        if self.consumed or query != self.query:
+            return None
+        self.consumed = True
+        return self._task
+
+    async def close(self) -> None:
+        if self.consumed:
+            return
+        speculation_stats.record("wasted")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+def start_speculative_search(query: Any) -> None:
+    """Start searching for `query` in the background of the current workflow."""
+    session = get_current_session()
+    if session is None or not isinstance(query, str) or not query:
+        return
+    session.get_resource("speculative_search", lambda: SpeculativeSearch(query))
+    logger.info("Started speculative search before planning")
+
+
+async def search_before_planning(query: str) -> Any:
+    """
+    Search for `query`, reusing the speculative search of the workflow if it matches.
+
+    Args:
+        query: The search query
+
+    Returns:
+        The search results
+    """
+    session = get_current_session()
+    speculative = session.find_resource("speculative_search") if session else None
+    task = speculative.take(query) if speculative is not None else None
+    if task is None:
+        speculation_stats.record("misses")
+        return await tavily_tool.ainvoke({"query": query})
+    speculation_stats.record("hits")
+    return await task
+
+
+# Rank offset of reciprocal rank fusion, it damps the lead of the top ranks
+RRF_K = 60
+
+
+class QueryOutcome(NamedTuple):
+    """The results of one query of a multi-query search."""
+
+    query: str
+    results: list
+    latency: float
+    error: Optional[str] = None
+
+
+def _outcome(query: str, output: Any, started: float) -> QueryOutcome:
+    latency = time.perf_counter() - started
+    if isinstance(output, BaseException):
+        return QueryOutcome(query, [], latency, repr(output))
+    if not isinstance(output, list):
+        # tavily_tool returns failures as text
+        return QueryOutcome(query, [], latency, str(output))
+    return QueryOutcome(query, output, latency)
+
+
+def _plan_queries(queries: list[str]) -> tuple[list[str], list[str]]:
+    # One search per distinct query, the queries beyond the limit are not searched
+    distinct: dict[str, str] = {}
+    for query in queries:
+        if query.strip():
+            distinct.setdefault(normalize_query(query), query)
+    planned = list(distinct.values())
+    return planned[:MULTI_SEARCH_MAX_QUERIES], planned[MULTI_SEARCH_MAX_QUERIES:]
+
+
+def merge_results(outcomes: list[QueryOutcome]) -> list[dict]:
+    """
+    Merge the results of several queries by URL and rerank them.
+
+    The ranking of every query and a BM25 ranking of the merged results
+    against all queries are combined with reciprocal rank fusion, so pages
+    found by several queries and matching them closely come first.
+
+    Args:
+        outcomes: The results of each query, best first
+
+    Returns:
+        The merged results, with the queries that found each of them
+    """
+    merged: dict[str, dict] = {}
+    fused: dict[str, float] = {}
+    for outcome in outcomes:
+        for rank, result in enumerate(outcome.results):
+            if not isinstance(result, dict) or not result.get("url"):
+                continue
+            key = normalize_url(result["url"])
+            entry = merged.get(key)
+            if entry is None or result.get("score", 0.0) > entry["score"]:
+                merged[key] = {
+                    "url": result["url"],
+                    "title": result.get("title", ""),
+                    "content": result.get("content", ""),
+                    "score": result.get("score", 0.0),
+                    "queries": entry["queries"] if entry else [],
+                }
+            # A query can return the same page under several URL variants
+            if outcome.query not in merged[key]["queries"]:
+                merged[key]["queries"].append(outcome.query)
+            fused[key] = fused.get(key, 0.0) + 1 / (RRF_K + rank + 1)
+    keys = list(merged)
+    index = ChunkIndex(
+        [f"{merged[key]['title']}\n{merged[key]['content']}" for key in keys]
+    )
+    lexical = index.search(" ".join(outcome.query for outcome in outcomes))
+    for rank, (document, _) in enumerate(lexical):
+        fused[keys[document]] += 1 / (RRF_K + rank + 1)
+    ranked = sorted(keys, key=lambda key: -fused[key])
+    return [
+        {
+            "url": merged[key]["url"],
+            "title": merged[key]["title"],
+            "content": merged[key]["content"][:MULTI_SEARCH_CONTENT_CHARS],
+            "queries": merged[key]["queries"],
+        }
+        for key in ranked[:MULTI_SEARCH_MAX_RESULTS]
+    ]
+
+
+def _multi_search_result(outcomes: list[QueryOutcome], skipped: list[str]) -> dict:
+    report = []
+    for outcome in outcomes:
+        entry = {
+            "query": outcome.query,
+            "results": len(outcome.results),
+            "latency_ms": round(outcome.latency * 1000),
+        }
+        if outcome.error is not None:
+            logger.error(f"Search for {outcome.query!r} failed: {outcome.error}")
+            entry["error"] = outcome.error
+        report.append(entry)
+    result = {"results": merge_results(outcomes), "queries": report}
+    if skipped:
+        result["not_searched"] = (
+            f"At most {MULTI_SEARCH_MAX_QUERIES} queries per call: {', '.join(skipped)}"
+        )
+    return result
+
+
+@log_io
+def multi_search(
+    queries: Annotated[
+        list[str], "The search queries, each about one aspect of the problem."
+    ],
+) -> dict:
+    """Use this to search the web for several queries at once. The results of all queries are merged by url and ranked together. Prefer it over calling tavily_search once per query."""
+    planned, skipped = _plan_queries(queries)
+
+    def search(query: str) -> QueryOutcome:
+        started = time.perf_counter()
+        try:
+            output = tavily_tool.invoke({"query": query})
+        except Exception as e:
+            output = e
+        return _outcome(query, output, started)
+
+    workers = max(1, min(len(planned), MULTI_SEARCH_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Each search runs in a copy of this context, to see the workflow session
+        futures = [
+            executor.submit(contextvars.copy_context().run, search, query)
+            for query in planned
+        ]
+        outcomes = [future.result() for future in futures]
+    return _multi_search_result(outcomes, skipped)
+
+
+@log_io
+async def amulti_search(
+    queries: Annotated[
+        list[str], "The search queries, each about one aspect of the problem."
+    ],
+) -> dict:
+    """Use this to search the web for several queries at once. The results of all queries are merged by url and ranked together. Prefer it over calling tavily_search once per query."""
+    planned, skipped = _plan_queries(queries)
+    slots = asyncio.Semaphore(MULTI_SEARCH_CONCURRENCY)
+
+    async def search(query: str) -> QueryOutcome:
+        async with slots:
+            started = time.perf_counter()
+            try:
+                output = await tavily_tool.ainvoke({"query": query})
+            except Exception as e:
+                output = e
+            return _outcome(query, output, started)
+
+    outcomes = await asyncio.gather(*(search(query) for query in planned))
+    return _multi_search_result(list(outcomes), skipped)
+
+
+# Queries run concurrently, at most MULTI_SEARCH_CONCURRENCY at a time
+multi_search_tool = StructuredTool.from_function(
+    func=multi_search,
+    coroutine=amulti_search,
+    name="multi_search_tool",
+)
@@ -0,0 +1,323 @@
+"""
+Search result cache shared across workflows, with single-flight requests.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, ClassVar, Optional, Type, TypeVar
+
+from src.config import (
+    SEARCH_CACHE_ENABLED,
+    SEARCH_CACHE_PATH,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_MAX_BYTES,
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_VOLATILE_TTL,
+)
+from src.utils.cache import LRUCache, SQLiteCache, TieredCache
+from src.utils.counters import Counters, ratio
+
+from .result_store import normalize_query
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Queries about recent events, their results go stale quickly. Chinese
+# queries are not split into words, so those terms match anywhere.
+VOLATILE_WORDS = frozenset(
+    "latest today now current currently breaking news live price prices stock".split()
+)
+VOLATILE_CJK_TERMS = (
+    "最新",
+    "今天",
+    "今日",
+    "现在",
+    "目前",
+    "新闻",
+    "实时",
+    "股价",
+    "价格",
+)
+
+
+def search_ttl(normalized_query: str) -> float:
+    """Return how long results of a normalized query are reused."""
+    volatile = not VOLATILE_WORDS.isdisjoint(normalized_query.split()) or any(
+        term in normalized_query for term in VOLATILE_CJK_TERMS
+    )
+    return SEARCH_CACHE_VOLATILE_TTL if volatile else SEARCH_CACHE_TTL
+
+
+class SearchCache(Counters):
+    """Search results keyed by tool, normalized query and search parameters.
+
+    Every entry carries its own expiry, so results of queries about recent
+    events are dropped sooner. Concurrent lookups of a query that is being
+    searched wait for that search instead of starting their own, from
+    threads and event loops alike.
+
+    Args:
+        cache: The tiered cache backing the search cache
+    """
+
+    outcomes = ("hits", "misses", "coalesced")
+    fields = (*outcomes, *(f"{outcome}_seconds" for outcome in outcomes))
+
+    def __init__(self, cache: TieredCache):
+        super().__init__()
+        self._cache = cache
+        self._in_flight_lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+
+    @staticmethod
+    def key(tool_name: str, normalized_query: str, parameters: dict) -> str:
+        payload = json.dumps(
+            [tool_name, normalized_query, parameters], sort_keys=True, default=str
+        )
+        return "search:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Any]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if not isinstance(entry, dict) or entry.get("expires_at", 0) <= time.time():
+            self._cache.delete(key)
+            return None
+        return entry["value"]
+
+    def store(self, key: str, value: Any, ttl: float) -> None:
+        self._cache.set(key, {"value": value, "expires_at": time.time() + ttl}, ttl)
+
+    def claim(self, key: str) -> tuple[Future, bool]:
+        """
+        Join the search running for `key`, or register a new one.
+
+        Returns:
+            The future of the search, and whether the caller owns it and must
+            resolve it with `release`
+        """
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            return future, True
+
+    def release(
+        self,
+        key: str,
+        future: Future,
+        result: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Resolve an owned search, waking the callers that joined it.
+
+        A None result tells them the search was abandoned.
+        """
+        with self._in_flight_lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def record(self, outcome: str, seconds: float) -> None:
+        """Count a "hits", "misses" or "coalesced" lookup and its latency."""
+        self.add(**{outcome: 1, f"{outcome}_seconds": seconds})
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        storage = self._cache.stats()
+        counts = self.snapshot()
+        lookups = sum(counts[outcome] for outcome in self.outcomes)
+        return {
+            **{outcome: counts[outcome] for outcome in self.outcomes},
+            "hit_rate": ratio(counts["hits"] + counts["coalesced"], lookups),
+            **{
+                f"{outcome}_latency_ms": ratio(
+                    counts[f"{outcome}_seconds"] * 1000, counts[outcome]
+                )
+                for outcome in self.outcomes
+            },
+            "memory_entries": storage["memory_entries"],
+            "disk_bytes": storage["disk_bytes"],
+        }
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_configured = False
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Return the process-wide search cache, or None when caching is disabled."""
+    global _search_cache, _search_cache_configured
+    if _search_cache_configured:
+        return _search_cache
+    # Threads of multi_search may ask first at the same time, they must share
+    # one cache to coalesce their searches
+    with _search_cache_lock:
+        if not _search_cache_configured and SEARCH_CACHE_ENABLED:
+            disk = (
+                SQLiteCache(
+                    SEARCH_CACHE_PATH,
+                    max_bytes=SEARCH_CACHE_MAX_BYTES,
+                    ttl=SEARCH_CACHE_TTL,
+                )
+                if SEARCH_CACHE_PATH
+                else None
+            )
+            _search_cache = SearchCache(
+                TieredCache(
+                    LRUCache(SEARCH_CACHE_MAX_ENTRIES, ttl=SEARCH_CACHE_TTL), disk
+                )
+            )
+        _search_cache_configured = True
+    return _search_cache
+
+
+def set_search_cache(cache: Optional[SearchCache]) -> None:
+    """Replace the process-wide search cache, None disables caching."""
+    global _search_cache, _search_cache_configured
+    with _search_cache_lock:
+        _search_cache = cache
+        _search_cache_configured = True
+
+
+def _is_cacheable(output: Any) -> bool:
+    # Failed searches return an error string in place of the results
+    results = output[0] if isinstance(output, tuple) and output else output
+    return isinstance(results, list)
+
+
+def _is_cancellation(error: BaseException) -> bool:
+    return isinstance(error, (asyncio.CancelledError, KeyboardInterrupt, SystemExit))
+
+
+def _from_cache(value: Any) -> Any:
+    # JSON turns the (results, raw results) tuple into a list
+    return tuple(value) if isinstance(value, list) and len(value) == 2 else value
+
+
+class SearchCacheToolMixin:
+    """A mixin that answers search tool calls from the process-wide search cache.
+
+    The query is normalized with `normalize_query`. The tool fields listed in
+    `search_cache_fields` are part of the cache key, as they change the results.
+    """
+
+    search_cache_fields: ClassVar[tuple[str, ...]] = (
+        "max_results",
+        "search_depth",
+        "include_domains",
+        "exclude_domains",
+        "include_answer",
+        "include_raw_content",
+        "include_images",
+    )
+
+    def _search_cache_key(self, query: str) -> tuple[str, str]:
+        normalized = normalize_query(query)
+        parameters = {
+            field: getattr(self, field)
+            for field in self.search_cache_fields
+            if hasattr(self, field)
+        }
+        return SearchCache.key(self.name, normalized, parameters), normalized
+
+    def _run(self, query: str, **kwargs: Any) -> Any:
+        cache = get_search_cache()
+        if cache is None:
+            return super()._run(query, **kwargs)
+        start = time.perf_counter()
+        key, normalized = self._search_cache_key(query)
+        cached = cache.lookup(key)
+        if cached is not None:
+            cache.record("hits", time.perf_counter() - start)
+            return _from_cache(cached)
+        future, owner = cache.claim(key)
+        if not owner:
+            result = future.result()
+            if result is None:
+                # The search was cancelled, search on its own
+                return super()._run(query, **kwargs)
+            cache.record("coalesced", time.perf_counter() - start)
+            return result
+        try:
+            result = super()._run(query, **kwargs)
+        except BaseException as e:
+            cache.release(key, future, error=None if _is_cancellation(e) else e)
+            raise
+        try:
+            if _is_cacheable(result):
+                cache.store(key, result, search_ttl(normalized))
+        except Exception as e:
+            logger.warning(f"Failed to store search results in the cache: {e}")
+        finally:
+            cache.release(key, future, result)
+        cache.record("misses", time.perf_counter() - start)
+        return result
+
+    async def _arun(self, query: str, **kwargs: Any) -> Any:
+        cache = get_search_cache()
+        if cache is None:
+            return await super()._arun(query, **kwargs)
+        start = time.perf_counter()
+        key, normalized = self._search_cache_key(query)
+        cached = await asyncio.to_thread(cache.lookup, key)
+        if cached is not None:
+            cache.record("hits", time.perf_counter() - start)
+            return _from_cache(cached)
+        future, owner = cache.claim(key)
+        if not owner:
+            # shield: a cancelled waiter must not cancel the search of the others
+            result = await asyncio.shield(asyncio.wrap_future(future))
+            if result is None:
+                # The search was cancelled, search on its own
+                return await super()._arun(query, **kwargs)
+            cache.record("coalesced", time.perf_counter() - start)
+            return result
+        try:
+            result = await super()._arun(query, **kwargs)
+        except BaseException as e:
+            cache.release(key, future, error=None if _is_cancellation(e) else e)
+            raise
+        # The waiters get the result even if storing it fails or is cancelled
+        try:
+            if _is_cacheable(result):
+                await asyncio.to_thread(
+                    cache.store, key, result, search_ttl(normalized)
+                )
+        except Exception as e:
+            logger.warning(f"Failed to store search results in the cache: {e}")
+        finally:
+            cache.release(key, future, result)
+        cache.record("misses", time.perf_counter() - start)
+        return result
+
+
+def create_search_cache_tool(base_tool_class: Type[T]) -> Type[T]:
+    """
+    Factory function to create a version of a search tool class backed by the search cache.
+
+    Args:
+        base_tool_class: The original tool class
+
+    Returns:
+        A new class that inherits from both SearchCacheToolMixin and the base tool class
+    """
+
+    class SearchCacheTool(SearchCacheToolMixin, base_tool_class):
+        pass
+
+    SearchCacheTool.__name__ = base_tool_class.__name__
+    return SearchCacheTool
@@ -0,0 +1,38 @@
+"""
+Thread-safe counters behind the runtime stats reported in /api/metrics.
+"""
+
+import threading
+from typing import ClassVar
+
+
+def ratio(part: float, whole: float) -> float:
+    """Return part / whole, 0 when whole is 0."""
+    return part / whole if whole else 0.0
+
+
+class Counters:
+    """Thread-safe counters named by `fields`, each an attribute starting at 0.
+
+    Stats classes subclass it and turn a `snapshot()` into their report. Their
+    module-level instance holds the process-wide totals across all workflows,
+    workflow-scoped instances live in the workflow session.
+    """
+
+    fields: ClassVar[tuple[str, ...]] = ()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        for field in self.fields:
+            setattr(self, field, 0)
+
+    def add(self, **amounts: float) -> None:
+        """Add to the named counters at once."""
+        with self._lock:
+            for field, amount in amounts.items():
+                setattr(self, field, getattr(self, field) + amount)
+
+    def snapshot(self) -> dict:
+        """Return a consistent copy of all counters."""
+        with self._lock:
+            return {field: getattr(self, field) for field in self.fields}
@@ -0,0 +1,14 @@
+"""
+URL helpers shared by the tools and the crawler.
+"""
+
+from urllib.parse import urlsplit, urlunsplit
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL for lookups: scheme and host case, fragments and trailing slashes are ignored."""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), path, parts.query, "")
+    )
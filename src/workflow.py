@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from src.config import TEAM_MEMBERS
 from src.graph import build_graph
@@ -31,15 +32,18 @@ def run_agent_workflow(user_input: str, debug: bool = False, save_logs: bool = T
         enable_debug_logging()
 
     logger.info(f"Starting workflow with user input: {user_input}")
-    result = graph.invoke(
-        {
-            # Constants
-            "TEAM_MEMBERS": TEAM_MEMBERS,
-            # Runtime Variables
-            "messages": [{"role": "user", "content": user_input}],
-            "deep_thinking_mode": True,
-            "search_before_planning": True,
-        }
+    # The graph nodes are async, so drive the graph on an event loop
+    result = asyncio.run(
+        graph.ainvoke(
+            {
+                # Constants
+                "TEAM_MEMBERS": TEAM_MEMBERS,
+                # Runtime Variables
+                "messages": [{"role": "user", "content": user_input}],
+                "deep_thinking_mode": True,
+                "search_before_planning": True,
+            }
+        )
     )
     logger.debug(f"Final workflow state: {result}")
     logger.info("Workflow completed successfully")
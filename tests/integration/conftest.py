@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.crawler import cache as crawl_cache
+from src.tools import python_pool, search_cache
+from src.tools.python_pool import PythonWorkerPool
+from src.tools.search import tavily_tool
+
+
+@pytest.fixture(autouse=True)
+def no_search_cache(monkeypatch):
+    """Searches of one test are not answered from another's, tests enable the cache themselves"""
+    monkeypatch.setattr(search_cache, "_search_cache", None)
+    monkeypatch.setattr(search_cache, "_search_cache_configured", True)
+
+
+@pytest.fixture(autouse=True)
+def no_crawl_cache(monkeypatch):
+    """Pages are fetched by every test and never read from or written to disk, tests enable the cache themselves"""
+    monkeypatch.setattr(crawl_cache, "_crawl_cache", None)
+    monkeypatch.setattr(crawl_cache, "_crawl_cache_configured", True)
+
+
+@pytest.fixture(autouse=True)
+def python_workers(monkeypatch):
+    """Code runs in workers without preloaded modules, started when a test needs one"""
+    pool = PythonWorkerPool(size=0, preload=[])
+    monkeypatch.setattr(python_pool, "_pool", pool)
+    monkeypatch.setattr(python_pool, "_default_session", None)
+    yield pool
+    python_pool.close_python_pool()
+
+
+class StubSearchBackend:
+    """Tavily API stand-in answering every query after `latency` seconds
+
+    `delays` overrides the latency of single queries, queries in `failing` fail.
+    """
+
+    def __init__(self, latency: float = 0.05, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+        self.delays: dict[str, float] = {}
+        self.failing: set[str] = set()
+        self.queries: list[str] = []
+        self._lock = threading.Lock()
+
+    def _results(self, query: str) -> dict:
+        with self._lock:
+            self.queries.append(query)
+        if self.fail or query in self.failing:
+            raise ConnectionError("search backend unavailable")
+        slug = "-".join(query.lower().split())
+        return {
+            "results": [
+                {
+                    "url": f"https://example.com/{slug}",
+                    "title": query,
+                    "content": f"Results about {query}",
+                    "score": 0.9,
+                }
+            ]
+        }
+
+    def raw_results(self, query, *args, **kwargs) -> dict:
+        time.sleep(self.delays.get(query, self.latency))
+        return self._results(query)
+
+    async def raw_results_async(self, query, *args, **kwargs) -> dict:
+        await asyncio.sleep(self.delays.get(query, self.latency))
+        return self._results(query)
+
+
+@pytest.fixture
+def backend():
+    stub = StubSearchBackend()
+    wrapper = type(tavily_tool.api_wrapper)
+    with (
+        patch.object(wrapper, "raw_results", stub.raw_results),
+        patch.object(wrapper, "raw_results_async", stub.raw_results_async),
+    ):
+        yield stub
@@ -0,0 +1,109 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import app as app_module
+from src.service.admission import AdmissionController, QueueFullError
+
+
+def test_admits_up_to_limit_then_queues_and_rejects():
+    """Slots are granted up to the limit, then queued, then rejected"""
+    controller = AdmissionController(max_concurrent=2, max_queued=1, retry_after=7)
+    first, second = controller.reserve(), controller.reserve()
+    queued = controller.reserve()
+
+    assert first.admitted and second.admitted
+    assert not queued.admitted
+    assert controller.position(queued) == 1
+    with pytest.raises(QueueFullError) as exc_info:
+        controller.reserve()
+    assert exc_info.value.retry_after == 7
+
+    controller.release(first)
+    assert queued.admitted
+    stats = controller.stats()
+    assert stats["in_flight"] == 2
+    assert stats["queue_depth"] == 0
+    assert stats["rejected_total"] == 1
+    assert stats["completed_total"] == 1
+
+
+def test_wait_for_slot_reports_positions_in_order():
+    """Queued requests see their position move up until they are admitted"""
+
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queued=5)
+        running = controller.reserve()
+        waiting = [controller.reserve() for _ in range(3)]
+        positions = []
+
+        async def consume():
+            async for position in controller.wait_for_slot(waiting[-1]):
+                positions.append(position)
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        for ticket in [running, *waiting[:-1]]:
+            controller.release(ticket)
+            await asyncio.sleep(0)
+        await asyncio.wait_for(task, timeout=1)
+        return positions, waiting[-1]
+
+    positions, last = asyncio.run(run())
+    assert positions == [3, 2, 1]
+    assert last.admitted
+
+
+def test_abandoned_ticket_leaves_queue():
+    """A client that disconnects while queued frees its place"""
+    controller = AdmissionController(max_concurrent=1, max_queued=2)
+    running = controller.reserve()
+    abandoned = controller.reserve()
+    behind = controller.reserve()
+
+    controller.release(abandoned)
+    assert controller.position(behind) == 1
+    controller.release(running)
+    assert behind.admitted
+    assert controller.stats()["abandoned_total"] == 1
+
+
+def test_chat_endpoint_returns_429_when_full():
+    """The endpoint answers 429 with Retry-After once the queue is full"""
+    controller = AdmissionController(max_concurrent=1, max_queued=0, retry_after=3)
+    controller.reserve()
+
+    with patch.object(app_module, "admission_controller", controller):
+        client = TestClient(app_module.app)
+        response = client.post(
+            "/api/chat/stream",
+            json={"messages": [{"role": "user", "content": "hello"}]},
+        )
+        metrics = client.get("/api/metrics").json()
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+    assert metrics["admission"]["rejected_total"] == 1
+
+
+def test_stream_that_never_starts_releases_its_ticket():
+    """A stream failing before its first event still gives back its slot"""
+    controller = AdmissionController(max_concurrent=1, max_queued=0)
+    ticket = controller.reserve()
+
+    async def events():
+        yield {"event": "message", "data": "{}"}
+
+    response = app_module.AdmittedEventSourceResponse(events(), controller, ticket)
+    with patch.object(
+        app_module.EventSourceResponse,
+        "__call__",
+        AsyncMock(side_effect=OSError("connection closed")),
+    ):
+        with pytest.raises(OSError):
+            asyncio.run(response({"type": "http"}, None, None))
+
+    assert ticket.released
+    assert controller.stats()["in_flight"] == 0
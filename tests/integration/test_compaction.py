@@ -0,0 +1,129 @@
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.prompts.compaction import (
+    apply_history_view,
+    compact_messages,
+    compaction_stats,
+    count_message_tokens,
+    estimate_tokens,
+)
+from src.prompts.template import apply_prompt_template
+
+ARTICLE = "# Findings\n\n" + "A long paragraph of crawled content. " * 400
+
+
+def _history() -> list:
+    messages = [
+        HumanMessage(content="Compare three databases", id="user"),
+        HumanMessage(content='{"steps": []}', name="planner", id="plan"),
+    ]
+    for index in range(10):
+        messages.append(
+            HumanMessage(content=ARTICLE, name="researcher", id=f"r{index}")
+        )
+    messages.append(
+        ToolMessage(content=ARTICLE, tool_call_id="call", name="crawl_tool", id="tool")
+    )
+    return messages
+
+
+def test_history_within_budget_is_untouched():
+    """Nothing is compacted while the history fits"""
+    messages = _history()
+    assert compact_messages(messages, budget=10**6) is messages
+    assert compact_messages(messages, budget=None) is messages
+
+
+def test_older_outputs_are_compacted_to_fit_the_budget():
+    """Old agent outputs are summarized, the request, plan and recent turns are kept"""
+    messages = _history()
+    before = sum(count_message_tokens(message) for message in messages)
+    budget = before // 2
+
+    compacted = compact_messages(messages, budget, "supervisor")
+
+    assert sum(count_message_tokens(message) for message in compacted) <= budget
+    assert compacted[0] is messages[0]
+    assert compacted[1] is messages[1]
+    assert compacted[-4:] == messages[-4:]
+    summary = compacted[2]
+    assert summary.id == "r0" and summary.name == "researcher"
+    assert summary.content.startswith("[Earlier output from researcher")
+    assert "# Findings" in summary.content
+    # The stored history is left as it was
+    assert messages[2].content == ARTICLE
+    # Compacted copies are reused so the prompt prefix stays identical
+    assert compact_messages(messages, budget)[2] is summary
+
+
+def test_prompt_template_applies_agent_budget():
+    """apply_prompt_template compacts the history and records token counts"""
+    state = {"TEAM_MEMBERS": ["researcher"], "messages": _history()}
+    before = compaction_stats.to_dict()
+
+    with patch.dict("src.prompts.compaction.AGENT_CONTEXT_BUDGET", {"reporter": 2000}):
+        messages = apply_prompt_template("reporter", state)
+
+    history_tokens = sum(count_message_tokens(message) for message in messages[1:])
+    assert history_tokens < sum(count_message_tokens(m) for m in state["messages"])
+    after = compaction_stats.to_dict()
+    assert after["compacted_prompts"] == before["compacted_prompts"] + 1
+    assert after["history_tokens_after"] < after["history_tokens_before"]
+
+
+def test_history_view_stubs_other_agents_outputs():
+    """An agent sees its own outputs, the plan and handoffs; others are stubbed"""
+    messages = [
+        HumanMessage(content="Compare three databases", id="user"),
+        HumanMessage(content='{"steps": []}', name="planner", id="plan"),
+        HumanMessage(content=ARTICLE, name="researcher", id="research"),
+        HumanMessage(content="print(1)\n" + "1\n" * 2000, name="coder", id="code"),
+        HumanMessage(content="short answer", name="browser", id="browse"),
+        HumanMessage(content="Execute step 3", name="plan_executor", id="handoff"),
+        AIMessage(content="", id="call-ai"),
+        ToolMessage(
+            content=ARTICLE, tool_call_id="call", name="crawl_tool", id="call-tool"
+        ),
+    ]
+
+    viewed = apply_history_view(messages, ["browser"])
+
+    kept = [0, 1, 4, 5, 6, 7]
+    assert all(viewed[index] is messages[index] for index in kept)
+    assert viewed[2].content.startswith("[Output from researcher omitted")
+    assert viewed[3].content.startswith("[Output from coder omitted")
+    assert count_message_tokens(viewed[2]) < 100
+    assert apply_history_view(messages, None) is messages
+
+
+def test_history_view_keeps_the_agents_own_tool_results():
+    """Tool results are named after their tool by ToolNode and are never stubbed"""
+    messages = [
+        HumanMessage(content="Compare three databases", id="user"),
+        AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "id": "call",
+                    "name": "crawl_tool",
+                    "args": {"url": "https://a.example"},
+                }
+            ],
+            id="call-ai",
+        ),
+        ToolMessage(
+            content=ARTICLE, tool_call_id="call", name="crawl_tool", id="call-tool"
+        ),
+        HumanMessage(content=ARTICLE, name="reflection", id="feedback"),
+    ]
+
+    viewed = apply_history_view(messages, [])
+
+    assert viewed is messages
+    assert viewed[2].content == ARTICLE
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("你好世界") > estimate_tokens("abcd")
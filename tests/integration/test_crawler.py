@@ -1,5 +1,20 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
 import pytest
 from src.crawler import Crawler
+from src.crawler import Article
+from src.crawler import cache as cache_module
+from src.crawler.cache import CrawlCache
+from src.crawler.jina_client import JinaClient
+from src.crawler.ranking import ChunkIndex, chunk_markdown
+from src.utils.cache import LRUCache, SQLiteCache, TieredCache
+from src.tools import crawl as crawl_module
+from src.tools.crawl import crawl_many_tool
 
 
 def test_crawler_initialization():
@@ -25,3 +40,292 @@ def test_crawler_markdown_output():
     markdown = result.to_markdown()
     assert isinstance(markdown, str)
     assert len(markdown) > 0
+
+
+def test_article_converts_to_markdown_once():
+    from src.crawler import article as article_module
+
+    article = Article(
+        title="Stub", html_content="<p>Intro</p><img src='/a.png'><p>Outro</p>"
+    )
+    article.url = "https://example.com/docs/"
+    with patch.object(article_module, "md", wraps=article_module.md) as md:
+        message = article.to_message()
+        markdown = article.to_markdown()
+        article.to_message()
+
+    assert md.call_count == 1
+    assert markdown.startswith("# Stub\n\nIntro")
+    assert message == [
+        {"type": "text", "text": "# Stub\n\nIntro"},
+        {"type": "image_url", "image_url": {"url": "https://example.com/a.png"}},
+        {"type": "text", "text": "Outro"},
+    ]
+
+
+def test_article_message_is_capped():
+    """Text beyond the cap and the images after it are dropped"""
+    article = Article(
+        title="Stub", html_content="<p>" + "word " * 1000 + "</p><img src='a.png'>"
+    )
+
+    message = article.to_message(max_chars=100)
+
+    assert len(message) == 2
+    assert len(message[0]["text"]) <= 100
+    assert "truncated" in message[1]["text"]
+    assert len(article.to_message(max_chars=0)) == 2
+
+
+def test_chunks_are_ranked_by_relevance_to_the_query():
+    index = ChunkIndex(
+        chunk_markdown(
+            "## Pricing\n\nThe plan costs 10 dollars per month.\n\n"
+            "## Installation\n\nInstall the package with pip, then run the setup command.\n\n"
+            "## 安装\n\n使用 pip 安装软件包。"
+        )
+    )
+
+    assert len(index.chunks) == 3
+    assert index.search("how do I install the package")[0][0] == 1
+    assert index.search("安装")[0][0] == 2
+    assert index.search("unrelated words") == []
+
+
+def test_long_articles_are_cut_down_to_relevant_chunks_for_a_query():
+    sections = "".join(
+        f"<h2>Section {i}</h2><p>{'Filler text about nothing in particular. ' * 30}</p>"
+        for i in range(40)
+    )
+    html = (
+        sections
+        + "<h2>Latency</h2><p>The p99 latency of the service is 42 milliseconds.</p>"
+    )
+    article = Article(title="Report", html_content=html)
+
+    message = article.to_message(query="p99 latency", token_budget=500)
+    full = article.to_message()
+
+    text = " ".join(block["text"] for block in message)
+    assert "42 milliseconds" in text
+    assert "Showing" in message[-1]["text"] and "'p99 latency'" in message[-1]["text"]
+    assert len(text) < len(" ".join(block["text"] for block in full)) / 10
+    # Short pages are returned whole
+    assert Article(title="Short", html_content="<p>p99 latency</p>").to_message(
+        query="latency"
+    ) == [{"type": "text", "text": "# Short\n\np99 latency"}]
+
+
+PAGE = "<html><head><title>Stub</title></head><body><article><h1>Stub</h1><p>Some readable content.</p></article></body></html>"
+
+
+class StubReader(BaseHTTPRequestHandler):
+    """Jina Reader and origin server stand-in.
+
+    POST answers like the reader and fails the first `failures` requests with
+    503, GET answers like an origin with an ETag.
+    """
+
+    protocol_version = "HTTP/1.1"
+    failures = 0
+    requests: list = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).requests.append(self.client_address)
+        status = 503 if len(type(self).requests) <= type(self).failures else 200
+        body = PAGE.encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        type(self).requests.append(self.client_address)
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        body = PAGE.encode()
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def reader():
+    StubReader.failures = 0
+    StubReader.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubReader)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_transient_errors_are_retried(reader):
+    """A 503 from the reader is retried with backoff instead of returned"""
+    StubReader.failures = 1
+    client = JinaClient(base_url=reader, max_retries=1)
+
+    with patch("src.crawler.http_client.CRAWLER_RETRY_BACKOFF", 0.01):
+        html = client.crawl("https://example.com")
+
+    assert "readable content" in html
+    assert len(StubReader.requests) == 2
+
+    StubReader.requests = []
+    StubReader.failures = 2
+    with patch("src.crawler.http_client.CRAWLER_RETRY_BACKOFF", 0.01):
+        with pytest.raises(httpx.HTTPStatusError):
+            client.crawl("https://example.com")
+
+
+def test_async_crawls_share_pooled_connections(reader):
+    """Concurrent async crawls reuse keep-alive connections of one client"""
+    client = JinaClient(base_url=reader)
+
+    async def run():
+        pages = []
+        for _ in range(3):
+            pages += await asyncio.gather(
+                *(client.acrawl(f"https://example.com/{i}") for i in range(2))
+            )
+        return pages
+
+    pages = asyncio.run(run())
+
+    assert all("readable content" in page for page in pages)
+    assert len(StubReader.requests) == 6
+    # Six requests over at most two connections
+    assert len(set(StubReader.requests)) <= 2
+
+
+def test_crawl_many_limits_concurrency_per_host():
+    """Pages are crawled concurrently, at most two per host, failures are reported per URL"""
+    running = {}
+    peak = {}
+
+    async def acrawl(url):
+        host = url.split("/")[2]
+        running[host] = running.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), running[host])
+        await asyncio.sleep(0.05)
+        running[host] -= 1
+        if url.endswith("broken"):
+            raise httpx.ConnectError("refused")
+        article = MagicMock()
+        article.to_message.return_value = [{"type": "text", "text": f"page {url}"}]
+        return article
+
+    urls = [f"https://a.com/{i}" for i in range(4)] + [
+        "https://b.com/0",
+        "https://b.com/broken",
+        "https://A.com/0/",
+    ]
+    with patch.object(crawl_module.crawler, "acrawl", side_effect=acrawl):
+        start = time.perf_counter()
+        result = asyncio.run(crawl_many_tool.ainvoke({"urls": urls}))
+        elapsed = time.perf_counter() - start
+
+    texts = [block["text"] for block in result["content"]]
+    assert texts[:2] == ["# Crawled content of https://a.com/0", "page https://a.com/0"]
+    assert "Failed to crawl https://b.com/broken" in texts[-1]
+    # The repeated a.com/0 is crawled once
+    assert sum(text.startswith("page ") for text in texts) == 5
+    assert peak == {"a.com": 2, "b.com": 2}
+    # Four a.com pages two at a time take two rounds, the b.com pages overlap them
+    assert elapsed < 0.05 * 3
+
+
+def use_crawl_cache(monkeypatch, cache):
+    monkeypatch.setattr(cache_module, "_crawl_cache", cache)
+    monkeypatch.setattr(cache_module, "_crawl_cache_configured", True)
+    return cache
+
+
+def stub_extractor(crawler):
+    crawler.extractor = MagicMock()
+    crawler.extractor.extract_article.side_effect = lambda html: Article(
+        title="Stub", html_content=html
+    )
+    crawler.extractor.aextract_article = AsyncMock(
+        side_effect=crawler.extractor.extract_article
+    )
+    return crawler.extractor
+
+
+def test_repeat_crawls_are_served_from_the_cache(reader, monkeypatch, tmp_path):
+    """A crawled page is reused across crawlers and processes until it goes stale"""
+    path = str(tmp_path / "crawl.sqlite")
+    cache = use_crawl_cache(
+        monkeypatch, CrawlCache(TieredCache(LRUCache(16), SQLiteCache(path)), ttl=60)
+    )
+    crawler = Crawler(JinaClient(base_url=reader))
+    extractor = stub_extractor(crawler)
+
+    first = crawler.crawl("https://example.com/docs/")
+    start = time.perf_counter()
+    second = asyncio.run(crawler.acrawl("https://Example.com/docs#intro"))
+    elapsed = time.perf_counter() - start
+
+    assert second.html_content == first.html_content
+    assert second.url == "https://Example.com/docs#intro"
+    assert elapsed < 0.01
+    assert len(StubReader.requests) == 1
+    assert extractor.extract_article.call_count == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+    # A new process only has the disk tier
+    use_crawl_cache(
+        monkeypatch, CrawlCache(TieredCache(LRUCache(16), SQLiteCache(path)), ttl=60)
+    )
+    assert crawler.crawl("https://example.com/docs").title == "Stub"
+    assert len(StubReader.requests) == 1
+
+
+def test_stale_pages_are_revalidated_when_fetched_directly(reader, monkeypatch):
+    """A stale page with an ETag costs a 304 instead of a download and extraction"""
+    cache = use_crawl_cache(monkeypatch, CrawlCache(TieredCache(LRUCache(16)), ttl=0))
+    crawler = Crawler(fetch_mode="direct")
+    extractor = stub_extractor(crawler)
+
+    first = crawler.crawl(reader + "page")
+    second = asyncio.run(crawler.acrawl(reader + "page"))
+
+    assert second.html_content == first.html_content
+    assert len(StubReader.requests) == 2
+    assert extractor.extract_article.call_count == 1
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_cache_hits_reuse_the_stored_markdown(reader, monkeypatch, tmp_path):
+    """A page served from the cache, even from disk only, is not converted to markdown again"""
+    from src.crawler import article as article_module
+
+    path = str(tmp_path / "crawl.sqlite")
+    use_crawl_cache(
+        monkeypatch, CrawlCache(TieredCache(LRUCache(16), SQLiteCache(path)), ttl=60)
+    )
+    crawler = Crawler(JinaClient(base_url=reader))
+    stub_extractor(crawler)
+
+    with patch.object(article_module, "md", wraps=article_module.md) as md:
+        first = crawler.crawl("https://example.com/docs")
+        assert md.call_count == 1
+        second = asyncio.run(crawler.acrawl("https://example.com/docs"))
+        use_crawl_cache(
+            monkeypatch,
+            CrawlCache(TieredCache(LRUCache(16), SQLiteCache(path)), ttl=60),
+        )
+        third = crawler.crawl("https://example.com/docs")
+        assert second.to_markdown() == third.to_markdown() == first.to_markdown()
+
+    assert md.call_count == 1
@@ -0,0 +1,174 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from src.crawler import Article
+from src.crawler.ranking import tokenize
+from src.service.session import WorkflowSession
+from src.tools import crawl as crawl_module
+from src.tools.crawl import crawl_many_tool, crawl_tool
+from src.tools.dedup import DedupIndex, dedup_scoped, minhash, similarity
+from src.tools.search import tavily_tool
+
+TEXT = (
+    "The central bank raised its benchmark interest rate by a quarter point on Wednesday, "
+    "citing persistent inflation in services and a labor market that remains tight. "
+    "Officials signaled that further increases are possible if price growth does not slow, "
+    "while markets had largely expected the move after strong retail sales data last week."
+)
+SYNDICATED = TEXT + " Reporting by Staff; editing by the Desk."
+UNRELATED = (
+    "The new stadium will open next spring with seating for forty thousand fans, a retractable "
+    "roof and a rail station built next to the main entrance, according to the city council, "
+    "which approved the final budget after months of debate over the cost to local taxpayers."
+)
+
+
+def test_near_duplicates_have_similar_signatures():
+    original = minhash(tokenize(TEXT))
+
+    assert similarity(original, minhash(tokenize(SYNDICATED))) >= 0.8
+    assert similarity(original, minhash(tokenize(UNRELATED))) < 0.2
+
+
+def test_index_collapses_near_duplicates_to_the_first_source():
+    index = DedupIndex()
+
+    assert index.check("https://news.example.com/rates", TEXT) is None
+    assert index.check("https://sports.example.com/stadium", UNRELATED) is None
+    assert (
+        index.check("https://mirror.example.org/rates", SYNDICATED)
+        == "https://news.example.com/rates"
+    )
+    # Too short to fingerprint reliably
+    assert index.check("https://example.com/short", "Rates rose.") is None
+
+    stats = index.stats.to_dict()
+    assert stats["documents"] == 3 and stats["duplicates"] == 1
+    assert stats["tokens_saved"] > 50
+
+
+def test_overlapping_search_results_and_crawls_are_collapsed():
+    raw_results = AsyncMock(
+        side_effect=[
+            {
+                "results": [
+                    {
+                        "url": "https://a.example.com",
+                        "content": TEXT,
+                        "title": "a",
+                        "score": 0.9,
+                    }
+                ]
+            },
+            {
+                "results": [
+                    {
+                        "url": "https://b.example.com",
+                        "content": SYNDICATED,
+                        "title": "b",
+                        "score": 0.8,
+                    }
+                ]
+            },
+        ]
+    )
+
+    @dedup_scoped
+    async def research(state):
+        await tavily_tool.ainvoke({"query": "rate decision"})
+        second = await tavily_tool.ainvoke({"query": "central bank rates"})
+        pages = await crawl_many_tool.ainvoke(
+            {
+                "urls": [
+                    "https://news.example.com/stadium",
+                    "https://mirror.example.org/stadium",
+                ]
+            }
+        )
+        return second, pages
+
+    async def run():
+        async with WorkflowSession() as session:
+            second, pages = await research({})
+            return second, pages, session.find_resource("dedup_stats").to_dict()
+
+    with (
+        patch.object(type(tavily_tool.api_wrapper), "raw_results_async", raw_results),
+        patch.object(crawl_module.crawler, "acrawl", side_effect=crawl_page(UNRELATED)),
+    ):
+        second, pages, stats = asyncio.run(run())
+
+    assert second[0]["content"] == (
+        "[The content of https://b.example.com is a near-duplicate of https://a.example.com, "
+        "already provided above.]"
+    )
+    texts = [block["text"] for block in pages["content"]]
+    assert UNRELATED in texts[1]
+    assert "near-duplicate of https://news.example.com/stadium" in texts[-1]
+    assert stats["duplicates"] == 2
+
+
+def crawl_page(text):
+    async def crawl(url):
+        article = Article(title="Page", html_content=f"<p>{text}</p>")
+        article.url = url
+        return article
+
+    return crawl
+
+
+def test_only_content_of_the_same_agent_run_is_referenced():
+    """Stored results stay whole, and another run gets the content it never read"""
+
+    @dedup_scoped
+    async def research(state):
+        return [await crawl_tool.ainvoke({"url": url}) for url in state["urls"]]
+
+    async def run():
+        async with WorkflowSession():
+            first_run = await research(
+                {
+                    "urls": [
+                        "https://news.example.com/rates",
+                        "https://mirror.example.org/rates",
+                    ]
+                }
+            )
+            second_run = await research({"urls": ["https://mirror.example.org/rates"]})
+            return first_run, second_run
+
+    with patch.object(
+        crawl_module.crawler, "acrawl", side_effect=crawl_page(TEXT)
+    ) as acrawl:
+        first_run, second_run = asyncio.run(run())
+
+    assert (
+        "near-duplicate of https://news.example.com/rates"
+        in first_run[1]["content"][0]["text"]
+    )
+    # The second run reuses the stored mirror, in full as it never read the original
+    assert acrawl.call_count == 2
+    assert second_run[0]["content"][0]["text"].startswith("# Page")
+    assert "labor market" in second_run[0]["content"][0]["text"]
+
+
+def test_a_page_is_never_a_duplicate_of_itself():
+    """Sections of the same page crawled for another query are not collapsed"""
+
+    @dedup_scoped
+    async def research(state):
+        return [
+            await crawl_tool.ainvoke(
+                {"url": "https://news.example.com/rates", "query": query}
+            )
+            for query in ("inflation", "labor market")
+        ]
+
+    async def run():
+        async with WorkflowSession():
+            return await research({})
+
+    with patch.object(crawl_module.crawler, "acrawl", side_effect=crawl_page(TEXT)):
+        first, second = asyncio.run(run())
+
+    assert second["content"] == first["content"]
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from src.crawler import readability_extractor
+from src.crawler.extraction import NodeWorkerPool, extract_with_python, node_available
+from src.crawler.readability_extractor import (
+    ReadabilityExtractor,
+    close_extraction_pools,
+)
+
+PAGE = """<html><head><title>Pooling connections | Example Blog</title></head><body>
+<nav><a href="/">Home</a> <a href="/about">About</a> <a href="/login">Sign in</a></nav>
+<article><h1>Pooling connections</h1>
+<p>Opening a new TCP connection for every request costs a handshake. A pool keeps
+connections alive and hands them to the next request, which matters most for
+<a href="https://example.com/tls">TLS</a> where the handshake takes several round trips.</p>
+<h2>Measurements</h2>
+<p>We crawled the same pages with and without a pool and compared the throughput
+at several concurrency levels, as the table below shows.</p>
+<table><tr><th>Concurrency</th><th>Pages/s</th></tr><tr><td>1</td><td>45</td></tr></table>
+<p><img src="https://example.com/chart.png" alt="Throughput chart"></p>
+<p>Pooling roughly doubled the throughput at low concurrency, and the gap stays
+large until the pool itself becomes the bottleneck.</p>
+</article>
+<footer>Copyright 2024 Example Blog. All rights reserved.</footer>
+<script>console.log("tracking")</script>
+</body></html>"""
+
+
+@pytest.fixture
+def pools():
+    yield
+    close_extraction_pools()
+
+
+def test_python_engine_keeps_the_article_structure():
+    """Headings, links, tables and images survive, navigation and footer do not"""
+    article = extract_with_python(PAGE)
+    content = article["content"]
+
+    assert article["title"] == "Pooling connections"
+    assert "<h2>Measurements</h2>" in content
+    assert '<a href="https://example.com/tls">TLS</a>' in content
+    assert "<th>Concurrency</th>" in content and "<td>45</td>" in content
+    assert '<img src="https://example.com/chart.png" alt="Throughput chart">' in content
+    assert "Sign in" not in content
+    assert "All rights reserved" not in content
+    assert "tracking" not in content
+
+
+def test_python_engine_returns_the_same_article_sync_and_async(pools):
+    extractor = ReadabilityExtractor(engine="python")
+
+    article = extractor.extract_article(PAGE)
+    async_article = asyncio.run(extractor.aextract_article(PAGE))
+
+    assert article.title == async_article.title == "Pooling connections"
+    assert article.html_content == async_article.html_content
+    assert "![Throughput chart](https://example.com/chart.png)" in article.to_markdown()
+
+
+def test_engines_warn_without_readability_js(monkeypatch, caplog):
+    monkeypatch.setattr(readability_extractor, "node_available", lambda: False)
+
+    assert ReadabilityExtractor(engine="node").engine == "readabilipy"
+    assert ReadabilityExtractor(engine="readabilipy").engine == "readabilipy"
+    assert ReadabilityExtractor(engine="python").engine == "python"
+    warnings = [r for r in caplog.records if r.levelname == "WARNING"]
+    assert len(warnings) == 2
+    assert "node engine" in warnings[0].getMessage()
+    assert "pure-Python mode" in warnings[1].getMessage()
+    with pytest.raises(ValueError):
+        ReadabilityExtractor(engine="lynx")
+
+
+@pytest.mark.skipif(
+    not node_available(), reason="Readability.js dependencies not installed"
+)
+def test_node_workers_are_reused_across_pages():
+    pool = NodeWorkerPool(size=1)
+    try:
+        first = pool.extract(PAGE)
+        worker = pool._idle.queue[0]
+        second = pool.extract(PAGE)
+
+        assert pool._idle.queue[0] is worker
+        assert first["content"] == second["content"]
+        assert "Measurements" in first["content"]
+    finally:
+        pool.close()
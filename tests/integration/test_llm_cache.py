@@ -0,0 +1,176 @@
+import time
+from uuid import uuid4
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import (
+    ChatGeneration,
+    ChatGenerationChunk,
+    ChatResult,
+    LLMResult,
+)
+
+from src.llms.cache import ResponseCache, create_cached_chat_model, set_response_cache
+from src.llms.usage import PromptCacheUsageHandler, extract_prompt_cache_usage
+from src.utils.cache import LRUCache, SQLiteCache, TieredCache
+
+
+class CountingChatModel(BaseChatModel):
+    """Chat model that echoes the last message and counts provider calls."""
+
+    temperature: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "counting"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"temperature": self.temperature}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        message = AIMessage(content=f"echo: {messages[-1].content}")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        for token in ["echo: ", messages[-1].content]:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+CachedCountingChatModel = create_cached_chat_model(CountingChatModel)
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    cache = ResponseCache(
+        TieredCache(LRUCache(8), SQLiteCache(str(tmp_path / "llm.sqlite")))
+    )
+    set_response_cache(cache)
+    yield cache
+    set_response_cache(None)
+
+
+def test_invoke_is_served_from_cache(response_cache):
+    """A repeated request is answered without calling the provider"""
+    llm = CachedCountingChatModel()
+    first = llm.invoke([HumanMessage(content="hello")])
+    second = llm.invoke([HumanMessage(content="hello", id="another-run-id")])
+
+    assert first.content == second.content == "echo: hello"
+    assert llm.calls == 1
+    assert response_cache.stats()["hits"] == 1
+
+
+def test_stream_replays_cached_chunks(response_cache):
+    """Streaming replays the cached chunks and is shared with invoke"""
+    llm = CachedCountingChatModel()
+    streamed = [chunk.content for chunk in llm.stream("hello")]
+    replayed = [chunk.content for chunk in llm.stream("hello")]
+    invoked = llm.invoke("hello")
+
+    assert streamed == replayed == ["echo: ", "hello"]
+    assert invoked.content == "echo: hello"
+    assert llm.calls == 1
+
+
+def test_sampling_parameters_are_part_of_the_key(response_cache):
+    """Different sampling parameters or bound arguments miss the cache"""
+    llm = CachedCountingChatModel()
+    llm.invoke("hello")
+    CachedCountingChatModel(temperature=0.7).invoke("hello")
+    llm.bind(response_format={"type": "json_object"}).invoke("hello")
+
+    assert response_cache.stats()["misses"] == 3
+
+
+def test_disk_tier_survives_a_new_memory_tier(tmp_path):
+    """Entries persisted to SQLite are found by a fresh process-level cache"""
+    path = str(tmp_path / "llm.sqlite")
+    set_response_cache(ResponseCache(TieredCache(LRUCache(8), SQLiteCache(path))))
+    CachedCountingChatModel().invoke("persist me")
+
+    reloaded = ResponseCache(TieredCache(LRUCache(8), SQLiteCache(path)))
+    set_response_cache(reloaded)
+    llm = CachedCountingChatModel()
+    try:
+        assert llm.invoke("persist me").content == "echo: persist me"
+        assert llm.calls == 0
+        assert reloaded.stats()["disk_hits"] == 1
+    finally:
+        set_response_cache(None)
+
+
+def test_lru_and_ttl_eviction(tmp_path):
+    """The memory tier evicts least recently used entries and expired ones"""
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+
+    disk = SQLiteCache(str(tmp_path / "ttl.sqlite"), ttl=0.01)
+    disk.set("key", {"value": 1})
+    time.sleep(0.05)
+    assert disk.get("key") is None
+
+
+def test_disk_hits_keep_their_remaining_ttl(tmp_path):
+    """An entry promoted from disk expires when it would have on disk"""
+    path = str(tmp_path / "promote.sqlite")
+    TieredCache(LRUCache(8), SQLiteCache(path)).set("key", "value", ttl=0.2)
+    cache = TieredCache(LRUCache(8, ttl=3600), SQLiteCache(path))
+
+    assert cache.get("key") == "value"
+    time.sleep(0.25)
+    assert cache.get("key") is None
+
+
+def test_disk_size_cap_evicts_oldest(tmp_path):
+    """The SQLite tier stays under its byte budget"""
+    disk = SQLiteCache(str(tmp_path / "size.sqlite"), max_bytes=100)
+    disk.set("old", "x" * 60)
+    disk.set("new", "y" * 60)
+
+    assert disk.get("old") is None
+    assert disk.get("new") == "y" * 60
+    assert disk.size_bytes() <= 100
+
+
+def test_prompt_cache_usage_is_extracted():
+    """Cached input tokens are read from usage metadata and raw provider usage"""
+    with_metadata = LLMResult(
+        generations=[
+            [
+                ChatGeneration(
+                    message=AIMessage(
+                        content="ok",
+                        usage_metadata={
+                            "input_tokens": 100,
+                            "output_tokens": 5,
+                            "total_tokens": 105,
+                            "input_token_details": {"cache_read": 80},
+                        },
+                    )
+                )
+            ]
+        ]
+    )
+    deepseek = LLMResult(
+        generations=[[ChatGeneration(message=AIMessage(content="ok"))]],
+        llm_output={
+            "token_usage": {"prompt_tokens": 50, "prompt_cache_hit_tokens": 40}
+        },
+    )
+
+    assert extract_prompt_cache_usage(with_metadata) == (100, 80)
+    assert extract_prompt_cache_usage(deepseek) == (50, 40)
+
+    handler = PromptCacheUsageHandler()
+    handler.on_llm_end(with_metadata, run_id=uuid4())
+    assert handler.stats.to_dict()["cache_hit_rate"] == 0.8
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+from src.tools import search as search_module
+from src.tools.search import QueryOutcome, merge_results, multi_search_tool, tavily_tool
+
+
+def test_queries_run_concurrently_and_report_latency(backend):
+    backend.delays = {"slow query": 0.3}
+    queries = ["slow query", "Vector databases", "vector  databases?", "rust async"]
+
+    start = time.perf_counter()
+    result = asyncio.run(multi_search_tool.ainvoke({"queries": queries}))
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    threaded = multi_search_tool.invoke({"queries": queries})
+    threaded_elapsed = time.perf_counter() - start
+
+    # Trivially different queries are searched once
+    assert sorted(backend.queries) == sorted(
+        ["slow query", "Vector databases", "rust async"] * 2
+    )
+    # As slow as the slowest query, not as all queries in a row
+    assert elapsed < 0.3 + 0.15 and threaded_elapsed < 0.3 + 0.15
+    for output in (result, threaded):
+        report = {entry["query"]: entry for entry in output["queries"]}
+        assert report["slow query"]["latency_ms"] >= 300
+        assert (
+            report["rust async"]["results"] == 1 and "error" not in report["rust async"]
+        )
+        assert len(output["results"]) == 3
+
+
+def test_failed_queries_are_reported_with_the_other_results(backend, monkeypatch):
+    monkeypatch.setattr(search_module, "MULTI_SEARCH_MAX_QUERIES", 2)
+    backend.failing = {"broken"}
+
+    result = multi_search_tool.invoke(
+        {"queries": ["broken", "stadium", "rate decision"]}
+    )
+
+    report = {entry["query"]: entry for entry in result["queries"]}
+    assert "search backend unavailable" in report["broken"]["error"]
+    assert [item["url"] for item in result["results"]] == [
+        "https://example.com/stadium"
+    ]
+    assert result["not_searched"] == "At most 2 queries per call: rate decision"
+
+
+def test_results_are_merged_by_url_and_reranked():
+    pages = {
+        "rate decision": [
+            (
+                "https://news.example.com/markets",
+                "Markets today",
+                "Stocks were flat ahead of the data.",
+            ),
+            (
+                "https://bank.example.com/rates/",
+                "Rate decision",
+                "The central bank raised the rate decision.",
+            ),
+        ],
+        "central bank rates": [
+            (
+                "https://Bank.example.com/rates#latest",
+                "Rate decision",
+                "Central bank rates rise.",
+            ),
+            (
+                "https://blog.example.org/bonds",
+                "Bond yields",
+                "Yields climbed after the announcement.",
+            ),
+        ],
+    }
+
+    async def raw_results(query, *args, **kwargs):
+        return {
+            "results": [
+                {
+                    "url": url,
+                    "title": title,
+                    "content": content,
+                    "score": 0.9 - rank / 10,
+                }
+                for rank, (url, title, content) in enumerate(pages[query])
+            ]
+        }
+
+    with patch.object(
+        type(tavily_tool.api_wrapper),
+        "raw_results_async",
+        AsyncMock(side_effect=raw_results),
+    ):
+        result = asyncio.run(multi_search_tool.ainvoke({"queries": list(pages)}))
+
+    urls = [item["url"] for item in result["results"]]
+    assert len(urls) == 3
+    # Found by both queries, it ranks first and keeps the result with the best score
+    assert result["results"][0] == {
+        "url": "https://Bank.example.com/rates#latest",
+        "title": "Rate decision",
+        "content": "Central bank rates rise.",
+        "queries": ["rate decision", "central bank rates"],
+    }
+
+
+def test_a_query_is_listed_once_per_merged_result():
+    results = [
+        {
+            "url": "https://example.com/rates/",
+            "title": "Rates",
+            "content": "Rates rose.",
+            "score": 0.5,
+        },
+        {
+            "url": "https://example.com/rates",
+            "title": "Rates",
+            "content": "Rates rose.",
+            "score": 0.9,
+        },
+    ]
+
+    merged = merge_results([QueryOutcome("rate decision", results, 0.1)])
+
+    assert len(merged) == 1
+    assert merged[0]["queries"] == ["rate decision"]
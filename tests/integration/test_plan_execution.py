@@ -0,0 +1,282 @@
+import asyncio
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.config import TEAM_MEMBERS
+from src.graph.nodes import _route_with_llm
+from src.graph.plan import parse_plan, ready_steps, route_by_plan, routing_stats
+from src.service.workflow_service import run_agent_workflow
+from src.llms.litellm_v2 import ChatLiteLLMV2
+from tests.integration.test_workflow_service import FakeAgent, FakeChatModel
+
+AGENT_LATENCY = 0.3
+
+PLAN = json.dumps(
+    {
+        "thought": "plan",
+        "title": "plan",
+        "steps": [
+            {"agent_name": "researcher", "title": "topic A", "description": "a"},
+            {"agent_name": "researcher", "title": "topic B", "description": "b"},
+            {"agent_name": "researcher", "title": "topic C", "description": "c"},
+            {"agent_name": "coder", "title": "compare", "description": "d"},
+            {"agent_name": "reporter", "title": "report", "description": "r"},
+        ],
+    }
+)
+
+
+def test_consecutive_research_steps_are_independent():
+    """Researchers only wait for the last other step, the rest wait for everything"""
+    steps = parse_plan(PLAN)
+
+    assert [sorted(step.depends_on) for step in steps] == [
+        [],
+        [],
+        [],
+        [0, 1, 2],
+        [0, 1, 2, 3],
+    ]
+    assert [step.index for step in ready_steps(steps, [])] == [0, 1, 2]
+    assert [step.index for step in ready_steps(steps, [0, 1, 2])] == [3]
+    # The reporter is left to the supervisor
+    assert ready_steps(steps, [0, 1, 2, 3]) == []
+
+
+def test_declared_dependencies_override_the_order():
+    """Explicit depends_on is used as is, ignoring forward references"""
+    steps = parse_plan(
+        json.dumps(
+            {
+                "steps": [
+                    {"agent_name": "researcher", "title": "a", "description": "a"},
+                    {
+                        "agent_name": "coder",
+                        "title": "b",
+                        "description": "b",
+                        "depends_on": [],
+                    },
+                    {"agent_name": "researcher", "title": "c", "description": "c"},
+                    {
+                        "agent_name": "coder",
+                        "title": "d",
+                        "description": "d",
+                        "depends_on": [0, 5],
+                    },
+                ]
+            }
+        )
+    )
+
+    assert [sorted(step.depends_on) for step in steps] == [[], [], [0, 1], [0]]
+    assert parse_plan("not a plan") == []
+
+
+def test_independent_steps_run_in_parallel():
+    """Research steps overlap and their results are merged in plan order"""
+
+    async def agent(state):
+        instruction = state["messages"][-1].content
+        # Later steps finish first, the history must still follow the plan
+        delay = {"A": 3, "B": 2, "C": 1}.get(instruction.split("topic ")[-1][:1], 1)
+        await asyncio.sleep(AGENT_LATENCY * delay / 3)
+        return {"messages": [AIMessage(content=f"done: {instruction.splitlines()[0]}")]}
+
+    agent_mock = MagicMock()
+    agent_mock.ainvoke = agent
+
+    async def run():
+        messages = [{"role": "user", "content": "request 0"}]
+        return [
+            event
+            async for event in run_agent_workflow(
+                messages, parallel_plan_execution=True
+            )
+        ]
+
+    with (
+        patch("src.graph.nodes.get_llm_by_type", return_value=FakeChatModel()),
+        patch("tests.integration.test_workflow_service.PLAN", PLAN),
+        patch("src.graph.nodes.research_agent", agent_mock),
+        patch("src.graph.nodes.coder_agent", agent_mock),
+    ):
+        start = time.perf_counter()
+        events = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+    # Three research steps plus the coder step, sequential would take 4 latencies
+    assert elapsed < AGENT_LATENCY * 3
+    results = [
+        message["content"]
+        for message in events[-1]["data"]["messages"]
+        if message["content"].startswith("done: ")
+    ]
+    assert results == [
+        "done: Execute step 1 of the plan: topic A",
+        "done: Execute step 2 of the plan: topic B",
+        "done: Execute step 3 of the plan: topic C",
+        "done: Execute step 4 of the plan: compare",
+    ]
+    agent_ids = [
+        event["data"]["agent_id"]
+        for event in events
+        if event["event"] == "start_of_agent"
+        and event["data"]["agent_name"] == "researcher"
+    ]
+    assert len(set(agent_ids)) == 3
+
+
+def test_plan_routing_follows_steps_and_defers_failures():
+    """The next step comes from the plan unless the last step failed"""
+    steps = parse_plan(PLAN)
+
+    first = route_by_plan(steps, [], None, HumanMessage(content=PLAN, name="planner"))
+    assert first.step.index == 0
+
+    done = HumanMessage(content="findings", name="researcher")
+    second = route_by_plan(steps, [], 0, done)
+    assert second.step.index == 1
+    assert second.completed == [0]
+
+    failed = HumanMessage(content="执行研究任务时发生错误: timeout", name="researcher")
+    assert route_by_plan(steps, [], 0, failed) is None
+    # A reply from another agent than the one dispatched is ambiguous
+    assert route_by_plan(steps, [], 0, HumanMessage(content="x", name="coder")) is None
+
+    report = HumanMessage(content="report", name="reporter")
+    assert route_by_plan(steps, [0, 1, 2, 3], 4, report).step is None
+
+
+def test_supervisor_routes_locally_when_plan_is_clear():
+    """A plan without surprises is executed without a routing LLM call"""
+    before = routing_stats.to_dict()
+
+    async def run():
+        messages = [{"role": "user", "content": "request 0"}]
+        return [event async for event in run_agent_workflow(messages)]
+
+    with (
+        patch("src.graph.nodes.get_llm_by_type", return_value=FakeChatModel()),
+        patch("tests.integration.test_workflow_service.PLAN", PLAN),
+        patch("src.graph.nodes.research_agent", FakeAgent()),
+        patch("src.graph.nodes.coder_agent", FakeAgent()),
+        patch("src.graph.nodes._route_with_llm") as route_with_llm,
+    ):
+        events = asyncio.run(run())
+
+    route_with_llm.assert_not_called()
+    after = routing_stats.to_dict()
+    # One decision per step plus the final one
+    assert after["local_decisions"] - before["local_decisions"] == 6
+    agents = [
+        event["data"]["agent_name"]
+        for event in events
+        if event["event"] == "start_of_agent"
+    ]
+    assert agents[2:] == ["researcher", "researcher", "researcher", "coder", "reporter"]
+
+
+class SloppyRouterModel(ChatLiteLLMV2):
+    """Router model that wraps its JSON answer in prose, and counts requests."""
+
+    calls: int = 0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        message = AIMessage(content='Next up:\n```json\n{"next": "Coder",}\n```')
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return self._generate(messages, stop=stop, **kwargs)
+
+
+def test_unparsable_route_is_recovered_from_the_raw_response():
+    """A malformed structured answer is repaired instead of asking again"""
+    llm = SloppyRouterModel(model="gpt-4o")
+    state = {"TEAM_MEMBERS": TEAM_MEMBERS, "messages": [HumanMessage(content="hi")]}
+    before = routing_stats.to_dict()["recovered_decisions"]
+
+    with patch("src.graph.nodes.get_llm_by_type", return_value=llm):
+        goto, browser_instruction = asyncio.run(_route_with_llm(state))
+
+    assert (goto, browser_instruction) == ("coder", None)
+    assert llm.calls == 1
+    assert routing_stats.to_dict()["recovered_decisions"] == before + 1
+
+
+class SlowPlannerModel(FakeChatModel):
+    """Streams the plan a few characters at a time, like a slow reasoning model."""
+
+    finished_at: float = 0.0
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self._reply(messages)
+        for start in range(0, len(text), 8):
+            await asyncio.sleep(0.01)
+            chunk = ChatGenerationChunk(
+                message=AIMessageChunk(content=text[start : start + 8])
+            )
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        if "Deep Researcher" in messages[0].content:
+            self.finished_at = time.perf_counter()
+
+
+def test_steps_start_while_the_plan_is_streaming():
+    """Independent steps are surfaced and started before the planner finishes"""
+    started = {}
+    plans_seen = {}
+
+    async def agent(state):
+        instruction = state["messages"][-1].content.splitlines()[0]
+        assert instruction not in started
+        started[instruction] = time.perf_counter()
+        plans_seen[instruction] = [
+            message.content
+            for message in state["messages"]
+            if getattr(message, "name", None) == "planner"
+        ]
+        await asyncio.sleep(0.05)
+        return {"messages": [AIMessage(content=f"done: {instruction}")]}
+
+    agent_mock = MagicMock()
+    agent_mock.ainvoke = agent
+    llm = SlowPlannerModel()
+
+    async def run():
+        messages = [{"role": "user", "content": "request 0"}]
+        return [
+            event
+            async for event in run_agent_workflow(
+                messages, parallel_plan_execution=True
+            )
+        ]
+
+    with (
+        patch("src.graph.nodes.get_llm_by_type", return_value=llm),
+        patch("tests.integration.test_workflow_service.PLAN", PLAN),
+        patch("src.graph.nodes.research_agent", agent_mock),
+        patch("src.graph.nodes.coder_agent", agent_mock),
+    ):
+        events = asyncio.run(run())
+
+    plan_steps = [event["data"] for event in events if event["event"] == "plan_step"]
+    assert [step["index"] for step in plan_steps] == [0, 1, 2, 3, 4]
+    assert plan_steps[3]["depends_on"] == [0, 1, 2]
+    # The research steps were started before the plan was complete, and only once
+    assert len(started) == 4
+    assert started["Execute step 1 of the plan: topic A"] < llm.finished_at
+    # Started early, the step still gets the plan streamed so far
+    early_plan = json.loads(plans_seen["Execute step 1 of the plan: topic A"][-1])
+    assert early_plan["steps"][0]["title"] == "topic A"
+    results = [
+        message["content"]
+        for message in events[-1]["data"]["messages"]
+        if message["content"].startswith("done: ")
+    ]
+    assert len(results) == 4
@@ -0,0 +1,73 @@
+from langchain_core.messages import HumanMessage
+
+from src.graph.nodes import RESPONSE_FORMAT
+from src.graph.views import FormattedMessageView
+from src.service.session import WorkflowSession
+
+
+def _history():
+    return [
+        {"role": "system", "content": "system prompt"},
+        HumanMessage(content="the request", id="user-1"),
+        HumanMessage(content="research output", name="researcher", id="research-1"),
+    ]
+
+
+def test_view_formats_team_messages_without_mutating_state():
+    """Team member messages are presented formatted while the originals stay intact"""
+    messages = _history()
+    view = FormattedMessageView(messages, ["researcher"], RESPONSE_FORMAT)
+
+    assert len(view) == 3
+    assert view[0] == {"role": "system", "content": "system prompt"}
+    assert view[1] is messages[1]
+    assert view[2].content == RESPONSE_FORMAT.format("researcher", "research output")
+    assert messages[2].content == "research output"
+
+
+def test_view_reuses_formatted_copies_across_turns():
+    """A message formatted on one turn is not formatted again on the next"""
+    messages = _history()
+    session = WorkflowSession().activate()
+    try:
+        first = FormattedMessageView(messages, ["researcher"], RESPONSE_FORMAT)[2]
+        second = FormattedMessageView(
+            [*messages, HumanMessage(content="more", name="coder", id="code-1")],
+            ["researcher", "coder"],
+            RESPONSE_FORMAT,
+        )[2]
+    finally:
+        session.deactivate()
+
+    assert first is second
+
+
+def test_view_keeps_no_copies_without_id_or_workflow():
+    """Without a workflow session, or without a message id, nothing is memoized"""
+    messages = _history()
+    messages[2] = HumanMessage(content="research output", name="researcher")
+    session = WorkflowSession().activate()
+    try:
+        first = FormattedMessageView(messages, ["researcher"], RESPONSE_FORMAT)[2]
+        second = FormattedMessageView(messages, ["researcher"], RESPONSE_FORMAT)[2]
+    finally:
+        session.deactivate()
+    assert first is not second
+    assert session.find_resource("formatted_messages") is None
+
+    messages = _history()
+    first = FormattedMessageView(messages, ["researcher"], RESPONSE_FORMAT)[2]
+    second = FormattedMessageView(messages, ["researcher"], RESPONSE_FORMAT)[2]
+    assert first is not second
+
+
+def test_view_reformats_when_content_changes():
+    """A replaced message with the same id is formatted from its new content"""
+    messages = _history()
+    FormattedMessageView(messages, ["researcher"], RESPONSE_FORMAT)[2]
+    messages[2] = HumanMessage(
+        content="revised output", name="researcher", id="research-1"
+    )
+
+    view = FormattedMessageView(messages, ["researcher"], RESPONSE_FORMAT)
+    assert "revised output" in view[2].content
@@ -0,0 +1,137 @@
+import asyncio
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.service.session import WorkflowSession
+from src.tools import python_pool
+from src.tools.python_pool import (
+    PythonSession,
+    PythonWorker,
+    PythonWorkerError,
+    PythonWorkerPool,
+)
+from src.tools.python_repl import python_repl_tool
+
+
+@pytest.fixture
+def pool():
+    pool = PythonWorkerPool(size=1, preload=["decimal"], memory_limit_mb=256, timeout=5)
+    yield pool
+    pool.close()
+
+
+def wait_for(condition) -> None:
+    # Workers are started and recycled in the background
+    deadline = time.monotonic() + 30
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+
+def wait_idle(pool: PythonWorkerPool) -> None:
+    wait_for(lambda: pool.stats()["idle"] >= 1)
+
+
+def test_workflows_get_their_own_interpreter(pool, monkeypatch):
+    monkeypatch.setattr(python_pool, "_pool", pool)
+
+    async def run(*snippets):
+        async with WorkflowSession():
+            return [python_repl_tool.invoke({"code": code}) for code in snippets]
+
+    async def main():
+        return await asyncio.gather(
+            run("x = 1", "print(x)"),
+            run("print(x)"),
+        )
+
+    first, second = asyncio.run(main())
+
+    assert "Stdout: 1" in first[1]
+    assert "NameError" in second[0]
+
+
+def test_workflows_never_share_a_worker_process(pool):
+    """Changes to the environment, the working directory and modules end with the workflow"""
+    pool.fill()
+    wait_idle(pool)
+    session = PythonSession(pool)
+    first = session.run(
+        "import decimal, os, sys\n"
+        "os.environ['SECRET'] = '1'; os.chdir('/'); decimal.patched = True\n"
+        "print(os.getpid(), 'decimal' in sys.modules)"
+    )
+    session.close()
+    wait_for(lambda: pool.stats()["recycled"] == 1 and pool.stats()["idle"] >= 1)
+    session = PythonSession(pool)
+    second = session.run(
+        "import decimal, os\n"
+        "print(os.getpid(), 'SECRET' in os.environ, os.getcwd() == '/', hasattr(decimal, 'patched'))"
+    )
+    session.close()
+
+    pid = first.output.split()[0]
+    assert first.output.split() == [pid, "True"]
+    assert second.output.split()[1:] == ["False", "False", "False"]
+    assert second.output.split()[0] != pid
+    assert pool.stats()["warm_leases"] == 2
+
+
+def test_timeouts_restart_the_interpreter(pool):
+    pool.timeout = 0.5
+    session = PythonSession(pool)
+    session.run("x = 1")
+
+    result = session.run("while True: pass")
+    after = session.run("print('x' in globals())")
+    session.close()
+
+    assert "timed out after 0.5 seconds" in result.error
+    assert after.output.strip() == "False"
+    assert pool.stats()["failed"] == 1
+
+
+@pytest.mark.skipif(
+    not os.path.exists("/proc/self/statm"), reason="memory limits need Linux"
+)
+def test_memory_and_output_are_capped(pool):
+    pool.max_output = 100
+    session = PythonSession(pool)
+
+    allocation = session.run("data = bytearray(512 * 1024 * 1024)")
+    output = session.run("print('x' * 1000)")
+    session.close()
+
+    assert "MemoryError" in allocation.error
+    assert (
+        output.output == "x" * 100 + "\n[... 901 more characters of output truncated]"
+    )
+
+
+def test_workers_that_fail_to_start_do_not_block_leases(pool, monkeypatch):
+    """A worker that cannot be spawned fails the lease instead of hanging it"""
+
+    def spawn_failure(*args, **kwargs):
+        raise OSError("cannot spawn the interpreter")
+
+    monkeypatch.setattr(python_pool, "PythonWorker", spawn_failure)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        lease = executor.submit(pool.acquire)
+        with pytest.raises(OSError):
+            lease.result(timeout=10)
+    wait_for(lambda: pool.stats()["starting"] == 0)
+    assert pool.stats()["starting"] == 0
+
+
+def test_malformed_worker_responses_are_worker_errors():
+    worker = PythonWorker([], 0)
+    worker._process.stdout.close()
+    worker._process.stdout = io.StringIO('{"failed": \n')
+    try:
+        with pytest.raises(PythonWorkerError, match="malformed response"):
+            worker.wait_ready()
+    finally:
+        worker.close()
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.service.session import WorkflowSession
+from src.tools import search_cache
+from src.tools.result_store import normalize_query
+from src.tools.search import tavily_tool
+from src.tools.search_cache import SearchCache
+from src.utils.cache import LRUCache, SQLiteCache, TieredCache
+
+
+def use_search_cache(monkeypatch, cache: SearchCache) -> SearchCache:
+    monkeypatch.setattr(search_cache, "_search_cache", cache)
+    return cache
+
+
+def test_normalize_query():
+    assert normalize_query("  Vector   Databases? ") == "vector databases"
+    assert normalize_query("ＶＥＣＴＯＲ databases！") == "vector databases"
+    assert normalize_query('"rust" vs. c++') == "rust vs c++"
+    assert normalize_query("node.js (runtime)") == "node.js runtime"
+
+
+def test_trivially_different_queries_share_results_across_workflows(
+    backend, monkeypatch, tmp_path
+):
+    cache = use_search_cache(
+        monkeypatch,
+        SearchCache(
+            TieredCache(LRUCache(16), SQLiteCache(str(tmp_path / "search.sqlite")))
+        ),
+    )
+
+    async def run(query):
+        async with WorkflowSession():
+            return await tavily_tool.ainvoke({"query": query})
+
+    first = asyncio.run(run("Vector databases"))
+    second = asyncio.run(run("vector  databases?"))
+    # A restarted process finds the results on disk
+    use_search_cache(
+        monkeypatch,
+        SearchCache(
+            TieredCache(LRUCache(16), SQLiteCache(str(tmp_path / "search.sqlite")))
+        ),
+    )
+    third = tavily_tool.invoke({"query": "VECTOR DATABASES"})
+
+    assert first == second == third
+    assert backend.queries == ["Vector databases"]
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hits_latency_ms"] < stats["misses_latency_ms"]
+
+
+def test_concurrent_identical_queries_make_one_request(backend, monkeypatch):
+    cache = use_search_cache(monkeypatch, SearchCache(TieredCache(LRUCache(16))))
+
+    async def run():
+        return await asyncio.gather(
+            *(
+                tavily_tool.ainvoke({"query": f"Rate decision{'?' * (i % 2)}"})
+                for i in range(10)
+            )
+        )
+
+    results = asyncio.run(run())
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        threaded = list(
+            executor.map(lambda _: tavily_tool.invoke({"query": "stadium"}), range(5))
+        )
+
+    assert all(result == results[0] for result in results)
+    assert all(result == threaded[0] for result in threaded)
+    assert sorted(backend.queries) == ["Rate decision", "stadium"]
+    stats = cache.stats()
+    assert stats["misses"] == 2 and stats["hits"] + stats["coalesced"] == 13
+
+
+def test_failed_and_expired_searches_are_not_reused(backend, monkeypatch):
+    use_search_cache(monkeypatch, SearchCache(TieredCache(LRUCache(16))))
+    monkeypatch.setattr(search_cache, "SEARCH_CACHE_VOLATILE_TTL", 0)
+
+    backend.fail = True
+    assert "search backend unavailable" in tavily_tool.invoke(
+        {"query": "vector databases"}
+    )
+    backend.fail = False
+    tavily_tool.invoke({"query": "vector databases"})
+    # Queries about recent events expire after SEARCH_CACHE_VOLATILE_TTL
+    tavily_tool.invoke({"query": "latest rate decision"})
+    tavily_tool.invoke({"query": "latest rate decision"})
+
+    assert len(backend.queries) == 4
+
+
+def test_failed_or_cancelled_store_does_not_block_later_searches(backend, monkeypatch):
+    cache = use_search_cache(monkeypatch, SearchCache(TieredCache(LRUCache(16))))
+
+    def failing_store(key, value, ttl):
+        raise OSError("database is locked")
+
+    monkeypatch.setattr(cache, "store", failing_store)
+    first = tavily_tool.invoke({"query": "vector databases"})
+    # The owner's waiters were released, the next search runs on its own
+    assert tavily_tool.invoke({"query": "vector databases"}) == first
+
+    async def cancel_while_storing():
+        task = asyncio.create_task(tavily_tool.ainvoke({"query": "stadium"}))
+        while "stadium" not in backend.queries:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return await asyncio.wait_for(
+            tavily_tool.ainvoke({"query": "stadium"}), timeout=1
+        )
+
+    monkeypatch.setattr(cache, "store", lambda key, value, ttl: time.sleep(0.5))
+    assert asyncio.run(cancel_while_storing())
+    assert backend.queries == [
+        "vector databases",
+        "vector databases",
+        "stadium",
+        "stadium",
+    ]
@@ -0,0 +1,69 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from langchain_core.runnables.config import var_child_runnable_config
+
+from src.service.workflow_service import run_agent_workflow
+from src.tools.search import speculation_stats
+from tests.integration.test_workflow_service import FakeAgent, FakeChatModel
+
+
+def _run(request: str, search) -> list[dict]:
+    tool = MagicMock()
+    tool.ainvoke = search
+
+    async def run():
+        messages = [{"role": "user", "content": request}]
+        return [
+            event
+            async for event in run_agent_workflow(messages, search_before_planning=True)
+        ]
+
+    with (
+        patch("src.graph.nodes.get_llm_by_type", return_value=FakeChatModel()),
+        patch("src.graph.nodes.research_agent", FakeAgent()),
+        patch("src.tools.search.tavily_tool", tool),
+    ):
+        return asyncio.run(run())
+
+
+def test_speculative_search_is_used_by_the_planner():
+    """The search started with the coordinator feeds the planner, only one request is made"""
+    queries = []
+    parent_configs = []
+
+    async def search(payload):
+        queries.append(payload["query"])
+        parent_configs.append(var_child_runnable_config.get())
+        await asyncio.sleep(0.05)
+        return [{"title": "result", "content": "searched"}]
+
+    before = speculation_stats.to_dict()
+    _run("request 0", search)
+    after = speculation_stats.to_dict()
+
+    assert queries == ["request 0"]
+    # Not run as a child of the coordinator node that started it
+    assert parent_configs == [None]
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+
+
+def test_speculative_search_is_discarded_without_handoff():
+    """A conversation the coordinator answers itself counts the search as wasted"""
+    cancelled = []
+
+    async def search(payload):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(payload["query"])
+            raise
+
+    before = speculation_stats.to_dict()
+    events = _run("request 1", search)
+    after = speculation_stats.to_dict()
+
+    assert "start_of_workflow" not in [event["event"] for event in events]
+    assert cancelled == ["request 1"]
+    assert after["wasted"] == before["wasted"] + 1
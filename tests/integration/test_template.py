@@ -1,5 +1,14 @@
+from unittest.mock import patch
+
 import pytest
-from src.prompts.template import get_prompt_template, apply_prompt_template
+from src.prompts.template import (
+    TRAILING_TIME_PLACEHOLDER,
+    apply_prompt_template,
+    get_current_time,
+    get_prompt_dependencies,
+    get_prompt_template,
+    render_prompt,
+)
 
 
 def test_get_prompt_template_success():
@@ -103,3 +112,71 @@ def test_current_time_format():
     assert any(
         line.strip().startswith("CURRENT_TIME:") for line in system_content.split("\n")
     )
+
+
+def test_coarse_time_keeps_system_prompt_stable():
+    """Within a granularity window the rendered system prompt is byte-identical"""
+    test_state = {"messages": [{"role": "user", "content": "test"}]}
+
+    with (
+        patch("src.prompts.template.PROMPT_TIME_MODE", "coarse"),
+        patch("src.prompts.template.PROMPT_TIME_GRANULARITY", 3600),
+        patch("src.prompts.template.time.time", side_effect=[7200.0, 7200.0 + 3599]),
+    ):
+        first = apply_prompt_template("supervisor", test_state)
+        second = apply_prompt_template("supervisor", test_state)
+
+    assert first[0]["content"] == second[0]["content"]
+
+
+def test_trailing_time_mode():
+    """Trailing mode keeps the time out of the system prompt"""
+    test_state = {
+        "messages": [
+            {"role": "user", "content": "test"},
+            {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [{"id": "call_1", "name": "crawl_tool", "args": {}}],
+            },
+            {
+                "role": "tool",
+                "content": "page",
+                "tool_call_id": "call_1",
+                "name": "crawl_tool",
+            },
+        ]
+    }
+
+    with patch("src.prompts.template.PROMPT_TIME_MODE", "trailing"):
+        messages = apply_prompt_template("browser", test_state)
+
+    assert TRAILING_TIME_PLACEHOLDER in messages[0]["content"]
+    assert messages[1]["content"] == "test"
+    # Not a system message, some providers reject those after tool messages
+    assert messages[-1]["role"] == "user"
+    assert messages[-1]["content"].startswith("CURRENT_TIME: ")
+
+
+def test_get_current_time_granularity():
+    """The time is rounded down to the granularity"""
+    with patch("src.prompts.template.time.time", return_value=3600 * 5 + 1234.5):
+        assert get_current_time(3600).endswith(":00:00 ")
+        assert not get_current_time().endswith(":00:00 ")
+
+
+def test_prompt_dependencies_are_derived_from_templates():
+    """Each compiled prompt knows which state keys it reads"""
+    assert get_prompt_dependencies("supervisor") == {"CURRENT_TIME", "TEAM_MEMBERS"}
+    assert "messages" not in get_prompt_dependencies("planner")
+
+
+def test_rendered_prompt_is_memoized_on_dependencies():
+    """Unchanged dependencies reuse the rendered prompt, changed ones re-render"""
+    variables = {"CURRENT_TIME": "now", "TEAM_MEMBERS": ["researcher", "coder"]}
+    first = render_prompt("supervisor", {**variables, "messages": ["a"]})
+    second = render_prompt("supervisor", {**variables, "messages": ["a", "b"]})
+    changed = render_prompt("supervisor", {**variables, "TEAM_MEMBERS": ["coder"]})
+
+    assert first is second
+    assert changed != first
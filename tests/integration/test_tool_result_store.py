@@ -0,0 +1,62 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.service.session import WorkflowSession
+from src.tools.crawl import crawl_tool
+from src.tools.result_store import get_tool_result_store, normalize_url
+from src.tools.search import search_before_planning, tavily_tool
+
+RAW_RESULTS = {
+    "results": [
+        {"url": "https://example.com", "content": "found", "title": "t", "score": 0.9}
+    ]
+}
+
+
+def test_repeated_search_in_a_workflow_is_answered_from_the_store():
+    """The pre-planning search and a researcher's repeat of it make one API call"""
+    raw_results = AsyncMock(return_value=RAW_RESULTS)
+
+    async def run():
+        async with WorkflowSession():
+            await search_before_planning("Vector  Databases")
+            repeated = await tavily_tool.ainvoke({"query": "vector databases"})
+            return repeated, get_tool_result_store().stats.to_dict()
+
+    with patch.object(type(tavily_tool.api_wrapper), "raw_results_async", raw_results):
+        repeated, stats = asyncio.run(run())
+        # A new workflow starts with an empty store
+        asyncio.run(run())
+
+    assert repeated[0]["content"] == "found"
+    assert raw_results.await_count == 2
+    assert stats == {"reused_calls": 1, "executed_calls": 1, "reuse_rate": 0.5}
+
+
+def test_repeated_crawl_is_answered_from_the_store():
+    """URLs differing only in case, fragment or trailing slash are crawled once"""
+    crawler = MagicMock()
+    crawler.crawl.return_value.to_message.return_value = [
+        {"type": "text", "text": "page"}
+    ]
+
+    async def run():
+        async with WorkflowSession():
+            first = crawl_tool.invoke({"url": "https://Example.com/docs/"})
+            second = crawl_tool.invoke({"url": "https://example.com/docs#intro"})
+            return first, second
+
+    with patch("src.tools.crawl.crawler", crawler):
+        first, second = asyncio.run(run())
+        crawl_tool.invoke({"url": "https://example.com/docs"})
+
+    assert first == second
+    # Outside a workflow every call crawls
+    assert crawler.crawl.call_count == 2
+
+
+def test_normalize_url():
+    assert (
+        normalize_url("HTTPS://Example.com/a/?q=1#top") == "https://example.com/a?q=1"
+    )
+    assert normalize_url("https://example.com") == "https://example.com/"
@@ -0,0 +1,142 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.service.session import WorkflowSession, get_current_session
+from src.service.workflow_service import run_agent_workflow
+
+PLAN = json.dumps(
+    {
+        "thought": "plan",
+        "title": "plan",
+        "steps": [{"agent_name": "researcher", "title": "t", "description": "d"}],
+    }
+)
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model that answers according to the calling node."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _reply(self, messages) -> str:
+        system_prompt = messages[0].content
+        request = messages[-1].content
+        if "You are Langmanus" in system_prompt:
+            index = int(request.split()[-1])
+            if index % 2 == 0:
+                return "handoff_to_planner()"
+            return f"Hello from workflow {index} , nice to meet you"
+        if "Deep Researcher" in system_prompt:
+            return PLAN
+        return '{"next": "FINISH"}'
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = AIMessage(content=self._reply(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        for token in self._reply(messages).split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(token + " ", chunk=chunk)
+            yield chunk
+
+
+class FakeAgent:
+    """Agent stand-in that completes every task without calling tools."""
+
+    async def ainvoke(self, state):
+        return {"messages": [AIMessage(content="task done")]}
+
+
+async def _collect(index: int) -> list[dict]:
+    messages = [{"role": "user", "content": f"request {index}"}]
+    return [event async for event in run_agent_workflow(messages)]
+
+
+def test_concurrent_workflows_do_not_share_state():
+    """Run dozens of workflows at once and check each one sees only its own output"""
+    workflow_count = 30
+
+    async def run_all():
+        return await asyncio.gather(*(_collect(i) for i in range(workflow_count)))
+
+    with (
+        patch("src.graph.nodes.get_llm_by_type", return_value=FakeChatModel()),
+        patch("src.graph.nodes.research_agent", FakeAgent()),
+    ):
+        results = asyncio.run(run_all())
+
+    workflow_ids = set()
+    for index, events in enumerate(results):
+        names = [event["event"] for event in events]
+        streamed = "".join(
+            event["data"]["delta"].get("content", "")
+            for event in events
+            if event["event"] == "message"
+        )
+        workflow_ids.update(
+            event["data"]["workflow_id"]
+            for event in events
+            if event["event"] == "start_of_workflow"
+        )
+        assert names[-1] == "final_session_state"
+        if index % 2 == 0:
+            assert "end_of_workflow" in names
+            assert "handoff" not in streamed
+            assert "start_of_workflow" in names
+        else:
+            assert "end_of_workflow" not in names
+            assert streamed.startswith(f"Hello from workflow {index} ")
+        for other in range(workflow_count):
+            if other != index:
+                assert f"workflow {other} " not in streamed
+
+    assert len(workflow_ids) == workflow_count // 2
+    assert get_current_session() is None
+
+
+class FakeResource:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def test_session_resources_are_isolated():
+    """Closing one session must not close resources owned by another"""
+
+    async def run():
+        first, second = WorkflowSession(), WorkflowSession()
+        first_browser = first.get_resource("browser", FakeResource)
+        second_browser = second.get_resource("browser", FakeResource)
+        assert first.get_resource("browser", FakeResource) is first_browser
+        await first.aclose()
+        assert first_browser.closed
+        assert not second_browser.closed
+        with pytest.raises(RuntimeError):
+            first.get_resource("other", FakeResource)
+
+    asyncio.run(run())
+
+
+def test_session_is_bound_to_context():
+    """The active session is visible inside the context it was activated in"""
+
+    async def run():
+        async with WorkflowSession() as session:
+            assert get_current_session() is session
+            seen = await asyncio.to_thread(get_current_session)
+            assert seen is session
+        assert get_current_session() is None
+
+    asyncio.run(run())